@@ -9,3 +9,5 @@ from .aes_ecb import AES_ECB
 from .aes_gcm import AES_GCM
 from .aes_ofb import AES_OFB
 from .aes_xts import AES_XTS
+from .packet_aead import PacketAEAD
+from .parallel_engine import ParallelEngine
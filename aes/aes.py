@@ -4,7 +4,8 @@
 import os
 from abc import ABC, abstractmethod
 from enum import Enum, unique
-from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, CipherContext
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes, CipherContext
+from .parallel_engine import ParallelEngine
 
 
 class AES(ABC):
@@ -15,9 +16,18 @@ class AES(ABC):
     AES_BYTE_LENGTH: int
     CIPHER_ALGORITHM = algorithms.AES
 
+    AES_BLOCK_BYTE_LENGTH = 16
     AES_IV_BYTE_LENGTH = 16
     AES_NONCE_BYTE_LENGTH = 16
 
+    # Cipher mode used for every message of the batch API, and the length of its IV
+    MESSAGE_MODE: type[modes.Mode] = None
+    MESSAGE_IV_BYTE_LENGTH = 16
+
+    # Whether every block is chained on the previous ciphertext block, which allows the
+    # decryptor to be resynchronized after lost data
+    CHAINS_ON_CIPHERTEXT = False
+
     @unique
     class AES_MODE(Enum):
         """Used to set the AES class into either Encryptor or Decryptor mode.
@@ -59,9 +69,14 @@ class AES(ABC):
         self.iv = iv
         self.nonce = nonce
 
+        self.cipher_algorithm: algorithms.AES = None
         self.cipher: Cipher = None
+        self.cipher_args: tuple = None
         self.context: CipherContext = None
 
+        # Number of bytes the context has processed
+        self.position = 0
+
         self.mode = mode
 
         self.set_mode(mode)
@@ -75,6 +90,53 @@ class AES(ABC):
             mode (AES_MODE): AES mode.
         """
 
+    def set_key(self, key: bytes):
+        """Replace the key. The algorithm object and the cipher of the previous key are dropped,
+        and the context is restarted in the current mode with the new key.
+
+        Args:
+            key (bytes): AES key, of the same length as the one it replaces
+        """
+
+        assert len(key) == len(self.key)
+
+        self.key = key
+        self.cipher_algorithm = None
+        self.cipher = None
+
+        self.set_mode(self.mode)
+
+    def _set_cipher(self, mode_type: type[modes.Mode], *mode_args):
+        """Build the cipher for the current key. The cipher is only rebuilt if the key or
+        the mode arguments (IV, nonce, tag...) changed since it was last built, and
+        the algorithm object is only rebuilt if the key changed.
+
+        Args:
+            mode_type (type[modes.Mode]): Cipher mode class
+            mode_args: Arguments of the cipher mode
+        """
+
+        cipher_args = (self.key, mode_type, mode_args)
+
+        if self.cipher is not None and cipher_args == self.cipher_args:
+            return
+
+        self.cipher = Cipher(self._get_algorithm(), mode_type(*mode_args))
+        self.cipher_args = cipher_args
+
+    def _get_algorithm(self) -> algorithms.AES:
+        """Get the algorithm object of the current key, creating it if needed. It is only
+        held by this instance, so the key isn't kept alive after the instance is gone.
+
+        Returns:
+            algorithms.AES: Algorithm object
+        """
+
+        if self.cipher_algorithm is None or self.cipher_algorithm.key != self.key:
+            self.cipher_algorithm = self.CIPHER_ALGORITHM(self.key)
+
+        return self.cipher_algorithm
+
     def _set_mode(self, mode: AES_MODE):
         """Generic function for initializing an AES context.
         Note that this function resets the previous state of the class (if present).
@@ -88,10 +150,12 @@ class AES(ABC):
         elif mode == AES.AES_MODE.DECRYPTOR:
             self.context = self.cipher.decryptor()
 
+        self.position = 0
         self.mode = mode
 
     def update(self, data: bytes) -> bytes:
-        """AES context update.
+        """AES context update. Large buffers are processed on multiple cores,
+        if the mode allows it.
 
         Args:
             data (bytes): data to encrypt or decrypt.
@@ -100,8 +164,98 @@ class AES(ABC):
             bytes: processed data.
         """
 
+        if ParallelEngine.is_worth_splitting(len(data)) and \
+                self.position % self.AES_BLOCK_BYTE_LENGTH == 0 and self._is_parallel():
+            return self._update_parallel(data)
+
+        self.position += len(data)
+
         return self.context.update(data)
 
+    def _is_parallel(self) -> bool:
+        """Check whether the blocks can currently be processed independently of each other
+
+        Returns:
+            bool: True if the mode allows parallel processing
+        """
+
+        return False
+
+    def _get_shard_mode(self, data: memoryview, offset: int) -> modes.Mode:
+        """Get the cipher mode that continues the stream at an offset of the data.
+        Only called if AES._is_parallel returns True.
+
+        Args:
+            data (memoryview): Data being processed
+            offset (int): Block aligned offset in the data
+
+        Returns:
+            modes.Mode: Cipher mode
+        """
+
+        raise NotImplementedError
+
+    def _get_shard_context(self, data: memoryview, offset: int) -> CipherContext:
+        """Create a context that continues the stream at an offset of the data
+
+        Args:
+            data (memoryview): Data being processed
+            offset (int): Block aligned offset in the data
+
+        Returns:
+            CipherContext: Cipher context
+        """
+
+        cipher = Cipher(self._get_algorithm(), self._get_shard_mode(data, offset))
+
+        return cipher.encryptor() if self.mode == AES.AES_MODE.ENCRYPTOR else cipher.decryptor()
+
+    def _update_parallel(self, data: bytes) -> bytes:
+        """Process a large buffer in block aligned shards on multiple cores. The first shard is
+        processed by the context of the instance, the others by new contexts started where they start
+        in the stream. The context of the instance is then replaced by one started after the last full
+        block, so the output is byte identical to that of a single context.
+
+        Args:
+            data (bytes): data to encrypt or decrypt.
+
+        Returns:
+            bytes: processed data.
+        """
+
+        data = memoryview(data).cast("B")
+        aligned_size = data.nbytes - data.nbytes % self.AES_BLOCK_BYTE_LENGTH
+        shards = ParallelEngine.get_shards(aligned_size)
+
+        contexts = [self.context] + [self._get_shard_context(data, start) for start, _ in shards[1:]]
+
+        processed = ParallelEngine.map(lambda context, shard: context.update(data[shard[0]:shard[1]]),
+                                       contexts, shards)
+
+        self.context = self._get_shard_context(data, aligned_size)
+        self.position += aligned_size
+
+        processed.append(self.update(data[aligned_size:]))
+
+        return b"".join(processed)
+
+    def resync(self, chaining_block: bytes):
+        """Restart the context as if the last processed ciphertext block was chaining_block,
+        so that the data following a gap can be processed without feeding in the missing data.
+        Only supported by the modes that chain on the ciphertext.
+
+        Args:
+            chaining_block (bytes): The ciphertext block preceding the next processed data
+
+        Raises:
+            NotImplementedError: Raised if the mode doesn't chain on the ciphertext
+        """
+
+        if not self.CHAINS_ON_CIPHERTEXT:
+            raise NotImplementedError(f"{type(self).__name__} can't be resynchronized")
+
+        self.context = self._get_shard_context(memoryview(chaining_block), self.AES_BLOCK_BYTE_LENGTH)
+
     def finalize(self) -> bytes:
         """AES context finalization.
 
@@ -111,6 +265,74 @@ class AES(ABC):
 
         return self.context.finalize()
 
+    def encrypt_many(self, messages: list[bytes]) -> list[tuple[bytes, bytes]]:
+        """Encrypt many independent messages with the key of this instance. Every message
+        gets its own random IV (a nonce for CTR, a tweak for XTS), all drawn with a single
+        os.urandom call. The state of the instance isn't changed.
+
+        Args:
+            messages (list[bytes]): Messages to encrypt. For ECB and CBC, their lengths
+            must be a multiple of AES.AES_BLOCK_BYTE_LENGTH.
+
+        Returns:
+            list[tuple[bytes, bytes]]: IV and ciphertext of every message
+        """
+
+        algorithm = self._get_algorithm()
+        ivs = self._generate_message_ivs(len(messages))
+
+        return [(iv, self._process_message(algorithm, iv, message, AES.AES_MODE.ENCRYPTOR))
+                for iv, message in zip(ivs, messages)]
+
+    def decrypt_many(self, messages: list[tuple[bytes, bytes]]) -> list[bytes]:
+        """Decrypt many independent messages encrypted with AES.encrypt_many.
+        The state of the instance isn't changed.
+
+        Args:
+            messages (list[tuple[bytes, bytes]]): IV and ciphertext of every message
+
+        Returns:
+            list[bytes]: Decrypted messages
+        """
+
+        algorithm = self._get_algorithm()
+
+        return [self._process_message(algorithm, iv, ciphertext, AES.AES_MODE.DECRYPTOR)
+                for iv, ciphertext in messages]
+
+    def _generate_message_ivs(self, count: int) -> list[bytes]:
+        """Generate the IV's of many messages with a single random draw
+
+        Args:
+            count (int): Number of messages
+
+        Returns:
+            list[bytes]: IV of every message
+        """
+
+        size = self.MESSAGE_IV_BYTE_LENGTH
+        ivs = os.urandom(count * size)
+
+        return [ivs[i:i + size] for i in range(0, count * size, size)]
+
+    def _process_message(self, algorithm: algorithms.AES, iv: bytes, data: bytes, mode: AES_MODE) -> bytes:
+        """Encrypt or decrypt a single message of the batch API
+
+        Args:
+            algorithm (algorithms.AES): Algorithm object of the key
+            iv (bytes): IV of the message
+            data (bytes): Message
+            mode (AES_MODE): AES mode
+
+        Returns:
+            bytes: Processed message
+        """
+
+        cipher = Cipher(algorithm, self.MESSAGE_MODE(iv))
+        context = cipher.encryptor() if mode == AES.AES_MODE.ENCRYPTOR else cipher.decryptor()
+
+        return context.update(data) + context.finalize()
+
     def reset(self):
         """Resets the current instance of the class.
         """
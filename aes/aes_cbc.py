@@ -1,7 +1,7 @@
 """AES CBC Mode implementation.
 """
 
-from cryptography.hazmat.primitives.ciphers import Cipher, modes
+from cryptography.hazmat.primitives.ciphers import modes
 from .aes import AES
 
 
@@ -9,6 +9,10 @@ class AES_CBC(AES):
     """AES CBC class.
     """
 
+    CHAINS_ON_CIPHERTEXT = True
+
+    MESSAGE_MODE = modes.CBC
+
     def __init__(self, key: bytes = None, iv: bytes = None, mode = AES.AES_MODE.ENCRYPTOR):
         """AES CBC initialization.
 
@@ -31,6 +35,30 @@ class AES_CBC(AES):
             mode (AES_MODE): AES mode.
         """
 
-        self.cipher = Cipher(self.CIPHER_ALGORITHM(self.key), modes.CBC(self.iv))
+        self._set_cipher(modes.CBC, self.iv)
 
         super()._set_mode(mode)
+
+    def _is_parallel(self) -> bool:
+        """Decrypting a block only needs the previous ciphertext block, which is already known,
+        while the encryption is sequential
+
+        Returns:
+            bool: True in the Decryptor mode
+        """
+
+        return self.mode == AES.AES_MODE.DECRYPTOR
+
+    def _get_shard_mode(self, data: memoryview, offset: int) -> modes.Mode:
+        """Get the cipher mode that continues the stream at an offset of the data, the previous
+        ciphertext block being its IV
+
+        Args:
+            data (memoryview): Data being processed
+            offset (int): Block aligned offset in the data
+
+        Returns:
+            modes.Mode: Cipher mode
+        """
+
+        return modes.CBC(bytes(data[offset - self.AES_BLOCK_BYTE_LENGTH:offset]))
@@ -1,7 +1,7 @@
 """AES CTR Mode implementation.
 """
 
-from cryptography.hazmat.primitives.ciphers import Cipher, modes
+from cryptography.hazmat.primitives.ciphers import modes
 from .aes import AES
 
 
@@ -9,6 +9,8 @@ class AES_CTR(AES):
     """AES CTR class.
     """
 
+    MESSAGE_MODE = modes.CTR
+
     def __init__(self, key: bytes = None, nonce: bytes = None, mode = AES.AES_MODE.ENCRYPTOR):
         """AES CTR initialization.
 
@@ -31,6 +33,32 @@ class AES_CTR(AES):
             mode (AES_MODE): AES mode.
         """
 
-        self.cipher = Cipher(self.CIPHER_ALGORITHM(self.key), modes.CTR(self.nonce))
+        self._set_cipher(modes.CTR, self.nonce)
 
         super()._set_mode(mode)
+
+    def _is_parallel(self) -> bool:
+        """The keystream of every block only depends on its counter
+
+        Returns:
+            bool: Always True
+        """
+
+        return True
+
+    def _get_shard_mode(self, data: memoryview, offset: int) -> modes.Mode:
+        """Get the cipher mode that continues the stream at an offset of the data, which is the nonce
+        advanced by the number of preceding blocks
+
+        Args:
+            data (memoryview): Data being processed
+            offset (int): Block aligned offset in the data
+
+        Returns:
+            modes.Mode: Cipher mode
+        """
+
+        counter = int.from_bytes(self.nonce, "big") + (self.position + offset) // self.AES_BLOCK_BYTE_LENGTH
+
+        # The counter block wraps around, as it does in OpenSSL
+        return modes.CTR((counter % (1 << 128)).to_bytes(self.AES_NONCE_BYTE_LENGTH, "big"))
@@ -9,6 +9,8 @@ class AES_ECB(AES):
     """AES ECB class.
     """
 
+    MESSAGE_IV_BYTE_LENGTH = 0
+
     def __init__(self, key: bytes = None, mode = AES.AES_MODE.ENCRYPTOR):
         """AES ECB initialization.
 
@@ -28,6 +30,78 @@ class AES_ECB(AES):
             mode (AES_MODE): AES mode.
         """
 
-        self.cipher = Cipher(self.CIPHER_ALGORITHM(self.key), modes.ECB())
+        self._set_cipher(modes.ECB)
 
         super()._set_mode(mode)
+
+    def encrypt_many(self, messages: list[bytes]) -> list[tuple[bytes, bytes]]:
+        """Encrypt many independent messages with the key of this instance. ECB has no IV,
+        so a single context is used for all of the messages.
+
+        Args:
+            messages (list[bytes]): Messages to encrypt. Their lengths must be a multiple
+            of AES.AES_BLOCK_BYTE_LENGTH.
+
+        Returns:
+            list[tuple[bytes, bytes]]: Empty IV and ciphertext of every message
+        """
+
+        context = Cipher(self._get_algorithm(), modes.ECB()).encryptor()
+
+        return [(b"", context.update(self._check_block_length(message))) for message in messages]
+
+    def decrypt_many(self, messages: list[tuple[bytes, bytes]]) -> list[bytes]:
+        """Decrypt many independent messages encrypted with AES_ECB.encrypt_many.
+
+        Args:
+            messages (list[tuple[bytes, bytes]]): Empty IV and ciphertext of every message
+
+        Returns:
+            list[bytes]: Decrypted messages
+        """
+
+        context = Cipher(self._get_algorithm(), modes.ECB()).decryptor()
+
+        return [context.update(self._check_block_length(ciphertext)) for _, ciphertext in messages]
+
+    @classmethod
+    def _check_block_length(cls, message: bytes) -> bytes:
+        """Make sure a message can't spill over into the next one, as the context is shared
+
+        Args:
+            message (bytes): Message
+
+        Raises:
+            ValueError: Raised if the message length isn't a multiple of AES.AES_BLOCK_BYTE_LENGTH
+
+        Returns:
+            bytes: The message
+        """
+
+        if len(message) % cls.AES_BLOCK_BYTE_LENGTH:
+            raise ValueError(f"The length of the message ({len(message)}) is not "
+                             f"a multiple of {cls.AES_BLOCK_BYTE_LENGTH}")
+
+        return message
+
+    def _is_parallel(self) -> bool:
+        """Every block is processed independently of the others
+
+        Returns:
+            bool: Always True
+        """
+
+        return True
+
+    def _get_shard_mode(self, data: memoryview, offset: int) -> modes.Mode:
+        """Get the cipher mode that continues the stream at an offset of the data
+
+        Args:
+            data (memoryview): Data being processed
+            offset (int): Block aligned offset in the data
+
+        Returns:
+            modes.Mode: Cipher mode
+        """
+
+        return modes.ECB()
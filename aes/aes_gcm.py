@@ -1,7 +1,8 @@
 """AES GCM Mode implementation.
 """
 
-from cryptography.hazmat.primitives.ciphers import Cipher, modes
+from cryptography.hazmat.primitives.ciphers import modes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from .aes import AES
 
 
@@ -9,6 +10,9 @@ class AES_GCM(AES):
     """AES GCM class.
     """
 
+    # 96 bit IV's are processed directly by GCM, without hashing them first
+    MESSAGE_IV_BYTE_LENGTH = 12
+
     def __init__(self, key: bytes = None, iv: bytes = None,
                  nonce: bytes = None, mode = AES.AES_MODE.ENCRYPTOR,
                  tag: bytes = None):
@@ -28,6 +32,8 @@ class AES_GCM(AES):
         """
 
         self.tag: bytes = tag
+        self.aead: AESGCM = None
+        self.aead_key: bytes = None
         super().__init__(key, iv, nonce, mode)
 
     def set_mode(self, mode: AES.AES_MODE):
@@ -40,8 +46,7 @@ class AES_GCM(AES):
         if mode == AES.AES_MODE.ENCRYPTOR:
             self.tag = None
 
-        self.cipher = Cipher(self.CIPHER_ALGORITHM(self.key),
-                             modes.GCM(self.iv, self.tag))
+        self._set_cipher(modes.GCM, self.iv, self.tag)
 
         super()._set_mode(mode)
 
@@ -78,3 +83,58 @@ class AES_GCM(AES):
         """
 
         return self.tag
+
+    # pylint: disable=arguments-differ
+    def encrypt_many(self, messages: list[bytes], associated_data: bytes = None) -> list[tuple[bytes, bytes]]:
+        """Encrypt and authenticate many independent messages in one shot each, with the key
+        of this instance. Every message gets its own random IV, all drawn with a single
+        os.urandom call. The state of the instance isn't changed.
+
+        Args:
+            messages (list[bytes]): Messages to encrypt
+            associated_data (bytes, optional): Data authenticated along with every
+            message, but not encrypted. Defaults to None.
+
+        Returns:
+            list[tuple[bytes, bytes]]: IV and ciphertext of every message, with the tag
+            appended to the ciphertext
+        """
+
+        aead = self._get_aead()
+        ivs = self._generate_message_ivs(len(messages))
+
+        return [(iv, aead.encrypt(iv, message, associated_data)) for iv, message in zip(ivs, messages)]
+
+    # pylint: disable=arguments-differ
+    def decrypt_many(self, messages: list[tuple[bytes, bytes]], associated_data: bytes = None) -> list[bytes]:
+        """Decrypt and verify many independent messages encrypted with AES_GCM.encrypt_many.
+
+        Args:
+            messages (list[tuple[bytes, bytes]]): IV and ciphertext, with the tag appended,
+            of every message
+            associated_data (bytes, optional): Data authenticated along with every
+            message. Defaults to None.
+
+        Raises:
+            cryptography.exceptions.InvalidTag: Raised if a message fails the authentication
+
+        Returns:
+            list[bytes]: Decrypted messages
+        """
+
+        aead = self._get_aead()
+
+        return [aead.decrypt(iv, ciphertext, associated_data) for iv, ciphertext in messages]
+
+    def _get_aead(self) -> AESGCM:
+        """Get the one-shot AEAD object for the current key
+
+        Returns:
+            AESGCM: AEAD object
+        """
+
+        if self.aead_key != self.key:
+            self.aead = AESGCM(self.key)
+            self.aead_key = self.key
+
+        return self.aead
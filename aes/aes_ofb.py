@@ -1,7 +1,7 @@
 """AES OFB mode implementation.
 """
 
-from cryptography.hazmat.primitives.ciphers import Cipher, modes
+from cryptography.hazmat.primitives.ciphers import modes
 from .aes import AES
 
 
@@ -9,6 +9,8 @@ class AES_OFB(AES):
     """AES OFB class.
     """
 
+    MESSAGE_MODE = modes.OFB
+
     def __init__(self, key: bytes = None, iv: bytes = None, mode = AES.AES_MODE.ENCRYPTOR):
         """AES generic interface initialization.
 
@@ -31,6 +33,6 @@ class AES_OFB(AES):
             mode (AES_MODE): AES mode.
         """
 
-        self.cipher = Cipher(self.CIPHER_ALGORITHM(self.key), modes.OFB(self.iv))
+        self._set_cipher(modes.OFB, self.iv)
 
         super()._set_mode(mode)
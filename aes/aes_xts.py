@@ -1,37 +1,68 @@
 """AES XTS Mode implementation.
 """
 
-import os
-from cryptography.hazmat.primitives.ciphers import Cipher, modes, CipherContext
+import mmap
+from cryptography.hazmat.primitives.ciphers import modes
 from .aes import AES
+from .parallel_engine import ParallelEngine
 
 
 class AES_XTS(AES):
-    """AES XTS class.
+    """AES XTS class. The data is split into fixed size sectors (XTS data units), and every
+    sector is encrypted on its own, with the tweak derived from its index. Any sector can then be
+    encrypted, decrypted, transmitted or retransmitted independently of the others, as there is
+    no chaining state between them.
     """
 
+    MESSAGE_MODE = modes.XTS
+
+    SECTOR_BYTE_LENGTH = 4096
+    TWEAK_BYTE_LENGTH = 16
+
     # pylint: disable=super-init-not-called
-    def __init__(self, key: bytes = None, mode = AES.AES_MODE.ENCRYPTOR):
+    def __init__(self, key: bytes = None, mode = AES.AES_MODE.ENCRYPTOR, sector_size: int = None):
         """AES XTS Mode initialization.
 
         Args:
-            key (bytes, optional): AES key. It's length must be equal to AES.AES_BYTE_LENGTH
+            key (bytes, optional): AES key. It's length must be equal to 2 * AES.AES_BYTE_LENGTH. If its
+                                   length is equal to AES.AES_BYTE_LENGTH, it is extended with random bytes,
                                    or if None is supplied a new one will be automatically generated.
                                    Defaults to None.
             mode (AES.AES_MODE, optional): Sets the state of the AES instance. Defaults to AES_MODE.ENCRYPTOR.
+            sector_size (int, optional): Size of the sectors. Must be a multiple of AES.AES_BLOCK_BYTE_LENGTH.
+                                         If None is supplied, AES_XTS.SECTOR_BYTE_LENGTH will be used.
+                                         Defaults to None.
+
+        Raises:
+            ValueError: Raised if the sector size isn't a multiple of AES.AES_BLOCK_BYTE_LENGTH
         """
 
-        self.tweak = os.urandom(16)
         self.key = key
 
         if not self.key:
             self.key = self.generate_secure_key()
 
         if len(self.key) == AES.AES_BYTE_LENGTH:
-            self.key += os.urandom(len(self.key))
+            self.key += self.generate_secure_key()
+
+        assert len(self.key) == 2 * AES.AES_BYTE_LENGTH
+
+        self.sector_size = sector_size if sector_size is not None else self.SECTOR_BYTE_LENGTH
+
+        if self.sector_size <= 0 or self.sector_size % AES.AES_BLOCK_BYTE_LENGTH != 0:
+            raise ValueError(f"Invalid sector size {self.sector_size}. It must be a "
+                             f"multiple of {AES.AES_BLOCK_BYTE_LENGTH}.")
 
-        self.cipher: Cipher = None
-        self.context: CipherContext = None
+        self.cipher_algorithm = None
+        self.cipher = None
+        self.cipher_args: tuple = None
+        self.context = None
+
+        # Index of the next sector processed by AES_XTS.update, and the data held back
+        # until it fills the sector
+        self.sector = 0
+        self.pending = bytearray()
+        self.position = 0
 
         self.mode = mode
 
@@ -43,13 +74,245 @@ class AES_XTS(AES):
         self.set_mode(self.mode)
 
     def set_mode(self, mode: AES.AES_MODE):
-        """Set the AES mode to either Encryptor or Decryptor.
+        """Set the AES mode to either Encryptor or Decryptor, and restart the stream
+        processed by AES_XTS.update at the first sector.
 
         Args:
             mode (AES_MODE): AES mode.
         """
 
-        self.cipher = Cipher(self.CIPHER_ALGORITHM(self.key),
-                             modes.XTS(self.tweak))
+        # Every sector gets its own cipher, the arguments only identify the ciphertext
+        # for the ciphertext cache
+        self.cipher_args = (self.key, modes.XTS, (self.sector_size.to_bytes(8, "big"),))
+
+        self.sector = 0
+        self.pending = bytearray()
+        self.position = 0
+        self.mode = mode
+
+    @classmethod
+    def get_tweak(cls, sector: int) -> bytes:
+        """Derive the tweak of a sector, its index as a little endian integer as in IEEE 1619
+
+        Args:
+            sector (int): Index of the sector
+
+        Returns:
+            bytes: 128 bit tweak
+        """
+
+        return sector.to_bytes(cls.TWEAK_BYTE_LENGTH, "little")
+
+    def encrypt_sector(self, sector: int, data: bytes) -> bytes:
+        """Encrypt a single sector. The state of the instance isn't changed.
+
+        Args:
+            sector (int): Index of the sector
+            data (bytes): Sector data, at least AES.AES_BLOCK_BYTE_LENGTH bytes long. Any buffer is accepted.
+
+        Raises:
+            ValueError: Raised if the data is shorter than an AES block
+
+        Returns:
+            bytes: Encrypted sector
+        """
+
+        self._check_sector_length(data)
+
+        return self._process_message(self._get_algorithm(), self.get_tweak(sector), data,
+                                     AES.AES_MODE.ENCRYPTOR)
+
+    def decrypt_sector(self, sector: int, data: bytes) -> bytes:
+        """Decrypt a single sector. The state of the instance isn't changed.
+
+        Args:
+            sector (int): Index of the sector
+            data (bytes): Encrypted sector, at least AES.AES_BLOCK_BYTE_LENGTH bytes long.
+            Any buffer is accepted.
+
+        Raises:
+            ValueError: Raised if the data is shorter than an AES block
+
+        Returns:
+            bytes: Sector data
+        """
+
+        self._check_sector_length(data)
+
+        return self._process_message(self._get_algorithm(), self.get_tweak(sector), data,
+                                     AES.AES_MODE.DECRYPTOR)
+
+    @staticmethod
+    def _check_sector_length(data: bytes):
+        """Check that a single sector holds at least one AES block, which XTS requires
+
+        Args:
+            data (bytes): Sector
+
+        Raises:
+            ValueError: Raised if the sector is shorter than an AES block
+        """
+
+        if memoryview(data).nbytes < AES.AES_BLOCK_BYTE_LENGTH:
+            raise ValueError(f"A sector must be at least {AES.AES_BLOCK_BYTE_LENGTH} bytes long")
+
+    def encrypt_sectors(self, volume: bytearray or mmap.mmap, first_sector: int = 0,
+                        sector_count: int = None):
+        """Encrypt a range of sectors of a volume in place. See AES_XTS.process_sectors.
+
+        Args:
+            volume (bytearray or mmap.mmap): Writable buffer holding the whole volume
+            first_sector (int, optional): Index of the first processed sector. Defaults to 0.
+            sector_count (int, optional): Number of processed sectors. If None is supplied,
+            all of the sectors from the first one on are processed. Defaults to None.
+        """
+
+        self.process_sectors(volume, AES.AES_MODE.ENCRYPTOR, first_sector, sector_count)
+
+    def decrypt_sectors(self, volume: bytearray or mmap.mmap, first_sector: int = 0,
+                        sector_count: int = None):
+        """Decrypt a range of sectors of a volume in place. See AES_XTS.process_sectors.
+
+        Args:
+            volume (bytearray or mmap.mmap): Writable buffer holding the whole volume
+            first_sector (int, optional): Index of the first processed sector. Defaults to 0.
+            sector_count (int, optional): Number of processed sectors. If None is supplied,
+            all of the sectors from the first one on are processed. Defaults to None.
+        """
+
+        self.process_sectors(volume, AES.AES_MODE.DECRYPTOR, first_sector, sector_count)
+
+    def process_sectors(self, volume: bytearray or mmap.mmap, mode: AES.AES_MODE,
+                        first_sector: int = 0, sector_count: int = None):
+        """Encrypt or decrypt a range of sectors of a volume in place. Sector i is at the offset
+        i * sector_size of the volume, and the last sector may be shorter than the others, as long
+        as it holds at least one AES block. Large ranges are processed on multiple cores, as the
+        sectors are independent. The state of the instance isn't changed.
+
+        Args:
+            volume (bytearray or mmap.mmap): Writable buffer holding the whole volume, such as
+            a file mapped with mmap
+            mode (AES.AES_MODE): Encrypt or decrypt the sectors
+            first_sector (int, optional): Index of the first processed sector. Defaults to 0.
+            sector_count (int, optional): Number of processed sectors. If None is supplied,
+            all of the sectors from the first one on are processed. Defaults to None.
+
+        Raises:
+            ValueError: Raised if the range is outside of the volume, or if it includes
+            a last sector that is shorter than an AES block
+        """
+
+        with memoryview(volume) as view, view.cast("B") as volume_bytes:
+            total_sectors = -(-volume_bytes.nbytes // self.sector_size)
+
+            if sector_count is None:
+                sector_count = total_sectors - first_sector
+
+            end_sector = first_sector + sector_count
+
+            if first_sector < 0 or sector_count < 0 or end_sector > total_sectors:
+                raise ValueError(f"Sectors {first_sector} to {end_sector} are outside of "
+                                 f"the volume of {total_sectors} sectors")
+
+            if end_sector == total_sectors and \
+                    0 < volume_bytes.nbytes % self.sector_size < AES.AES_BLOCK_BYTE_LENGTH:
+                raise ValueError(f"The last sector must be at least {AES.AES_BLOCK_BYTE_LENGTH} bytes long")
+
+            start, end = first_sector * self.sector_size, end_sector * self.sector_size
+
+            self._process_in_place(volume_bytes[start:end], first_sector, mode)
+
+    def _process_in_place(self, data: memoryview, first_sector: int, mode: AES.AES_MODE):
+        """Process consecutive sectors in place, on multiple cores if there are enough of them
+
+        Args:
+            data (memoryview): Sectors to process, only the last one may be shorter
+            first_sector (int): Index of the first sector
+            mode (AES.AES_MODE): Encrypt or decrypt the sectors
+        """
+
+        algorithm = self._get_algorithm()
+        sector_count = -(-data.nbytes // self.sector_size)
+
+        def process(start: int, end: int):
+            for i in range(start, end):
+                sector = data[i * self.sector_size:(i + 1) * self.sector_size]
+                sector[:] = self._process_message(algorithm, self.get_tweak(first_sector + i), sector, mode)
+
+        if ParallelEngine.is_worth_splitting(data.nbytes):
+            shard_count = len(ParallelEngine.get_shards(data.nbytes))
+            bounds = [sector_count * i // shard_count for i in range(shard_count + 1)]
+
+            ParallelEngine.map(process, bounds, bounds[1:])
+        else:
+            process(0, sector_count)
+
+    def process_file(self, path: str, mode: AES.AES_MODE, first_sector: int = 0, sector_count: int = None):
+        """Encrypt or decrypt a range of sectors of a file in place, through a memory mapping
+        of the file. See AES_XTS.process_sectors.
+
+        Args:
+            path (str): Path to the file
+            mode (AES.AES_MODE): Encrypt or decrypt the sectors
+            first_sector (int, optional): Index of the first processed sector. Defaults to 0.
+            sector_count (int, optional): Number of processed sectors. If None is supplied,
+            all of the sectors from the first one on are processed. Defaults to None.
+        """
+
+        with open(path, "r+b") as file, mmap.mmap(file.fileno(), 0) as volume:
+            self.process_sectors(volume, mode, first_sector, sector_count)
+
+    def update(self, data: bytes) -> bytes:
+        """AES context update. The data is processed as consecutive sectors, and the data
+        that doesn't fill a whole sector yet is held back until the next update or the finalization.
+
+        Args:
+            data (bytes): data to encrypt or decrypt.
+
+        Returns:
+            bytes: processed data.
+        """
+
+        self.pending += data
+
+        sector_count = len(self.pending) // self.sector_size
+
+        if not sector_count:
+            return b""
+
+        size = sector_count * self.sector_size
+        processed = self.pending[:size]
+        del self.pending[:size]
+
+        with memoryview(processed) as view:
+            self._process_in_place(view, self.sector, self.mode)
+
+        self.sector += sector_count
+        self.position += size
+
+        return bytes(processed)
+
+    def finalize(self) -> bytes:
+        """AES context finalization. The data held back is processed as a last, shorter sector.
+
+        Raises:
+            ValueError: Raised if the data held back is shorter than an AES block
+
+        Returns:
+            bytes: finalized data.
+        """
+
+        if not self.pending:
+            return b""
+
+        if len(self.pending) < AES.AES_BLOCK_BYTE_LENGTH:
+            raise ValueError(f"The last sector must be at least {AES.AES_BLOCK_BYTE_LENGTH} bytes long")
+
+        processed = self._process_message(self._get_algorithm(), self.get_tweak(self.sector),
+                                          self.pending, self.mode)
+
+        self.position += len(self.pending)
+        self.sector += 1
+        self.pending = bytearray()
 
-        super()._set_mode(mode)
+        return processed
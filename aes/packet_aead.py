@@ -0,0 +1,104 @@
+"""Per packet AEAD implementation.
+"""
+
+import os
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM, ChaCha20Poly1305
+from .aes import AES
+
+
+class PacketAEAD:
+    """Per packet AEAD class. Every packet is sealed independently, with a nonce made of
+    a session salt and the index of the packet, so that packets can be authenticated,
+    lost and retransmitted independently of each other.
+    """
+
+    ALGORITHMS = {
+        "gcm": AESGCM,
+        "chacha20": ChaCha20Poly1305,
+    }
+
+    SALT_BYTE_LENGTH = 4
+    INDEX_BYTE_LENGTH = 8
+    TAG_BYTE_LENGTH = 16
+
+    CHACHA20_KEY_BYTE_LENGTH = 32
+
+    def __init__(self, key: bytes = None, algorithm="gcm", mode=AES.AES_MODE.ENCRYPTOR):
+        """Per packet AEAD initialization.
+
+        Args:
+            key (bytes, optional): Key. For GCM, it's length must be equal to AES.AES_BYTE_LENGTH,
+                                   for ChaCha20-Poly1305 it must be 32 bytes long. If None is supplied
+                                   a new one will be automatically generated. Defaults to None.
+            algorithm (str, optional): One of PacketAEAD.ALGORITHMS. Defaults to "gcm".
+            mode (AES.AES_MODE, optional): In the Encryptor mode, a new salt is generated on every reset,
+                                           in the Decryptor mode, the salt has to be set by the user.
+                                           Defaults to AES_MODE.ENCRYPTOR.
+        """
+
+        key_length = self.CHACHA20_KEY_BYTE_LENGTH if algorithm == "chacha20" else AES.AES_BYTE_LENGTH
+
+        if key is None:
+            key = os.urandom(key_length)
+        else:
+            assert len(key) == key_length
+
+        self.key = key
+        self.algorithm = algorithm
+        self.aead = self.ALGORITHMS[algorithm](key)
+        self.mode = mode
+        self.salt = os.urandom(self.SALT_BYTE_LENGTH)
+
+    def reset(self):
+        """Start a new session. In the Encryptor mode a new salt is generated,
+        so that no nonce is ever reused with the same key.
+        """
+
+        if self.mode == AES.AES_MODE.ENCRYPTOR:
+            self.salt = os.urandom(self.SALT_BYTE_LENGTH)
+
+    def seal(self, index: int, data: bytes, associated_data: bytes = None) -> bytes:
+        """Encrypt and authenticate a packet
+
+        Args:
+            index (int): Index of the packet in the session
+            data (bytes): Packet data, any buffer is accepted
+            associated_data (bytes, optional): Data authenticated along with the packet,
+            but not encrypted. Defaults to None.
+
+        Returns:
+            bytes: Ciphertext with the tag appended
+        """
+
+        # The AEAD interface only accepts bytes, not buffers
+        return self.aead.encrypt(self._get_nonce(index), bytes(data), associated_data)
+
+    def open(self, index: int, data: bytes, associated_data: bytes = None) -> bytes:
+        """Verify and decrypt a packet
+
+        Args:
+            index (int): Index of the packet in the session
+            data (bytes): Ciphertext with the tag appended
+            associated_data (bytes, optional): Data authenticated along with the packet.
+            Defaults to None.
+
+        Raises:
+            cryptography.exceptions.InvalidTag: Raised if the packet fails the authentication
+
+        Returns:
+            bytes: Packet data
+        """
+
+        return self.aead.decrypt(self._get_nonce(index), bytes(data), associated_data)
+
+    def _get_nonce(self, index: int) -> bytes:
+        """Derive the nonce of a packet
+
+        Args:
+            index (int): Index of the packet in the session
+
+        Returns:
+            bytes: 96 bit nonce
+        """
+
+        return self.salt + index.to_bytes(self.INDEX_BYTE_LENGTH, "big")
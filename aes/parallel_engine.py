@@ -0,0 +1,89 @@
+"""Parallel AES engine module. Used to spread the encryption of large buffers
+over multiple cores, for the AES modes whose blocks are independent.
+"""
+
+import os
+from typing import Callable
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ParallelEngine:
+    """Parallel AES engine class. Large buffers are split into block aligned shards, which are
+    processed by a pool of worker threads. The OpenSSL calls release the GIL, so the shards
+    are processed at the same time.
+    """
+
+    BLOCK_BYTE_LENGTH = 16
+
+    # Buffers are only split if every shard gets at least this many bytes
+    MIN_SHARD_SIZE = 1 << 20
+
+    workers = os.cpu_count() or 1
+
+    executor: ThreadPoolExecutor = None
+
+    @classmethod
+    def set_workers(cls, workers: int = None):
+        """Set the number of worker threads
+
+        Args:
+            workers (int, optional): Number of worker threads, 1 disables the parallel processing.
+            If None is supplied, the number of CPU's will be used. Defaults to None.
+        """
+
+        assert workers is None or workers >= 1
+
+        if cls.executor is not None:
+            cls.executor.shutdown()
+            cls.executor = None
+
+        cls.workers = workers or os.cpu_count() or 1
+
+    @classmethod
+    def get_shards(cls, size: int) -> list[tuple[int, int]]:
+        """Split a buffer into block aligned shards, one per worker thread
+
+        Args:
+            size (int): Size of the buffer, a multiple of ParallelEngine.BLOCK_BYTE_LENGTH
+
+        Returns:
+            list[tuple[int, int]]: Start and end offsets of every shard. A single shard
+            is returned if the buffer isn't worth splitting.
+        """
+
+        blocks = size // cls.BLOCK_BYTE_LENGTH
+        shard_count = max(1, min(cls.workers, size // cls.MIN_SHARD_SIZE))
+
+        offsets = [blocks * i // shard_count * cls.BLOCK_BYTE_LENGTH for i in range(shard_count)] + [size]
+
+        return list(zip(offsets, offsets[1:]))
+
+    @classmethod
+    def is_worth_splitting(cls, size: int) -> bool:
+        """Check whether a buffer is large enough to be processed in parallel
+
+        Args:
+            size (int): Size of the buffer
+
+        Returns:
+            bool: True if the buffer would be split into more than one shard
+        """
+
+        return cls.workers > 1 and size >= 2 * cls.MIN_SHARD_SIZE
+
+    @classmethod
+    def map(cls, function: Callable, *iterables) -> list:
+        """Run a function over the shards in the worker threads
+
+        Args:
+            function (Callable): Function that processes a single shard
+            iterables: Arguments of every call, as in the builtin map
+
+        Returns:
+            list: Results, in the order of the shards
+        """
+
+        if cls.executor is None:
+            cls.executor = ThreadPoolExecutor(max_workers=cls.workers, thread_name_prefix="ParallelEngine")
+
+        return list(cls.executor.map(function, *iterables))
@@ -2,6 +2,7 @@
 """
 
 import os
+import mmap
 from ..aes import AES
 from ..aes_ecb import AES_ECB
 from ..aes_cbc import AES_CBC
@@ -10,6 +11,7 @@ from ..aes_gcm import AES_GCM
 from ..aes_cfb import AES_CFB
 from ..aes_ofb import AES_OFB
 from ..aes_xts import AES_XTS
+from ..parallel_engine import ParallelEngine
 
 PLAIN_TEXT = os.urandom(AES.AES_BYTE_LENGTH * 12)
 
@@ -49,8 +51,7 @@ def aes_algorithms_test():
 
         decrypted = aes.update(encrypted) + aes.finalize()
 
-        if algorithm != AES_XTS:
-            assert decrypted == PLAIN_TEXT_DOUBLE
+        assert decrypted == PLAIN_TEXT_DOUBLE
 
 def test_aes_128():
     """Test all of the AES classes with a 128 bit length.
@@ -64,3 +65,121 @@ def test_aes_256():
     """
     AES.set_bit_length(256)
     aes_algorithms_test()
+
+def test_batch_messages():
+    """Test encrypting and decrypting many independent messages at once with all of the AES classes.
+    """
+    AES.set_bit_length(256)
+
+    messages = [os.urandom(AES.AES_BLOCK_BYTE_LENGTH * (i + 1)) for i in range(10)]
+
+    for algorithm in [AES_ECB, AES_CBC, AES_CTR, AES_CFB, AES_OFB, AES_GCM, AES_XTS]:
+        aes: AES = algorithm(mode=AES.AES_MODE.ENCRYPTOR)
+
+        encrypted = aes.encrypt_many(messages)
+
+        assert len({iv for iv, _ in encrypted}) == (1 if algorithm == AES_ECB else len(messages))
+        assert aes.decrypt_many(encrypted) == messages
+
+def test_set_key():
+    """Test that an instance re-keyed with set_key encrypts with the new key, and not
+    with the algorithm object or the cipher it built for the previous one
+    """
+
+    for algorithm in (AES_ECB, AES_CBC, AES_CTR, AES_CFB, AES_OFB, AES_GCM, AES_XTS):
+        aes: AES = algorithm(mode=AES.AES_MODE.ENCRYPTOR)
+        previous = aes.update(PLAIN_TEXT) + aes.finalize()
+
+        key = os.urandom(len(aes.key))
+        aes.set_key(key)
+        encrypted = aes.update(PLAIN_TEXT) + aes.finalize()
+
+        # A new instance with the new key and the same IV's
+        fresh: AES = algorithm(key=key, mode=AES.AES_MODE.ENCRYPTOR)
+        fresh.iv, fresh.nonce = aes.iv, aes.nonce
+        fresh.set_mode(AES.AES_MODE.ENCRYPTOR)
+
+        assert encrypted == fresh.update(PLAIN_TEXT) + fresh.finalize(), algorithm.__name__
+        assert encrypted != previous, algorithm.__name__
+
+def test_parallel_update():
+    """Test that processing large buffers in parallel gives the same output as a single context,
+    also when the buffer doesn't start or end on a block boundary
+    """
+    AES.set_bit_length(256)
+
+    min_shard_size, workers = ParallelEngine.MIN_SHARD_SIZE, ParallelEngine.workers
+    ParallelEngine.MIN_SHARD_SIZE = 4 * AES.AES_BLOCK_BYTE_LENGTH
+    ParallelEngine.set_workers(4)
+
+    data = os.urandom(AES.AES_BLOCK_BYTE_LENGTH * 61 + 5)
+
+    try:
+        for algorithm, nonce in [(AES_CTR, b"\xff" * AES.AES_NONCE_BYTE_LENGTH), (AES_ECB, None),
+                                 (AES_CBC, None), (AES_CFB, None), (AES_OFB, None)]:
+            kwargs = {"nonce": nonce} if algorithm == AES_CTR else {}
+            aes: AES = algorithm(mode=AES.AES_MODE.ENCRYPTOR, **kwargs)
+
+            for mode in AES.AES_MODE:
+                aes.set_mode(mode)
+                serial = aes.context.update(data)
+
+                aes.set_mode(mode)
+                parallel = aes.update(data[:AES.AES_BLOCK_BYTE_LENGTH]) + \
+                    aes.update(data[AES.AES_BLOCK_BYTE_LENGTH:])
+
+                assert parallel == serial, f"{algorithm.__name__} {mode}"
+    finally:
+        ParallelEngine.MIN_SHARD_SIZE = min_shard_size
+        ParallelEngine.set_workers(workers)
+
+def test_xts_sectors(tmp_path):
+    """Test that XTS sectors are processed independently of each other, both one at a time
+    and in place, in parallel, in a memory mapped file
+    """
+    AES.set_bit_length(256)
+
+    sector_size = 4 * AES.AES_BLOCK_BYTE_LENGTH
+    data = os.urandom(sector_size * 40 + AES.AES_BLOCK_BYTE_LENGTH + 3)
+
+    aes = AES_XTS(mode=AES.AES_MODE.ENCRYPTOR, sector_size=sector_size)
+    encrypted = aes.update(data[:100]) + aes.update(data[100:]) + aes.finalize()
+
+    # Every sector decrypts on its own, in any order
+    for sector in reversed(range(41)):
+        start, end = sector * sector_size, (sector + 1) * sector_size
+        assert aes.decrypt_sector(sector, encrypted[start:end]) == data[start:end]
+
+    assert aes.encrypt_sector(5, data[5 * sector_size:6 * sector_size]) != encrypted[:sector_size]
+
+    path = tmp_path / "volume.bin"
+    path.write_bytes(data)
+
+    min_shard_size, workers = ParallelEngine.MIN_SHARD_SIZE, ParallelEngine.workers
+    ParallelEngine.MIN_SHARD_SIZE = 4 * sector_size
+    ParallelEngine.set_workers(4)
+
+    try:
+        aes.process_file(str(path), AES.AES_MODE.ENCRYPTOR)
+        assert path.read_bytes() == encrypted
+
+        # Only the range of sectors is decrypted
+        with open(path, "r+b") as file, mmap.mmap(file.fileno(), 0) as volume:
+            aes.decrypt_sectors(volume, 10, 20)
+
+            assert volume[10 * sector_size:30 * sector_size] == data[10 * sector_size:30 * sector_size]
+            assert volume[:10 * sector_size] == encrypted[:10 * sector_size]
+            assert volume[30 * sector_size:] == encrypted[30 * sector_size:]
+    finally:
+        ParallelEngine.MIN_SHARD_SIZE = min_shard_size
+        ParallelEngine.set_workers(workers)
+
+    # Empty and partial blocks aren't sectors
+    for invalid in (lambda: aes.decrypt_sectors(bytearray(encrypted), 40, 2),
+                    lambda: aes.decrypt_sector(40, b"")):
+        try:
+            invalid()
+        except ValueError:
+            continue
+
+        assert False
@@ -0,0 +1,82 @@
+"""AES batch encryption microbenchmark. Compares encrypting many small messages
+with a new AES instance per message against AES.encrypt_many.
+
+Run from the repository root:
+    python -m benchmarks.aes_batch
+"""
+
+import os
+import timeit
+import argparse
+from aes import AES, AES_ECB, AES_CBC, AES_CFB, AES_OFB, AES_CTR, AES_GCM
+
+MODES = {
+    "ecb": AES_ECB,
+    "cbc": AES_CBC,
+    "cfb": AES_CFB,
+    "ofb": AES_OFB,
+    "ctr": AES_CTR,
+    "gcm": AES_GCM,
+}
+
+
+def parse_args() -> argparse.Namespace:
+    """Builds CLI argument list and parses it
+
+    Returns:
+        argparse.Namespace: Parsed arguments
+    """
+
+    arg = argparse.ArgumentParser()
+
+    arg.add_argument("--messages",
+                    type=int,
+                    help="Number of messages per batch",
+                    required=False,
+                    default=10000)
+
+    arg.add_argument("--message-size",
+                    type=int,
+                    help="Size of every message in bytes, a multiple of 16",
+                    required=False,
+                    default=64)
+
+    arg.add_argument("--repeat",
+                    type=int,
+                    help="Number of measurements, the best one is reported",
+                    required=False,
+                    default=5)
+
+    return arg.parse_args()
+
+def main():
+    """Benchmark entry point
+    """
+
+    args = parse_args()
+
+    messages = [os.urandom(args.message_size) for _ in range(args.messages)]
+    key = AES.generate_secure_key()
+
+    print(f"{'mode':<6}{'per instance [us]':>20}{'encrypt_many [us]':>20}{'speedup':>10}")
+
+    for name, aes_class in MODES.items():
+        def per_instance():
+            for message in messages:
+                aes = aes_class(key=key, mode=AES.AES_MODE.ENCRYPTOR)
+                aes.update(message)
+                aes.finalize()
+
+        def batch():
+            aes_class(key=key, mode=AES.AES_MODE.ENCRYPTOR).encrypt_many(messages)
+
+        results = []
+
+        for run in (per_instance, batch):
+            best = min(timeit.repeat(run, number=1, repeat=args.repeat))
+            results.append(best / args.messages * 1e6)
+
+        print(f"{name:<6}{results[0]:>20.2f}{results[1]:>20.2f}{results[0] / results[1]:>9.2f}x")
+
+if __name__ == "__main__":
+    main()
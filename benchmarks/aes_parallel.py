@@ -0,0 +1,81 @@
+"""AES parallel engine microbenchmark. Compares processing a large buffer
+on a single core against the ParallelEngine worker threads.
+
+Run from the repository root:
+    python -m benchmarks.aes_parallel
+"""
+
+import os
+import timeit
+import argparse
+from aes import AES, AES_ECB, AES_CBC, AES_CFB, AES_CTR, ParallelEngine
+
+# Modes and the directions they are processed in parallel in
+MODES = {
+    "ecb": (AES_ECB, list(AES.AES_MODE)),
+    "ctr": (AES_CTR, list(AES.AES_MODE)),
+    "cbc": (AES_CBC, [AES.AES_MODE.DECRYPTOR]),
+    "cfb": (AES_CFB, [AES.AES_MODE.DECRYPTOR]),
+}
+
+
+def parse_args() -> argparse.Namespace:
+    """Builds CLI argument list and parses it
+
+    Returns:
+        argparse.Namespace: Parsed arguments
+    """
+
+    arg = argparse.ArgumentParser()
+
+    arg.add_argument("--size",
+                    type=int,
+                    help="Size of the buffer in MiB",
+                    required=False,
+                    default=64)
+
+    arg.add_argument("--workers",
+                    type=int,
+                    help="Number of worker threads. Defaults to the number of CPU's.",
+                    required=False,
+                    default=None)
+
+    arg.add_argument("--repeat",
+                    type=int,
+                    help="Number of measurements, the best one is reported",
+                    required=False,
+                    default=5)
+
+    return arg.parse_args()
+
+def main():
+    """Benchmark entry point
+    """
+
+    args = parse_args()
+
+    data = os.urandom(args.size << 20)
+    key = AES.generate_secure_key()
+
+    print(f"{'mode':<16}{'serial [MiB/s]':>16}{'parallel [MiB/s]':>18}{'speedup':>10}")
+
+    for name, (aes_class, directions) in MODES.items():
+        for direction in directions:
+            aes = aes_class(key=key, mode=direction)
+            results = []
+
+            for workers in (1, args.workers):
+                ParallelEngine.set_workers(workers)
+
+                def run():
+                    aes.set_mode(direction)
+                    aes.update(data)
+
+                best = min(timeit.repeat(run, number=1, repeat=args.repeat))
+                results.append(args.size / best)
+
+            label = f"{name} {direction.name.lower()}"
+            print(f"{label:<16}{results[0]:>16.1f}{results[1]:>18.1f}{results[1] / results[0]:>9.2f}x")
+
+if __name__ == "__main__":
+    main()
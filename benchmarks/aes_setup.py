@@ -0,0 +1,86 @@
+"""AES per session setup cost microbenchmark. Compares building a new cipher for
+every session, as the AES classes used to, with the cached cipher setup.
+
+Run from the repository root:
+    python -m benchmarks.aes_setup
+"""
+
+import os
+import timeit
+import argparse
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from aes import AES, AES_ECB, AES_CBC, AES_CFB, AES_OFB, AES_CTR, AES_GCM
+
+MODES = {
+    "ecb": (AES_ECB, modes.ECB, lambda aes: ()),
+    "cbc": (AES_CBC, modes.CBC, lambda aes: (aes.iv,)),
+    "cfb": (AES_CFB, modes.CFB, lambda aes: (aes.iv,)),
+    "ofb": (AES_OFB, modes.OFB, lambda aes: (aes.iv,)),
+    "ctr": (AES_CTR, modes.CTR, lambda aes: (aes.nonce,)),
+    "gcm": (AES_GCM, modes.GCM, lambda aes: (aes.iv,)),
+}
+
+
+def parse_args() -> argparse.Namespace:
+    """Builds CLI argument list and parses it
+
+    Returns:
+        argparse.Namespace: Parsed arguments
+    """
+
+    arg = argparse.ArgumentParser()
+
+    arg.add_argument("--sessions",
+                    type=int,
+                    help="Number of short transfers per measurement",
+                    required=False,
+                    default=20000)
+
+    arg.add_argument("--transfer-size",
+                    type=int,
+                    help="Size of every transfer in bytes",
+                    required=False,
+                    default=64)
+
+    arg.add_argument("--repeat",
+                    type=int,
+                    help="Number of measurements, the best one is reported",
+                    required=False,
+                    default=5)
+
+    return arg.parse_args()
+
+def main():
+    """Benchmark entry point
+    """
+
+    args = parse_args()
+
+    data = os.urandom(args.transfer_size)
+
+    print(f"{'mode':<6}{'uncached [us]':>16}{'cached [us]':>16}{'speedup':>10}")
+
+    for name, (aes_class, mode_type, get_mode_args) in MODES.items():
+        aes = aes_class(mode=AES.AES_MODE.ENCRYPTOR)
+
+        def uncached_session():
+            # The setup every session used to go through
+            context = Cipher(algorithms.AES(aes.key), mode_type(*get_mode_args(aes))).encryptor()
+            context.update(data)
+            context.finalize()
+
+        def cached_session():
+            aes.reset()
+            aes.update(data)
+            aes.finalize()
+
+        results = []
+
+        for session in (uncached_session, cached_session):
+            best = min(timeit.repeat(session, number=args.sessions, repeat=args.repeat))
+            results.append(best / args.sessions * 1e6)
+
+        print(f"{name:<6}{results[0]:>16.2f}{results[1]:>16.2f}{results[0] / results[1]:>9.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Broadcast session benchmark. Measures the cost of serving many receivers, each behind
+its own lossy channel, with the NACK's of all of the receivers aggregated.
+
+Run from the repository root:
+    python -m benchmarks.broadcast
+"""
+
+import os
+import argparse
+from aes import AES
+from communicator import BroadcastSession, Channel
+from communicator.comm_protocol import init_aes_txrx_pairs
+
+
+def parse_args() -> argparse.Namespace:
+    """Builds CLI argument list and parses it
+
+    Returns:
+        argparse.Namespace: Parsed arguments
+    """
+
+    arg = argparse.ArgumentParser()
+
+    arg.add_argument("--receivers",
+                    type=int,
+                    nargs="+",
+                    help="Numbers of receivers to test",
+                    required=False,
+                    default=[1, 10, 100, 1000])
+
+    arg.add_argument("--fail-percent",
+                    type=float,
+                    help="Transmission failure percentage of every receiver's channel",
+                    required=False,
+                    default=1.0)
+
+    arg.add_argument("--burst-length",
+                    type=float,
+                    help="Average number of consecutively dropped packets",
+                    required=False,
+                    default=None)
+
+    arg.add_argument("--aes-alg",
+                    type=str,
+                    help="AES algorithm to test",
+                    choices=["ecb", "cbc", "cfb", "ofb", "ctr", "gcm"],
+                    required=False,
+                    default="ctr")
+
+    arg.add_argument("--size",
+                    type=int,
+                    help="Size of the transmitted data in KiB",
+                    required=False,
+                    default=64)
+
+    arg.add_argument("--packet-size",
+                    type=int,
+                    help="Packet size in bytes, a multiple of 16",
+                    required=False,
+                    default=256)
+
+    return arg.parse_args()
+
+def main():
+    """Benchmark entry point
+    """
+
+    args = parse_args()
+
+    AES.set_bit_length(256)
+    data = os.urandom(args.size << 10)
+
+    print(f"{'receivers':>10}{'tx/frame':>10}{'nacks':>10}{'suppressed':>12}"
+          f"{'encrypt [ms]':>14}{'transmitter [ms]':>18}{'total [s]':>11}")
+
+    for receivers in args.receivers:
+        tx_rx_pair = init_aes_txrx_pairs(data, chunk_size=args.packet_size)[args.aes_alg]
+        channels = [Channel.from_settings(args.fail_percent / 100, seed, args.burst_length)
+                    for seed in range(receivers)]
+
+        stats = BroadcastSession(tx_rx_pair, channels).run()
+
+        assert stats["receivers_completed"] == receivers
+
+        print(f"{receivers:>10}{stats['transmissions_per_frame']:>10.3f}{stats['nacks']:>10}"
+              f"{stats['nacks_suppressed']:>12}{stats['encryption_s'] * 1e3:>14.2f}"
+              f"{stats['transmitter_s'] * 1e3:>18.2f}{stats['elapsed_s']:>11.2f}")
+
+if __name__ == "__main__":
+    main()
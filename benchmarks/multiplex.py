@@ -0,0 +1,114 @@
+"""Multiplexed link benchmark. Measures the per session throughput, latency and fairness
+of many concurrent sessions sharing one lossy link.
+
+Run from the repository root:
+    python -m benchmarks.multiplex
+"""
+
+import os
+import argparse
+import statistics
+from aes import AES
+from communicator import MultiplexedLink, LinkSession, Channel
+from communicator.comm_protocol import init_aes_txrx_pairs
+
+
+def parse_args() -> argparse.Namespace:
+    """Builds CLI argument list and parses it
+
+    Returns:
+        argparse.Namespace: Parsed arguments
+    """
+
+    arg = argparse.ArgumentParser()
+
+    arg.add_argument("--sessions",
+                    type=int,
+                    nargs="+",
+                    help="Numbers of concurrent sessions to test",
+                    required=False,
+                    default=[1, 4, 16, 64])
+
+    arg.add_argument("--fail-percent",
+                    type=float,
+                    help="Transmission failure percentage of the link",
+                    required=False,
+                    default=1.0)
+
+    arg.add_argument("--aes-alg",
+                    type=str,
+                    help="AES algorithm of every session",
+                    choices=["ecb", "cbc", "cfb", "ofb", "ctr", "xts", "gcm", "gcm_packet",
+                             "chacha20_packet"],
+                    required=False,
+                    default="ctr")
+
+    arg.add_argument("--size",
+                    type=int,
+                    help="Size of the data of every session in KiB",
+                    required=False,
+                    default=64)
+
+    arg.add_argument("--packet-size",
+                    type=int,
+                    help="Packet size in bytes, a multiple of 16",
+                    required=False,
+                    default=1024)
+
+    arg.add_argument("--bandwidth-mbps",
+                    type=float,
+                    help="Link bandwidth in Mbit/s",
+                    required=False,
+                    default=100.0)
+
+    arg.add_argument("--delay-ms",
+                    type=float,
+                    help="One way delay of the link in ms",
+                    required=False,
+                    default=5.0)
+
+    arg.add_argument("--weighted",
+                    action="store_true",
+                    help="Give every other session twice the weight")
+
+    return arg.parse_args()
+
+def main():
+    """Benchmark entry point
+    """
+
+    args = parse_args()
+
+    AES.set_bit_length(256)
+
+    print(f"{'sessions':>10}{'fairness':>10}{'utilization':>13}{'throughput [Mbit/s]':>21}"
+          f"{'mean latency [ms]':>19}{'max latency [ms]':>18}{'link time [s]':>15}")
+
+    for session_count in args.sessions:
+        sessions = []
+
+        for session_id in range(session_count):
+            data = os.urandom(args.size << 10)
+            tx_rx_pair = init_aes_txrx_pairs(data, chunk_size=args.packet_size)[args.aes_alg]
+            weight = 2 if args.weighted and session_id % 2 else 1
+
+            sessions.append(LinkSession(session_id, tx_rx_pair, weight))
+
+        channel = Channel.from_settings(args.fail_percent / 100, 0, delay_s=args.delay_ms / 1e3,
+                                        bandwidth_bps=args.bandwidth_mbps * 1e6)
+
+        stats = MultiplexedLink(channel, sessions).run()
+        session_stats = stats["sessions"]
+
+        assert all(session["passed"] for session in session_stats)
+
+        throughput_mbps = statistics.fmean(session["throughput_bps"] for session in session_stats) / 1e6
+        mean_latency_ms = statistics.fmean(session["mean_latency_s"] for session in session_stats) * 1e3
+        max_latency_ms = max(session["max_latency_s"] for session in session_stats) * 1e3
+
+        print(f"{session_count:>10}{stats['fairness']:>10.3f}{stats['utilization']:>13.3f}"
+              f"{throughput_mbps:>21.2f}{mean_latency_ms:>19.2f}{max_latency_ms:>18.2f}"
+              f"{stats['elapsed_s']:>15.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Performance baselines module. Used by the performance regression suite to compare
+the measured scenarios with the values stored in a JSON file.
+"""
+
+import os
+import json
+import timeit
+import hashlib
+
+BASELINES_PATH = os.path.join(os.path.dirname(__file__), "baselines.json")
+
+
+class PerfBaselines:
+    """Stored performance baselines. Every scenario has a value, the unit it is measured in and
+    whether higher values are better, such as for throughputs, or lower ones, such as for times.
+    A scenario regresses if it is worse than its baseline by more than the tolerance, which is
+    a fraction of the baseline and can be overridden per scenario with a "tolerance" entry.
+
+    Every measurement is stored along with a calibration measurement taken at the same time, the
+    speed of a fixed workload. The baseline is scaled by the ratio of the current calibration to
+    the stored one before comparing, so that a machine that is slower or faster as a whole, such
+    as a throttled or a shared one, doesn't show up as a regression.
+    """
+
+    TOLERANCE = 0.3
+
+    CALIBRATION_SIZE = 1 << 20
+    CALIBRATION_LOOP = 100_000
+    CALIBRATION_REPEAT = 10
+
+    def __init__(self, path: str = BASELINES_PATH, tolerance: float = None):
+        """
+        Args:
+            path (str, optional): Path of the JSON file. Defaults to BASELINES_PATH.
+            tolerance (float, optional): Allowed regression, as a fraction of the baseline.
+            If None is supplied, PerfBaselines.TOLERANCE will be used. Defaults to None.
+        """
+
+        self.path = path
+        self.tolerance = tolerance if tolerance is not None else self.TOLERANCE
+        self.baselines: dict[str, dict[str, float or str or bool]] = {}
+        self.measured: dict[str, dict[str, float or str or bool]] = {}
+
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as file:
+                self.baselines = json.load(file)
+
+    @classmethod
+    def calibrate(cls) -> float:
+        """Measure the speed of the machine with a fixed workload, hashing a buffer in native code
+        and running a loop in the interpreter, as the scenarios spend their time in both
+
+        Returns:
+            float: Runs of the workload per second, the best of PerfBaselines.CALIBRATION_REPEAT
+        """
+
+        data = bytes(cls.CALIBRATION_SIZE)
+
+        def run():
+            hashlib.sha256(data).digest()
+            sum(i * i for i in range(cls.CALIBRATION_LOOP))
+
+        return 1 / min(timeit.repeat(run, number=1, repeat=cls.CALIBRATION_REPEAT))
+
+    def check(self, scenario: str, value: float, unit: str, higher_is_better: bool,
+              calibration: float = None) -> str or None:
+        """Compare a measured value with the baseline of its scenario
+
+        Args:
+            scenario (str): Name of the scenario
+            value (float): Measured value
+            unit (str): Unit of the value
+            higher_is_better (bool): If higher values are better
+            calibration (float, optional): Calibration measured along with the value, see
+            PerfBaselines.calibrate. If None is supplied, or the baseline has no calibration,
+            the baseline is compared as it is. Defaults to None.
+
+        Returns:
+            str or None: Description of the regression, or None if the scenario
+            didn't regress or has no baseline yet
+        """
+
+        self.measured[scenario] = {"value": value, "unit": unit, "higher_is_better": higher_is_better}
+
+        if calibration is not None:
+            self.measured[scenario]["calibration"] = calibration
+
+        baseline = self.baselines.get(scenario)
+
+        if baseline is None:
+            return None
+
+        tolerance = baseline.get("tolerance", self.tolerance)
+        expected = baseline["value"]
+
+        if calibration is not None and "calibration" in baseline:
+            speed = calibration / baseline["calibration"]
+            expected = expected * speed if higher_is_better else expected / speed
+
+        if higher_is_better:
+            regressed = value < expected * (1 - tolerance)
+        else:
+            regressed = value > expected * (1 + tolerance)
+
+        if not regressed:
+            return None
+
+        regression = f"{scenario} regressed: {value:.4g} {unit} against the baseline of {expected:.4g} {unit}"
+
+        if expected != baseline["value"]:
+            regression += f", calibrated from {baseline['value']:.4g} {unit}"
+
+        return regression + f", with a tolerance of {tolerance:.0%}"
+
+    def has_baseline(self, scenario: str) -> bool:
+        """Check whether a scenario has a stored baseline
+
+        Args:
+            scenario (str): Name of the scenario
+
+        Returns:
+            bool: True if the scenario has a baseline
+        """
+
+        return scenario in self.baselines
+
+    def save(self):
+        """Store the measured values as the new baselines, keeping the baselines
+        of the scenarios that weren't measured and the per scenario tolerances
+        """
+
+        for scenario, measured in self.measured.items():
+            if "tolerance" in self.baselines.get(scenario, {}):
+                measured = {**measured, "tolerance": self.baselines[scenario]["tolerance"]}
+
+            self.baselines[scenario] = measured
+
+        with open(self.path, "w", encoding="utf-8") as file:
+            json.dump(dict(sorted(self.baselines.items())), file, indent=4)
+            file.write("\n")
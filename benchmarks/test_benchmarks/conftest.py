@@ -0,0 +1,52 @@
+"""Performance regression suite fixtures
+"""
+
+from typing import Callable
+import pytest
+from benchmarks.perf_baselines import PerfBaselines
+
+
+@pytest.fixture(scope="session")
+def perf_baselines(request: pytest.FixtureRequest) -> PerfBaselines:
+    """Baselines shared by the whole session. They are stored at the end
+    of the session if the baselines are being updated.
+    """
+
+    baselines = PerfBaselines(request.config.getoption("--perf-baselines"),
+                              request.config.getoption("--perf-tolerance"))
+
+    yield baselines
+
+    if request.config.getoption("--perf-update-baselines"):
+        baselines.save()
+
+@pytest.fixture
+def perf_check(request: pytest.FixtureRequest, perf_baselines: PerfBaselines) -> Callable:
+    """Compare the measurements of a test with their baselines. Takes the measured scenarios,
+    mapped to their value, unit and whether higher values are better, and fails the test if any
+    of them regressed, or skips it if none of them has a baseline yet. The machine is calibrated
+    right after the measurements, see PerfBaselines.calibrate.
+    """
+
+    def check(measurements: dict[str, tuple[float, str, bool]]):
+        regressions = []
+        calibration = PerfBaselines.calibrate()
+
+        for scenario, (value, unit, higher_is_better) in measurements.items():
+            request.node.user_properties.append((scenario, value))
+
+            regression = perf_baselines.check(scenario, value, unit, higher_is_better, calibration)
+
+            if regression is not None:
+                regressions.append(regression)
+
+        if request.config.getoption("--perf-update-baselines"):
+            return
+
+        if regressions:
+            pytest.fail("\n".join(regressions))
+
+        if not any(perf_baselines.has_baseline(scenario) for scenario in measurements):
+            pytest.skip("No baselines yet, run with --perf-update-baselines")
+
+    return check
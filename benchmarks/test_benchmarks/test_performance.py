@@ -0,0 +1,133 @@
+"""Performance regression suite. Only run with --perf, see conftest.py and the README.
+"""
+
+import os
+import time
+import timeit
+import statistics
+import pytest
+from matplotlib import pyplot as plt
+from aes import AES, AES_ECB, AES_CBC, AES_CFB, AES_OFB, AES_CTR, AES_GCM
+from communicator import Channel, Receiver, TxRxPair
+from communicator.comm_protocol import init_aes_txrx_pairs
+from summarizer import Summarizer, SimulationClock, Visualizer
+
+pytestmark = pytest.mark.perf
+
+AES_CLASSES = {
+    "ecb": AES_ECB,
+    "cbc": AES_CBC,
+    "cfb": AES_CFB,
+    "ofb": AES_OFB,
+    "ctr": AES_CTR,
+    "gcm": AES_GCM,
+}
+
+AES_BUFFER_SIZE = 4 << 20
+TRANSFER_SIZE = 1 << 20
+TRANSFER_CHUNK_SIZE = 1024
+REPEAT = 15
+
+TIMELINE_EVENTS = 1_000_000
+
+
+def transfer(tx_rx_pair: TxRxPair, channel: Channel):
+    """Transfer the data of a TxRxPair through a channel, retransmitting the missing chunks
+
+    Args:
+        tx_rx_pair (TxRxPair): Transmitter and receiver pair
+        channel (Channel): Channel
+    """
+
+    transmitter, receiver = tx_rx_pair.transmitter, tx_rx_pair.receiver
+    receiver.reset()
+    receiver.on_init_msg(transmitter.gen_init_message())
+
+    while receiver.current_chunk < receiver.chunks_to_receive:
+        for delivery in channel.transmit(transmitter.gen_tx_message()):
+            try:
+                receiver.on_data_rx(delivery.msg)
+            except Receiver.RxFailureException as e:
+                transmitter.set_chunk(e.chunk - 1)
+
+@pytest.mark.parametrize("aes_mode", AES_CLASSES)
+def test_aes_throughput(aes_mode: str, perf_check):
+    """Encryption and decryption throughput of every AES mode
+    """
+
+    data = os.urandom(AES_BUFFER_SIZE)
+    key = AES.generate_secure_key()
+    measurements = {}
+
+    for direction in AES.AES_MODE:
+        aes = AES_CLASSES[aes_mode](key=key, mode=direction)
+
+        def run():
+            aes.set_mode(direction)
+            aes.update(data)
+
+        best = min(timeit.repeat(run, number=1, repeat=REPEAT))
+        scenario = f"aes_{aes_mode}_{direction.name.lower()}"
+        measurements[scenario] = (AES_BUFFER_SIZE / best / (1 << 20), "MiB/s", True)
+
+    perf_check(measurements)
+
+@pytest.mark.parametrize("aes_mode", ["ctr", "cbc", "gcm_packet"])
+@pytest.mark.parametrize("loss_percent", [0, 1, 10])
+def test_transfer_throughput(aes_mode: str, loss_percent: int, perf_check):
+    """Throughput of a whole transfer with retransmission, including the encryption. The transfer
+    is noisier than the bare AES modes, so the median of the runs is taken instead of the best one.
+    """
+
+    data = os.urandom(TRANSFER_SIZE)
+    tx_rx_pair = init_aes_txrx_pairs(data, chunk_size=TRANSFER_CHUNK_SIZE)[aes_mode]
+
+    def run():
+        transfer(tx_rx_pair, Channel.from_settings(loss_percent / 100, seed=0))
+
+    median = statistics.median(timeit.repeat(run, number=1, repeat=REPEAT))
+
+    assert bytes(tx_rx_pair.receiver.received_data) == data
+
+    perf_check({
+        f"transfer_{aes_mode}_loss_{loss_percent}": (TRANSFER_SIZE / median / (1 << 20), "MiB/s", True),
+    })
+
+def test_timeline_rendering(tmp_path, perf_check):
+    """Recording and rendering a timeline of a million events
+    """
+
+    save_folder, save_outputs = Summarizer.SAVE_FOLDER, Summarizer.SAVE_OUTPUTS
+
+    Summarizer.SAVE_FOLDER = str(tmp_path)
+    Summarizer.set_save_outputs(True)
+    SimulationClock.enable()
+
+    try:
+        start = time.perf_counter()
+        Summarizer.start("perf")
+
+        for _ in range(TIMELINE_EVENTS // 2):
+            SimulationClock.advance(1e-6)
+            Summarizer.on_packet_transmit()
+            SimulationClock.advance(1e-6)
+            Summarizer.on_dropped_packet()
+
+        recorded = time.perf_counter()
+        Summarizer.end(50.0)
+        rendered = time.perf_counter()
+
+        assert len(Summarizer.events["perf"]) == TIMELINE_EVENTS
+        assert os.path.exists(os.path.join(tmp_path, "perf", Visualizer.IMAGE_FILENAME))
+    finally:
+        plt.close("all")
+        Summarizer.events.pop("perf", None)
+        Visualizer.runs.pop(os.path.abspath(tmp_path), None)
+        Summarizer.SAVE_FOLDER = save_folder
+        Summarizer.set_save_outputs(save_outputs)
+        SimulationClock.enable(False)
+
+    perf_check({
+        "timeline_events_recorded": (TIMELINE_EVENTS / (recorded - start), "events/s", True),
+        "timeline_rendering": (rendered - recorded, "s", False),
+    })
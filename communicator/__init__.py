@@ -1,5 +1,15 @@
 """Used to include all of the classes directly into the communicator module
 """
 
-from .comm_protocol import Transmitter, Receiver, TxRxPair
+from .comm_protocol import Transmitter, StreamTransmitter, Receiver, TxRxPair
+from .channel import Channel, ChannelModel, Delivery, BernoulliLoss, GilbertElliottLoss, Latency, \
+    Reordering, Duplication
+from .payload import PayloadSource, ImageSource, FileSource, StdinSource, GeneratedSource, SharedMemorySource
+from .shared_cache import CiphertextCache
+from .broadcast import BroadcastSession, BroadcastEndpoint
+from .multiplex import MultiplexedLink, LinkSession, DeficitRoundRobin, Demultiplexer
+from .compression import BlockCompressor
+from .trace import TraceRecorder, TraceReplayer
+from .profiler import Profiler
 from .communicator import Communicator
+from .sweep import Sweep
@@ -0,0 +1,278 @@
+"""Broadcast module. Used to transmit the same encrypted stream to many
+receivers, each behind its own volatile channel.
+"""
+
+import time
+from .comm_protocol import Transmitter, Receiver, TxRxPair
+from .channel import Channel
+
+
+class BroadcastEndpoint:
+    """One of the receivers of a broadcast session, with its own channel and recovery state.
+    The receiver processes the chunks in order, so the chunks that arrive after a gap
+    are held until the gap is repaired.
+    """
+
+    def __init__(self, receiver: Receiver, channel: Channel):
+        """
+        Args:
+            receiver (Receiver): Receiver instance, used only by this endpoint
+            channel (Channel): Channel the frames reach the receiver through
+        """
+
+        self.receiver = receiver
+        self.channel = channel
+
+        # Chunks received after a gap, keyed by their chunk index
+        self.held_frames: dict[int, dict[str, int or bytes]] = {}
+        self.highest_chunk = 0
+        self.failed = False
+
+    def reset(self):
+        """Reset the recovery state of the endpoint
+        """
+
+        self.held_frames = {}
+        self.highest_chunk = 0
+        self.failed = False
+
+    @property
+    def completed(self) -> bool:
+        """If all of the chunks were received
+        """
+
+        return not self.failed and self.receiver.current_chunk >= self.receiver.chunks_to_receive
+
+    def on_frame(self, msg: dict[str, int or bytes], pad_on_failure=False):
+        """Transmit a frame to the endpoint through its channel
+
+        Args:
+            msg (dict[str, int or bytes]): TX message
+            pad_on_failure (bool, optional): Pad the missing chunks with zero's instead
+            of holding the chunks that arrive after a gap. Defaults to False.
+        """
+
+        for delivery in self.channel.transmit(msg):
+            self._deliver(delivery.msg, pad_on_failure)
+
+    def get_missing_chunks(self, last_chunk: int = None) -> list[int]:
+        """Get the chunks the endpoint still needs, up to a chunk
+
+        Args:
+            last_chunk (int, optional): Last chunk to check. If None is supplied, only the gaps
+            before the highest received chunk are reported. Defaults to None.
+
+        Returns:
+            list[int]: Indexes of the missing chunks
+        """
+
+        if self.failed:
+            return []
+
+        if last_chunk is None:
+            last_chunk = self.highest_chunk
+
+        return [chunk for chunk in range(self.receiver.current_chunk + 1, last_chunk + 1)
+                if chunk not in self.held_frames]
+
+    def _deliver(self, msg: dict[str, int or bytes], pad_on_failure: bool):
+        """Deliver a frame that passed through the channel to the receiver
+
+        Args:
+            msg (dict[str, int or bytes]): TX message
+            pad_on_failure (bool): Pad the missing chunks with zero's
+        """
+
+        if self.failed:
+            return
+
+        self.highest_chunk = max(self.highest_chunk, msg["chunk"])
+
+        try:
+            if pad_on_failure:
+                self.receiver.on_data_rx(msg, True)
+                return
+
+            if msg["chunk"] <= self.receiver.current_chunk:
+                # Repair or duplicate of a chunk that was already received
+                return
+
+            self.held_frames[msg["chunk"]] = msg
+
+            while self.receiver.current_chunk + 1 in self.held_frames:
+                self.receiver.on_data_rx(self.held_frames.pop(self.receiver.current_chunk + 1))
+
+        except Receiver.RxFailureException as e:
+            # The other receivers can't be re-initialized along with this one
+            if e.error_protocol == Receiver.RxFailureException.ErrorProtocol.REINIT:
+                self.failed = True
+
+
+class BroadcastSession:
+    """One to many transmission. The transmitter encrypts the data once and every frame
+    is transmitted to all of the receivers. Missing chunks are requested by the receivers
+    with NACK's, which are aggregated, so that every missing chunk is transmitted again
+    only once for all of the receivers that need it (NACK suppression).
+    """
+
+    # Number of frames after which the NACK's are collected and the missing chunks transmitted
+    NACK_INTERVAL_FRAMES = 64
+
+    # Rounds of repairs after all of the frames were transmitted
+    MAX_REPAIR_ROUNDS = 100
+
+    def __init__(self, tx_rx_pair: TxRxPair, channels: list[Channel], use_retransmission=True,
+                 nack_interval_frames: int = None, max_repair_rounds: int = None):
+        """
+        Args:
+            tx_rx_pair (TxRxPair): Transmitter and receiver pair. Every endpoint gets
+            its own clone of the receiver.
+            channels (list[Channel]): Channel of every receiver
+            use_retransmission (bool, optional): Transmit the missing chunks again. Otherwise
+            the receivers pad them with zero's. Defaults to True.
+            nack_interval_frames (int, optional): Number of frames after which the NACK's are
+            collected. If None is supplied, BroadcastSession.NACK_INTERVAL_FRAMES will be used.
+            Defaults to None.
+            max_repair_rounds (int, optional): Rounds of repairs after all of the frames were
+            transmitted, after which the receivers that are still missing chunks are given up on.
+            If None is supplied, BroadcastSession.MAX_REPAIR_ROUNDS will be used. Defaults to None.
+        """
+
+        self.transmitter: Transmitter = tx_rx_pair.transmitter
+        self.endpoints = [BroadcastEndpoint(tx_rx_pair.receiver.clone(), channel) for channel in channels]
+        self.use_retransmission = use_retransmission
+        self.nack_interval_frames = nack_interval_frames or self.NACK_INTERVAL_FRAMES
+        self.max_repair_rounds = max_repair_rounds or self.MAX_REPAIR_ROUNDS
+
+        self.stats: dict[str, int or float] = {}
+
+    @property
+    def receivers(self) -> list[Receiver]:
+        """Receivers of all of the endpoints
+        """
+
+        return [endpoint.receiver for endpoint in self.endpoints]
+
+    def run(self) -> dict[str, int or float]:
+        """Transmit the data to all of the receivers
+
+        Returns:
+            dict[str, int or float]: Statistics of the session. The transmitter time includes
+            the encryption and the generation of all of the frames and repairs.
+        """
+
+        start = time.perf_counter()
+
+        self.stats = {
+            "receivers": len(self.endpoints),
+            "frames": self.transmitter.chunk_count,
+            "repairs_transmitted": 0,
+            "nacks": 0,
+            "nacks_suppressed": 0,
+            "repair_rounds": 0,
+            "encryption_s": 0.0,
+            "transmitter_s": 0.0,
+        }
+
+        init_msg = self._timed(self.transmitter.gen_init_message)
+        self.stats["encryption_s"] = self.stats["transmitter_s"]
+
+        for endpoint in self.endpoints:
+            endpoint.reset()
+            endpoint.receiver.on_init_msg(init_msg)
+
+        for chunk in range(self.transmitter.chunk_count):
+            msg = self._get_frame(chunk)
+
+            for endpoint in self.endpoints:
+                endpoint.on_frame(msg, not self.use_retransmission)
+
+            if self.use_retransmission and (chunk + 1) % self.nack_interval_frames == 0:
+                self._repair(False)
+
+        if self.use_retransmission:
+            while self.stats["repair_rounds"] < self.max_repair_rounds and self._repair(True):
+                self.stats["repair_rounds"] += 1
+        else:
+            # The last chunks may have been lost as well
+            for endpoint in self.endpoints:
+                if not endpoint.failed:
+                    endpoint.receiver.pad_to_end()
+
+        completed = sum(endpoint.completed for endpoint in self.endpoints)
+
+        self.stats.update({
+            "receivers_completed": completed,
+            "receivers_failed": sum(endpoint.failed for endpoint in self.endpoints),
+            "transmissions_per_frame":
+                (self.stats["frames"] + self.stats["repairs_transmitted"]) / max(self.stats["frames"], 1),
+            "elapsed_s": time.perf_counter() - start,
+        })
+
+        return self.stats
+
+    def _repair(self, final: bool) -> bool:
+        """Collect the NACK's of all of the receivers and transmit every requested chunk once
+
+        Args:
+            final (bool): If all of the frames were transmitted, in which case the receivers
+            also request the chunks after the highest one they received
+
+        Returns:
+            bool: If any chunk was requested
+        """
+
+        last_chunk = self.transmitter.chunk_count if final else None
+        requesters: dict[int, list[BroadcastEndpoint]] = {}
+
+        for endpoint in self.endpoints:
+            for chunk in endpoint.get_missing_chunks(last_chunk):
+                requesters.setdefault(chunk, []).append(endpoint)
+
+        nacks = sum(map(len, requesters.values()))
+
+        self.stats["nacks"] += nacks
+        self.stats["nacks_suppressed"] += nacks - len(requesters)
+        self.stats["repairs_transmitted"] += len(requesters)
+
+        for chunk in sorted(requesters):
+            msg = self._get_frame(chunk - 1)
+
+            # The other receivers would discard the repair anyway
+            for endpoint in requesters[chunk]:
+                endpoint.on_frame(msg)
+
+        return bool(requesters)
+
+    def _get_frame(self, chunk: int) -> dict[str, int or bytes]:
+        """Generate the frame of a chunk
+
+        Args:
+            chunk (int): Index of the chunk, starting from 0
+
+        Returns:
+            dict[str, int or bytes]: TX message
+        """
+
+        def gen_frame() -> dict[str, int or bytes]:
+            self.transmitter.set_chunk(chunk)
+
+            return self.transmitter.gen_tx_message()
+
+        return self._timed(gen_frame)
+
+    def _timed(self, function):
+        """Call a transmitter function, adding the time it took to the transmitter time
+
+        Args:
+            function (Callable): Function to call
+
+        Returns:
+            Any: Return value of the function
+        """
+
+        start = time.perf_counter()
+        result = function()
+        self.stats["transmitter_s"] += time.perf_counter() - start
+
+        return result
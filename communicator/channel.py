@@ -0,0 +1,468 @@
+"""Volatile communication channel models module. Every model draws
+its random decisions from precomputed NumPy schedules.
+"""
+
+from abc import ABC, abstractmethod
+from typing import Callable, NamedTuple
+import numpy as np
+
+
+class Delivery(NamedTuple):
+    """A message delivered by the channel along with its one way delay
+    """
+
+    msg: dict[str, int or bytes]
+    delay_s: float
+
+
+class ChannelModel(ABC):
+    """Generic channel model interface. A channel model takes the deliveries
+    of the previous model in the channel and transforms them.
+    """
+
+    SCHEDULE_SIZE = 4096
+    IS_LOSS_MODEL = False
+
+    def __init__(self):
+        self.rng: np.random.Generator = np.random.default_rng()
+        self._schedule: list = []
+        self._schedule_idx = 0
+
+    def set_rng(self, rng: np.random.Generator):
+        """Set the random generator used to generate the schedule
+
+        Args:
+            rng (np.random.Generator): Random generator
+        """
+
+        self.rng = rng
+        self._schedule = []
+        self._schedule_idx = 0
+
+    @abstractmethod
+    def _generate_schedule(self, size: int) -> np.ndarray:
+        """Generate the next part of the schedule
+
+        Args:
+            size (int): Number of schedule entries to generate
+
+        Returns:
+            np.ndarray: Schedule entries, one per processed message
+        """
+
+    def _next(self):
+        """Get the next entry of the schedule, generating a new part if needed
+
+        Returns:
+            Any: Schedule entry
+        """
+
+        if self._schedule_idx >= len(self._schedule):
+            self._schedule = self._generate_schedule(self.SCHEDULE_SIZE).tolist()
+            self._schedule_idx = 0
+
+        entry = self._schedule[self._schedule_idx]
+        self._schedule_idx += 1
+
+        return entry
+
+    @abstractmethod
+    def process(self, deliveries: list[Delivery]) -> list[Delivery]:
+        """Process the deliveries of a single transmitted message
+
+        Args:
+            deliveries (list[Delivery]): Deliveries from the previous model
+
+        Returns:
+            list[Delivery]: Deliveries that pass through this model
+        """
+
+    def reset(self):
+        """Reset the model state. Called on connection resets.
+        """
+
+    def discard(self, predicate: Callable[[dict[str, int or bytes]], bool]):
+        """Drop the messages held by the model that match a predicate
+
+        Args:
+            predicate (Callable[[dict[str, int or bytes]], bool]): Returns True for the messages to drop
+        """
+
+    def get_mean_delay_s(self) -> float:
+        """Get the mean one way delay this model adds
+
+        Returns:
+            float: Mean delay in seconds
+        """
+
+        return 0.0
+
+
+class BernoulliLoss(ChannelModel):
+    """Independent, identically distributed packet loss
+    """
+
+    IS_LOSS_MODEL = True
+
+    def __init__(self, loss_rate: float):
+        """
+        Args:
+            loss_rate (float): Probability of a packet being lost, between 0 and 1
+        """
+
+        super().__init__()
+
+        assert 0 <= loss_rate <= 1
+
+        self.loss_rate = loss_rate
+
+    def _generate_schedule(self, size: int) -> np.ndarray:
+        return self.rng.random(size) < self.loss_rate
+
+    def process(self, deliveries: list[Delivery]) -> list[Delivery]:
+        return [delivery for delivery in deliveries if not self._next()]
+
+
+class GilbertElliottLoss(ChannelModel):
+    """Bursty packet loss. The channel switches between a good and a bad state,
+    where each state has its own loss rate.
+    """
+
+    IS_LOSS_MODEL = True
+
+    def __init__(self, p_good_to_bad: float, p_bad_to_good: float,
+                 loss_rate_good=0.0, loss_rate_bad=1.0):
+        """
+        Args:
+            p_good_to_bad (float): Probability of switching from the good to the bad state per packet
+            p_bad_to_good (float): Probability of switching from the bad to the good state per packet
+            loss_rate_good (float, optional): Loss rate in the good state. Defaults to 0.0.
+            loss_rate_bad (float, optional): Loss rate in the bad state. Defaults to 1.0.
+        """
+
+        super().__init__()
+
+        assert 0 < p_good_to_bad <= 1 and 0 < p_bad_to_good <= 1
+
+        self.p_good_to_bad = p_good_to_bad
+        self.p_bad_to_good = p_bad_to_good
+        self.loss_rate_good = loss_rate_good
+        self.loss_rate_bad = loss_rate_bad
+        self.bad_state = False
+
+    @classmethod
+    def from_loss_rate(cls, loss_rate: float, mean_burst_length: float) -> "GilbertElliottLoss":
+        """Create a model where every packet in the bad state is lost, with a given
+        average loss rate and average burst length.
+
+        Args:
+            loss_rate (float): Average loss rate, between 0 and 1
+            mean_burst_length (float): Average number of consecutively lost packets
+
+        Returns:
+            GilbertElliottLoss: Gilbert-Elliott loss model
+        """
+
+        assert 0 <= loss_rate < 1 and mean_burst_length >= 1
+
+        p_bad_to_good = 1 / mean_burst_length
+        p_good_to_bad = max(loss_rate * p_bad_to_good / (1 - loss_rate), 1e-12)
+
+        return cls(p_good_to_bad, p_bad_to_good)
+
+    def _generate_schedule(self, size: int) -> np.ndarray:
+        # Both states last for a geometrically distributed number of packets,
+        # so the state sequence is built from alternating run lengths
+        p_leave = np.array([self.p_good_to_bad, self.p_bad_to_good])
+
+        if self.bad_state:
+            p_leave = p_leave[::-1]
+
+        pairs = int(size / (1 / p_leave[0] + 1 / p_leave[1])) + 1
+
+        states = []
+        length = 0
+
+        while length < size:
+            run_lengths = np.empty(2 * pairs, dtype=np.int64)
+            run_lengths[0::2] = self.rng.geometric(p_leave[0], size=pairs)
+            run_lengths[1::2] = self.rng.geometric(p_leave[1], size=pairs)
+
+            # Runs longer than the schedule get truncated anyway
+            np.minimum(run_lengths, size, out=run_lengths)
+
+            run_states = np.zeros(2 * pairs, dtype=bool)
+            run_states[0::2] = self.bad_state
+            run_states[1::2] = not self.bad_state
+
+            states.append(np.repeat(run_states, run_lengths))
+            length += len(states[-1])
+
+        states = np.concatenate(states)[:size]
+
+        # The truncated last run is continued by the next schedule, which is
+        # equivalent since the run lengths are memoryless
+        self.bad_state = bool(states[-1])
+
+        loss_rates = np.where(states, self.loss_rate_bad, self.loss_rate_good)
+
+        return self.rng.random(size) < loss_rates
+
+    def process(self, deliveries: list[Delivery]) -> list[Delivery]:
+        return [delivery for delivery in deliveries if not self._next()]
+
+
+class Latency(ChannelModel):
+    """Fixed or jittered one way delay
+    """
+
+    def __init__(self, delay_s: float, jitter_s: float = 0.0):
+        """
+        Args:
+            delay_s (float): Base one way delay in seconds
+            jitter_s (float, optional): Maximal additional uniformly distributed delay in seconds.
+            Defaults to 0.0.
+        """
+
+        super().__init__()
+
+        self.delay_s = delay_s
+        self.jitter_s = jitter_s
+
+    def _generate_schedule(self, size: int) -> np.ndarray:
+        return self.delay_s + self.rng.random(size) * self.jitter_s
+
+    def process(self, deliveries: list[Delivery]) -> list[Delivery]:
+        return [Delivery(delivery.msg, delivery.delay_s + self._next()) for delivery in deliveries]
+
+    def get_mean_delay_s(self) -> float:
+        return self.delay_s + self.jitter_s / 2
+
+
+class Reordering(ChannelModel):
+    """Packet reordering. A reordered packet is held back and delivered
+    after a number of following packets.
+    """
+
+    def __init__(self, reorder_rate: float, depth: int = 1):
+        """
+        Args:
+            reorder_rate (float): Probability of a packet being held back, between 0 and 1
+            depth (int, optional): How many transmitted packets a held back
+            packet is delayed by. Defaults to 1.
+        """
+
+        super().__init__()
+
+        assert 0 <= reorder_rate <= 1 and depth >= 1
+
+        self.reorder_rate = reorder_rate
+        self.depth = depth
+        self.held: list[list[int or Delivery]] = []
+
+    def _generate_schedule(self, size: int) -> np.ndarray:
+        return self.rng.random(size) < self.reorder_rate
+
+    def process(self, deliveries: list[Delivery]) -> list[Delivery]:
+        out = []
+
+        for delivery in deliveries:
+            if self._next():
+                self.held.append([self.depth, delivery])
+            else:
+                out.append(delivery)
+
+        released = []
+
+        for held in self.held:
+            held[0] -= 1
+
+            if held[0] < 0:
+                released.append(held)
+
+        for held in released:
+            self.held.remove(held)
+            out.append(held[1])
+
+        return out
+
+    def reset(self):
+        self.held = []
+
+    def discard(self, predicate: Callable[[dict[str, int or bytes]], bool]):
+        self.held = [held for held in self.held if not predicate(held[1].msg)]
+
+
+class Duplication(ChannelModel):
+    """Packet duplication
+    """
+
+    def __init__(self, duplication_rate: float):
+        """
+        Args:
+            duplication_rate (float): Probability of a packet being delivered twice, between 0 and 1
+        """
+
+        super().__init__()
+
+        assert 0 <= duplication_rate <= 1
+
+        self.duplication_rate = duplication_rate
+
+    def _generate_schedule(self, size: int) -> np.ndarray:
+        return self.rng.random(size) < self.duplication_rate
+
+    def process(self, deliveries: list[Delivery]) -> list[Delivery]:
+        out = []
+
+        for delivery in deliveries:
+            out.append(delivery)
+
+            if self._next():
+                out.append(delivery)
+
+        return out
+
+
+class Channel:
+    """Volatile communication channel, built as a chain of channel models
+    """
+
+    # Size of an integer message field, such as the chunk index, on the link
+    INT_FIELD_BYTE_LENGTH = 4
+
+    def __init__(self, models: list[ChannelModel], seed: int = None, bandwidth_bps: float = None):
+        """
+        Args:
+            models (list[ChannelModel]): Channel models, applied in the given order
+            seed (int, optional): Seed for the schedules of all the models. Defaults to None.
+            bandwidth_bps (float, optional): Link bandwidth in bits per second. If None is supplied,
+            transmissions take no time. Defaults to None.
+        """
+
+        self.models = models
+        self.bandwidth_bps = bandwidth_bps
+        self.last_dropped = False
+
+        for model, seed_sequence in zip(models, np.random.SeedSequence(seed).spawn(len(models))):
+            model.set_rng(np.random.default_rng(seed_sequence))
+
+    @classmethod
+    def from_settings(cls, loss_rate: float, seed: int = None, mean_burst_length: float = None,
+                      delay_s=0.0, jitter_s=0.0, reorder_rate=0.0, reorder_depth=1,
+                      duplication_rate=0.0, bandwidth_bps: float = None) -> "Channel":
+        """Create a channel from common settings. Models whose settings are left
+        at their defaults are not added to the channel.
+
+        Args:
+            loss_rate (float): Average packet loss rate, between 0 and 1
+            seed (int, optional): Seed for the schedules of all the models. Defaults to None.
+            mean_burst_length (float, optional): If set, the losses will be bursty with this
+            average burst length. Otherwise they will be independent. Defaults to None.
+            delay_s (float, optional): One way delay in seconds. Defaults to 0.0.
+            jitter_s (float, optional): Maximal additional one way delay in seconds. Defaults to 0.0.
+            reorder_rate (float, optional): Packet reordering rate, between 0 and 1. Defaults to 0.0.
+            reorder_depth (int, optional): How many packets a reordered packet is delayed by.
+            Defaults to 1.
+            duplication_rate (float, optional): Packet duplication rate, between 0 and 1. Defaults to 0.0.
+            bandwidth_bps (float, optional): Link bandwidth in bits per second. Defaults to None.
+
+        Returns:
+            Channel: Channel instance
+        """
+
+        if mean_burst_length:
+            models: list[ChannelModel] = [GilbertElliottLoss.from_loss_rate(loss_rate, mean_burst_length)]
+        else:
+            models: list[ChannelModel] = [BernoulliLoss(loss_rate)]
+
+        if delay_s or jitter_s:
+            models.append(Latency(delay_s, jitter_s))
+
+        if reorder_rate:
+            models.append(Reordering(reorder_rate, reorder_depth))
+
+        if duplication_rate:
+            models.append(Duplication(duplication_rate))
+
+        return cls(models, seed, bandwidth_bps)
+
+    def transmit(self, msg: dict[str, int or bytes]) -> list[Delivery]:
+        """Transmit a message through the channel. Channel.last_dropped
+        will be set if the message was lost.
+
+        Args:
+            msg (dict[str, int or bytes]): Transmitted message
+
+        Returns:
+            list[Delivery]: Messages that arrive at the receiver as a consequence of this transmission
+        """
+
+        deliveries = [Delivery(msg, 0.0)]
+        self.last_dropped = False
+
+        for model in self.models:
+            processed = model.process(deliveries)
+
+            if model.IS_LOSS_MODEL and len(processed) < len(deliveries):
+                self.last_dropped = True
+
+            deliveries = processed
+
+        return deliveries
+
+    def reset(self):
+        """Reset the state of all the models, dropping any messages in flight
+        """
+
+        for model in self.models:
+            model.reset()
+
+    def discard(self, predicate: Callable[[dict[str, int or bytes]], bool]):
+        """Drop the messages in flight that match a predicate, such as the messages
+        of a single session when only that session is re-initialized
+
+        Args:
+            predicate (Callable[[dict[str, int or bytes]], bool]): Returns True for the messages to drop
+        """
+
+        for model in self.models:
+            model.discard(predicate)
+
+    def get_round_trip_time_s(self) -> float:
+        """Get the mean round trip time of the channel
+
+        Returns:
+            float: Round trip time in seconds
+        """
+
+        return 2 * sum(model.get_mean_delay_s() for model in self.models)
+
+    def get_transmission_time_s(self, msg: dict[str, int or bytes]) -> float:
+        """Get the time it takes to put a message on the link
+
+        Args:
+            msg (dict[str, int or bytes]): Transmitted message
+
+        Returns:
+            float: Transmission time in seconds
+        """
+
+        if not self.bandwidth_bps:
+            return 0.0
+
+        return self.get_frame_size(msg) * 8 / self.bandwidth_bps
+
+    @classmethod
+    def get_frame_size(cls, msg: dict[str, int or bytes]) -> int:
+        """Get the size of a message on the link
+
+        Args:
+            msg (dict[str, int or bytes]): Transmitted message
+
+        Returns:
+            int: Size in bytes
+        """
+
+        return sum(cls.INT_FIELD_BYTE_LENGTH if isinstance(value, int) else len(value)
+                   for value in msg.values())
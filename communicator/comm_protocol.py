@@ -1,8 +1,10 @@
 """AES communication configuration module
 """
 
+import copy
+import hashlib
 from enum import Enum, unique
-from typing import Callable
+from typing import Callable, BinaryIO, Iterable
 
 from aes import AES
 from aes import AES_ECB
@@ -12,6 +14,9 @@ from aes import AES_CTR
 from aes import AES_GCM
 from aes import AES_OFB
 from aes import AES_XTS
+from aes import PacketAEAD
+from cryptography.exceptions import InvalidTag
+from .shared_cache import CiphertextCache
 
 
 class Transmitter:
@@ -19,28 +24,59 @@ class Transmitter:
     """
 
     def __init__(self, aes: AES, data_to_transmit: bytes,
-                 aes_fields_on_init: list[str] = None, aes_fields_on_tx: list[str] = None):
+                 aes_fields_on_init: list[str] = None, aes_fields_on_tx: list[str] = None,
+                 chunk_size: int = None, chaining_block_on_tx=False,
+                 ciphertext_cache: CiphertextCache = None, session_id: int = None):
         """
         Args:
             aes (AES): AES instance in encryptor mode that will be used.
-            data_to_transmit (bytes): Data that will be transmitted.
+            data_to_transmit (bytes): Data that will be transmitted. Any bytes-like
+            object can be supplied, it won't be copied.
             aes_fields_on_init (list[str], optional): Which fields
             from the AES instance will be used when creating a initialization
             message. Defaults to None.
             aes_fields_on_tx (list[str], optional): Which fields
             from the AES instance will be used when creating a tx message. Defaults to None.
+            chunk_size (int, optional): Size of the data chunk in every tx message. Must be
+            a multiple of AES.AES_BLOCK_BYTE_LENGTH. If None is supplied, AES.AES_BYTE_LENGTH
+            will be used. Defaults to None.
+            chaining_block_on_tx (bool, optional): Send the ciphertext block preceding the chunk
+            (the IV for the first one) along with every tx message, so that a CBC or CFB receiver
+            can resynchronize after lost chunks. Defaults to False.
+            ciphertext_cache (CiphertextCache, optional): Cache shared between processes, the
+            ciphertext is taken from it if another process already encrypted the same data with
+            the same key and IV's. Defaults to None.
+            session_id (int, optional): Identifier of the session, added to the header of every
+            message so that many sessions can share a link. If None is supplied, the messages
+            carry no session identifier. Defaults to None.
         """
 
         self.aes = aes
+        self.session_id = session_id
+        self.ciphertext_cache = ciphertext_cache
         self.data_to_transmit = data_to_transmit
         self.data_idx = 0
         self.fields_on_init = aes_fields_on_init
         self.fields_on_tx = aes_fields_on_tx
+        self.chaining_block_on_tx = chaining_block_on_tx
 
-        self.data_size_padded = ((len(data_to_transmit) // AES.AES_BYTE_LENGTH) + 1) * AES.AES_BYTE_LENGTH
+        self.chunk_size = chunk_size if chunk_size is not None else AES.AES_BYTE_LENGTH
+
+        if self.chunk_size <= 0 or self.chunk_size % AES.AES_BLOCK_BYTE_LENGTH != 0:
+            raise ValueError(f"Invalid chunk size {self.chunk_size}. It must be a "
+                             f"multiple of {AES.AES_BLOCK_BYTE_LENGTH}.")
+
+        self.data_size = len(data_to_transmit)
+        self.chunk_count = -(-self.data_size // self.chunk_size)
+        self.data_size_padded = self.chunk_count * self.chunk_size
 
         self.encrypted_data: bytes = None
 
+        # Frame table of the current session. Every chunk is a slice of the encrypted data,
+        # at the offset chunk * chunk_size, and every tx message carries the same AES fields.
+        self.encrypted_view: memoryview = None
+        self.tx_fields: dict[str, bytes] = {}
+
         if self.fields_on_init is None:
             self.fields_on_init = []
 
@@ -54,13 +90,35 @@ class Transmitter:
         self.aes.reset()
         self.data_idx = 0
 
-        self.encrypted_data = self.data_to_transmit
-        self.encrypted_data += b"0" * (self.data_size_padded - len(self.encrypted_data))
+        if self.ciphertext_cache is not None:
+            cached = self.ciphertext_cache.get(self.aes, self.data_size_padded, self.fields_on_tx)
+
+            if cached is not None:
+                self.encrypted_data, self.tx_fields = cached
+                self.encrypted_view = memoryview(self.encrypted_data)
+                return
 
-        self.encrypted_data = self.aes.update(self.encrypted_data) + self.aes.finalize()
+        padding = b"0" * (self.data_size_padded - self.data_size)
+
+        encrypted_parts = (self.aes.update(self.data_to_transmit),
+                           self.aes.update(padding),
+                           self.aes.finalize())
+
+        # Joining the parts would copy the whole ciphertext, which is only needed
+        # if some of it was held back until the padding or the finalization
+        if len(encrypted_parts[0]) == self.data_size_padded:
+            self.encrypted_data = encrypted_parts[0]
+        else:
+            self.encrypted_data = b"".join(encrypted_parts)
 
         assert len(self.encrypted_data) == self.data_size_padded
 
+        self.encrypted_view = memoryview(self.encrypted_data)
+        self.tx_fields = {field: getattr(self.aes, field) for field in self.fields_on_tx}
+
+        if self.ciphertext_cache is not None:
+            self.ciphertext_cache.put(self.aes, self.encrypted_data, self.tx_fields)
+
     def gen_init_message(self) -> dict[str, int or str or bytes]:
         """Generate an initialization message for the receiver
 
@@ -70,14 +128,168 @@ class Transmitter:
 
         self.reset()
 
-        msg = {"message_size": len(self.data_to_transmit),
-               "chunks": len(self.data_to_transmit) // AES.AES_BYTE_LENGTH}
+        msg = {"message_size": self.data_size,
+               "chunks": self.chunk_count,
+               "chunk_size": self.chunk_size}
 
         for field in self.fields_on_init:
             msg[field] = getattr(self.aes, field)
 
+        return self._add_session_id(msg)
+
+    def gen_tx_message(self) -> dict[str, bytes] or None:
+        """Generate an TX message for the receiver. The data is a view into the encrypted
+        data, so neither transmitting nor retransmitting a chunk copies it.
+
+        Returns:
+            dict[str, bytes]: TX message
+        """
+
+        chunk_size = self.chunk_size
+
+        if self.data_idx > self.data_size_padded:
+            raise IndexError("No more data to transmit")
+
+        chunk = self.data_idx // chunk_size
+        data = self.encrypted_view[self.data_idx : self.data_idx + chunk_size]
+
+        self.data_idx += len(data)
+
+        msg = {"data": data, "chunk": self.data_idx // chunk_size, **self.tx_fields}
+
+        if self.chaining_block_on_tx:
+            msg["chaining_block"] = self._get_chaining_block(chunk)
+
+        return self._add_session_id(msg)
+
+    def _add_session_id(self, msg: dict[str, int or bytes]) -> dict[str, int or bytes]:
+        """Add the session identifier to the header of a message, if the transmitter has one
+
+        Args:
+            msg (dict[str, int or bytes]): Message
+
+        Returns:
+            dict[str, int or bytes]: The same message
+        """
+
+        if self.session_id is not None:
+            msg["session"] = self.session_id
+
         return msg
 
+    def _get_chaining_block(self, chunk: int) -> bytes:
+        """Get the ciphertext block preceding a chunk
+
+        Args:
+            chunk (int): Index of the chunk, starting from 0
+
+        Returns:
+            bytes: The last ciphertext block of the previous chunk, or the IV for the first chunk
+        """
+
+        if not chunk:
+            return self.aes.iv
+
+        offset = chunk * self.chunk_size
+
+        return self.encrypted_view[offset - AES.AES_BLOCK_BYTE_LENGTH:offset]
+
+    def set_chunk(self, chunk: int):
+        """Set the chunk to be re-transmitted
+
+        Args:
+            chunk (int): Chunk to be set
+        """
+
+        self.data_idx = chunk * self.chunk_size
+
+
+class StreamTransmitter(Transmitter):
+    """AES communication transmitter class that encrypts the data as it is transmitted.
+    The data is pulled from a source in pieces, and only a window of the most recently
+    encrypted chunks is kept for retransmission, so memory use is bounded.
+    """
+
+    RETRANSMIT_WINDOW_CHUNKS = 4096
+
+    # pylint: disable=super-init-not-called
+    def __init__(self, aes: AES, data_source: Callable[[], Iterable[bytes]], data_size: int,
+                 aes_fields_on_init: list[str] = None, aes_fields_on_tx: list[str] = None,
+                 chunk_size: int = None, retransmit_window_chunks: int = None, chaining_block_on_tx=False):
+        """
+        Args:
+            aes (AES): AES instance in encryptor mode that will be used.
+            data_source (Callable[[], Iterable[bytes]]): Called on every reset to get
+            a new iterable over the data that will be transmitted, in pieces of any size.
+            data_size (int): Total size of the data the source provides.
+            aes_fields_on_init (list[str], optional): Which fields
+            from the AES instance will be used when creating a initialization
+            message. Defaults to None.
+            aes_fields_on_tx (list[str], optional): Which fields
+            from the AES instance will be used when creating a tx message. Defaults to None.
+            chunk_size (int, optional): Size of the data chunk in every tx message. Must be
+            a multiple of AES.AES_BLOCK_BYTE_LENGTH. If None is supplied, AES.AES_BYTE_LENGTH
+            will be used. Defaults to None.
+            retransmit_window_chunks (int, optional): How many of the most recently encrypted
+            chunks are kept for retransmission. If None is supplied,
+            StreamTransmitter.RETRANSMIT_WINDOW_CHUNKS will be used. Defaults to None.
+            chaining_block_on_tx (bool, optional): Send the ciphertext block preceding the chunk
+            along with every tx message. Defaults to False.
+        """
+
+        self.data_source = data_source
+        self.retransmit_window_chunks = retransmit_window_chunks or self.RETRANSMIT_WINDOW_CHUNKS
+
+        super().__init__(aes, b"", aes_fields_on_init, aes_fields_on_tx, chunk_size, chaining_block_on_tx)
+
+        self.data_size = data_size
+        self.chunk_count = -(-self.data_size // self.chunk_size)
+        self.data_size_padded = self.chunk_count * self.chunk_size
+
+        self.source_iterator: Iterable[bytes] = None
+        self.pending_data = bytearray()
+        self.encrypted_chunks: dict[int, bytes] = {}
+        self.chunks_encrypted = 0
+
+    def reset(self):
+        """Reset the transmitter instance and restart the data source
+        """
+
+        self.aes.reset()
+        self.data_idx = 0
+
+        self.source_iterator = iter(self.data_source())
+        self.pending_data = bytearray()
+        self.encrypted_chunks = {}
+        self.chunks_encrypted = 0
+
+    def _encrypt_next_chunk(self):
+        """Pull the next chunk worth of data from the source and encrypt it
+        """
+
+        while len(self.pending_data) < self.chunk_size:
+            piece = next(self.source_iterator, None)
+
+            if piece is None:
+                break
+
+            self.pending_data += piece
+
+        chunk = bytes(self.pending_data[:self.chunk_size])
+        del self.pending_data[:self.chunk_size]
+
+        chunk += b"0" * (self.chunk_size - len(chunk))
+
+        encrypted = self.aes.update(chunk)
+
+        if self.chunks_encrypted + 1 == self.chunk_count:
+            encrypted += self.aes.finalize()
+
+        self.encrypted_chunks[self.chunks_encrypted] = encrypted
+        # One more chunk is kept, as it holds the chaining block of the oldest chunk in the window
+        self.encrypted_chunks.pop(self.chunks_encrypted - self.retransmit_window_chunks - 1, None)
+        self.chunks_encrypted += 1
+
     def gen_tx_message(self) -> dict[str, bytes] or None:
         """Generate an TX message for the receiver
 
@@ -85,30 +297,48 @@ class Transmitter:
             dict[str, bytes]: TX message
         """
 
-        chunk_size = AES.AES_BYTE_LENGTH
-
         if self.data_idx > self.data_size_padded:
             raise IndexError("No more data to transmit")
 
-        data = self.encrypted_data[self.data_idx : self.data_idx + chunk_size]
+        chunk = self.data_idx // self.chunk_size
+
+        while self.chunks_encrypted <= chunk < self.chunk_count:
+            self._encrypt_next_chunk()
+
+        data = self.encrypted_chunks[chunk] if chunk < self.chunk_count else b""
 
         self.data_idx += len(data)
 
-        msg = {"data": data, "chunk": self.data_idx // chunk_size}
+        msg = {"data": data, "chunk": self.data_idx // self.chunk_size}
 
         for field in self.fields_on_tx:
             msg[field] = getattr(self.aes, field)
 
-        return msg
+        if self.chaining_block_on_tx:
+            msg["chaining_block"] = self._get_chaining_block(chunk)
+
+        return self._add_session_id(msg)
+
+    def _get_chaining_block(self, chunk: int) -> bytes:
+        if not chunk:
+            return self.aes.iv
+
+        return self.encrypted_chunks[chunk - 1][-AES.AES_BLOCK_BYTE_LENGTH:]
 
     def set_chunk(self, chunk: int):
         """Set the chunk to be re-transmitted
 
         Args:
             chunk (int): Chunk to be set
+
+        Raises:
+            IndexError: Raised if the chunk is no longer in the retransmit window
         """
 
-        self.data_idx = chunk * AES.AES_BYTE_LENGTH
+        if chunk < self.chunk_count and chunk < self.chunks_encrypted - self.retransmit_window_chunks:
+            raise IndexError(f"Chunk {chunk} is no longer in the retransmit window")
+
+        super().set_chunk(chunk)
 
 
 class Receiver:
@@ -153,7 +383,10 @@ class Receiver:
                  error_protocol: RxFailureException.ErrorProtocol = None,
                  aes_fields_on_init: list[str] = None,
                  aes_fields_on_rx: list[str] = None,
-                 update_cipher_on_packet_drop=True):
+                 update_cipher_on_packet_drop=True,
+                 data_sink: BinaryIO = None,
+                 encrypted_data_sink: BinaryIO = None,
+                 resync_on_packet_drop=False):
         """
         Args:
             aes (AES): AES instance in decryptor mode that will be used.
@@ -170,20 +403,34 @@ class Receiver:
             update_cipher_on_packet_drop (bool, optional): If set to true and in the case of a
             detected discrepancy, the AES context will be provided with chunks of zero's
             to decrypt for as many chunks as are detected to be missing. Defaults to True.
+            data_sink (BinaryIO, optional): Seekable file the decrypted data will be written to,
+            instead of keeping it in memory. Defaults to None.
+            encrypted_data_sink (BinaryIO, optional): Seekable file the encrypted data will be
+            written to, instead of keeping it in memory. Defaults to None.
+            resync_on_packet_drop (bool, optional): If set to true and in the case of a detected
+            discrepancy, the AES context is restarted from the chaining block sent along with the
+            next received chunk instead of being provided with zero's, so that only the missing chunks
+            are lost. Only supported by the CBC and CFB modes. Defaults to False.
         """
 
         self.aes = aes
-        self.received_data = bytes()
-        self.received_data_encrypted = bytes()
+        self.data_sink = data_sink
+        self.encrypted_data_sink = encrypted_data_sink
+        self.data_buffer = bytearray()
+        self.encrypted_data_buffer = bytearray()
+        self.received_size = 0
+        self.received_encrypted_size = 0
         self.data_received_cb = data_received_cb
         self.data_size_to_receive = 0
         self.chunks_to_receive = 0
+        self.chunk_size = AES.AES_BYTE_LENGTH
         self.current_chunk = 0
         self.fields_on_init = aes_fields_on_init
         self.fields_on_rx = aes_fields_on_rx
         self.error_protocol = error_protocol
 
         self.update_cipher_on_packet_drop = update_cipher_on_packet_drop
+        self.resync_on_packet_drop = resync_on_packet_drop
 
         if self.fields_on_init is None:
             self.fields_on_init = []
@@ -196,12 +443,61 @@ class Receiver:
         """
 
         self.aes.reset()
-        self.received_data = bytes()
-        self.received_data_encrypted = bytes()
+        self.data_buffer = bytearray()
+        self.encrypted_data_buffer = bytearray()
+        self.received_size = 0
+        self.received_encrypted_size = 0
         self.data_size_to_receive = 0
         self.chunks_to_receive = 0
         self.current_chunk = 0
 
+        self._rewind_sinks()
+
+    def clone(self, data_received_cb: Callable[[bytes, bytes, int], None] = None) -> "Receiver":
+        """Create a new receiver with the same configuration and key, but its own cipher
+        context and buffers, ready for a new init message. Data sinks are not shared.
+
+        Args:
+            data_received_cb (Callable[[bytes, bytes, int], None], optional): Callback instance
+            of the new receiver. Defaults to None.
+
+        Returns:
+            Receiver: The new receiver
+        """
+
+        receiver = copy.copy(self)
+        receiver.aes = copy.copy(self.aes)
+        receiver.data_received_cb = data_received_cb
+        receiver.data_sink = None
+        receiver.encrypted_data_sink = None
+
+        receiver.reset()
+
+        return receiver
+
+    @property
+    def received_data(self) -> memoryview:
+        """All of the decrypted data received so far. Empty if a data sink is used.
+        """
+
+        return memoryview(self.data_buffer)[:self.received_size]
+
+    @property
+    def received_data_encrypted(self) -> memoryview:
+        """All of the encrypted data received so far. Empty if an encrypted data sink is used.
+        """
+
+        return memoryview(self.encrypted_data_buffer)[:self.received_encrypted_size]
+
+    def _rewind_sinks(self):
+        """Discard anything that was written to the sinks
+        """
+
+        for sink in (self.data_sink, self.encrypted_data_sink):
+            if sink is not None:
+                sink.seek(0)
+                sink.truncate()
+
     def on_init_msg(self, init_msg: dict[str, int or str or bytes]):
         """Process the init message from the transmitter
 
@@ -211,6 +507,16 @@ class Receiver:
 
         self.data_size_to_receive = init_msg["message_size"]
         self.chunks_to_receive = init_msg["chunks"]
+        self.chunk_size = init_msg["chunk_size"]
+
+        # Buffers are replaced instead of resized, as views of the old ones may still exist
+        encrypted_size = self.chunks_to_receive * self.chunk_size
+        self.data_buffer = bytearray(self.data_size_to_receive if self.data_sink is None else 0)
+        self.encrypted_data_buffer = bytearray(encrypted_size if self.encrypted_data_sink is None else 0)
+        self.received_size = 0
+        self.received_encrypted_size = 0
+
+        self._rewind_sinks()
 
         for field in self.fields_on_init:
             setattr(self.aes, field, init_msg[field])
@@ -225,19 +531,43 @@ class Receiver:
             data_encrypted (bytes): Encrypted chunk to be appended
         """
 
-        self.received_data += data
-        self.received_data_encrypted += data_encrypted
+        # Final padding, if any, is not stored
+        self.received_size = self._store(self.data_buffer, self.data_sink, self.received_size,
+                                         data, self.data_size_to_receive)
+        self.received_encrypted_size = self._store(self.encrypted_data_buffer, self.encrypted_data_sink,
+                                                   self.received_encrypted_size, data_encrypted,
+                                                   self.chunks_to_receive * self.chunk_size)
         self.current_chunk += 1
 
-        # Remove final padding, if any
-        if len(self.received_data) > self.data_size_to_receive:
-            self.received_data = self.received_data[:self.data_size_to_receive]
-
         if self.data_received_cb is not None:
-            bytes_remaining = self.data_size_to_receive - len(self.received_data)
+            bytes_remaining = self.data_size_to_receive - self.received_size
 
             self.data_received_cb(self.received_data, data, bytes_remaining)
 
+    def _store(self, buffer: bytearray, sink: BinaryIO or None, position: int,
+               data: bytes, size: int) -> int:
+        """Store data either into a preallocated buffer or into a sink
+
+        Args:
+            buffer (bytearray): Preallocated buffer, used if there is no sink
+            sink (BinaryIO or None): Sink the data is appended to
+            position (int): Position to store the data at
+            data (bytes): Data to be stored
+            size (int): Total size of the data, anything past it is dropped
+
+        Returns:
+            int: Position after the stored data
+        """
+
+        data = data[:max(size - position, 0)]
+
+        if sink is None:
+            buffer[position:position + len(data)] = data
+        else:
+            sink.write(data)
+
+        return position + len(data)
+
     def _recover_by_padding(self, rx_data: dict[str, int or bytes], already_decrypted: bool):
         """Pad the buffers (and the cipher context if self.update_cipher_on_packet_drop == True)
         with chunks filled with zero's
@@ -247,20 +577,25 @@ class Receiver:
             already_decrypted (bool): Flag to know if the cipher context was already updated or not
         """
         chunks_missing = rx_data["chunk"] - self.current_chunk
-        last_chunk = self.current_chunk + chunks_missing == self.data_size_to_receive // AES.AES_BYTE_LENGTH
+        last_chunk = self.current_chunk + chunks_missing == self.chunks_to_receive
 
-        zerod_chunk = b"\0" * AES.AES_BYTE_LENGTH
+        zerod_chunk = b"\0" * self.chunk_size
 
         if already_decrypted:
             self._append_data(zerod_chunk, zerod_chunk)
             return
 
+        resync = self.resync_on_packet_drop and "chaining_block" in rx_data
+
         for i in range(chunks_missing):
             if i < chunks_missing - 1:
-                if self.update_cipher_on_packet_drop:
+                if self.update_cipher_on_packet_drop and not resync:
                     self.aes.update(zerod_chunk)
                 self._append_data(zerod_chunk, zerod_chunk)
             else:
+                if resync:
+                    self.aes.resync(rx_data["chaining_block"])
+
                 decrypted = self.aes.update(rx_data["data"])
 
                 if last_chunk:
@@ -268,6 +603,17 @@ class Receiver:
 
                 self._append_data(decrypted, rx_data["data"])
 
+    def pad_to_end(self):
+        """Pad the buffers with zero's in place of all of the chunks that weren't received yet.
+        Used when no more chunks will arrive, such as when the last chunks of a transfer without
+        retransmission were lost.
+        """
+
+        zerod_chunk = b"\0" * self.chunk_size
+
+        while self.current_chunk < self.chunks_to_receive:
+            self._append_data(zerod_chunk, zerod_chunk)
+
     def on_data_rx(self, rx_data: dict[str, int or bytes], pad_on_failure=False):
         """Process a TX message from the transmitter
 
@@ -282,6 +628,10 @@ class Receiver:
             to be invalid
         """
 
+        if rx_data["chunk"] <= self.current_chunk:
+            # Duplicated or late packet that was already received or padded
+            return
+
         try:
             if self.current_chunk + 1 != rx_data["chunk"]:
                 raise Receiver.RxFailureException(self.error_protocol, self.current_chunk + 1)
@@ -291,7 +641,7 @@ class Receiver:
 
             data = self.aes.update(rx_data["data"])
 
-            if len(self.received_data) + len(rx_data["data"]) >= self.data_size_to_receive:
+            if self.received_size + len(rx_data["data"]) >= self.data_size_to_receive:
                 data += self.aes.finalize()
 
             if not data:
@@ -309,6 +659,181 @@ class Receiver:
 
             raise
 
+class PacketTransmitter(Transmitter):
+    """Transmitter that seals every chunk independently with a per packet AEAD,
+    instead of encrypting the data as a single stream
+    """
+
+    def __init__(self, aead: PacketAEAD, data_to_transmit: bytes, chunk_size: int = None):
+        """
+        Args:
+            aead (PacketAEAD): PacketAEAD instance in encryptor mode that will be used.
+            data_to_transmit (bytes): Data that will be transmitted. Any bytes-like
+            object can be supplied, it won't be copied.
+            chunk_size (int, optional): Size of the data chunk in every tx message. Must be
+            a multiple of AES.AES_BLOCK_BYTE_LENGTH. If None is supplied, AES.AES_BYTE_LENGTH
+            will be used. Defaults to None.
+        """
+
+        super().__init__(aead, data_to_transmit, aes_fields_on_init=["salt"], chunk_size=chunk_size)
+
+    def reset(self):
+        """Reset the transmitter instance and start a new session
+        """
+
+        self.aes.reset()
+        self.data_idx = 0
+
+    def gen_tx_message(self) -> dict[str, bytes] or None:
+        """Generate an TX message for the receiver
+
+        Returns:
+            dict[str, bytes]: TX message
+        """
+
+        chunk = self.data_idx // self.chunk_size
+
+        if chunk < self.chunk_count:
+            start = chunk * self.chunk_size
+            data = self.aes.seal(chunk, self.data_to_transmit[start:start + self.chunk_size])
+            self.data_idx += self.chunk_size
+        else:
+            data = b""
+
+        return self._add_session_id({"data": data, "chunk": self.data_idx // self.chunk_size})
+
+
+class PacketReceiver(Receiver):
+    """Receiver for the PacketTransmitter. Every chunk is verified and decrypted on its own,
+    so a lost or forged chunk never requires a re-initialization.
+    """
+
+    def __init__(self, aead: PacketAEAD, data_received_cb: Callable[[bytes, bytes, int], None] = None,
+                 data_sink: BinaryIO = None, encrypted_data_sink: BinaryIO = None):
+        """
+        Args:
+            aead (PacketAEAD): PacketAEAD instance in decryptor mode that will be used.
+            data_received_cb (Callable[[bytes, bytes, int], None]): Callback instance
+            that will receive the decrypted data.
+            data_sink (BinaryIO, optional): Seekable file the decrypted data will be written to,
+            instead of keeping it in memory. Defaults to None.
+            encrypted_data_sink (BinaryIO, optional): Seekable file the encrypted data will be
+            written to, instead of keeping it in memory. Defaults to None.
+        """
+
+        super().__init__(aead, data_received_cb, Receiver.RxFailureException.ErrorProtocol.RETRANSMIT,
+                         aes_fields_on_init=["salt"], data_sink=data_sink,
+                         encrypted_data_sink=encrypted_data_sink)
+
+    def on_data_rx(self, rx_data: dict[str, int or bytes], pad_on_failure=False):
+        """Process a TX message from the transmitter
+
+        Args:
+            rx_data (dict[str, int or bytes]): TX message
+            pad_on_failure (bool, optional): Replace the missing chunks with zero's
+            in the case a discrepancy is detected. Defaults to False.
+
+        Raises:
+            Receiver.RxFailureException: In the case chunks are detected missing
+            Receiver.RxFailureException: In the case the chunk fails the authentication
+        """
+
+        if rx_data["chunk"] <= self.current_chunk:
+            # Duplicated or late packet that was already received or padded
+            return
+
+        # An empty frame is the probe sent after the last chunk, so the chunks up to it were lost.
+        # It has no tag to verify.
+        if not len(rx_data["data"]):
+            if not pad_on_failure:
+                raise Receiver.RxFailureException(self.error_protocol, self.current_chunk + 1)
+
+            self.pad_to_end()
+            return
+
+        try:
+            data = self.aes.open(rx_data["chunk"] - 1, rx_data["data"])
+        except InvalidTag as e:
+            # A forged or corrupted chunk is handled as a lost one, it will be re-requested
+            # or padded over once the next chunk arrives
+            raise Receiver.RxFailureException(self.error_protocol, rx_data["chunk"]) from e
+
+        chunks_missing = rx_data["chunk"] - self.current_chunk - 1
+
+        if chunks_missing and not pad_on_failure:
+            raise Receiver.RxFailureException(self.error_protocol, self.current_chunk + 1)
+
+        # Chunks are independent, so the missing ones are simply left as zero's
+        for _ in range(chunks_missing):
+            self._append_data(bytes(self.chunk_size), bytes(self.chunk_size))
+
+        self._append_data(data, rx_data["data"][:-PacketAEAD.TAG_BYTE_LENGTH])
+
+        if chunks_missing:
+            raise Receiver.RxFailureException(self.error_protocol, self.current_chunk - chunks_missing)
+
+
+class SectorReceiver(Receiver):
+    """Receiver for AES XTS sectors. Every chunk is a sector that is decrypted on its own,
+    with the tweak of its index, so the missing chunks never desynchronize the cipher.
+    """
+
+    def __init__(self, aes: AES_XTS, data_received_cb: Callable[[bytes, bytes, int], None] = None,
+                 data_sink: BinaryIO = None, encrypted_data_sink: BinaryIO = None):
+        """
+        Args:
+            aes (AES_XTS): AES_XTS instance with the key of the transmitter.
+            data_received_cb (Callable[[bytes, bytes, int], None]): Callback instance
+            that will receive the decrypted data.
+            data_sink (BinaryIO, optional): Seekable file the decrypted data will be written to,
+            instead of keeping it in memory. Defaults to None.
+            encrypted_data_sink (BinaryIO, optional): Seekable file the encrypted data will be
+            written to, instead of keeping it in memory. Defaults to None.
+        """
+
+        super().__init__(aes, data_received_cb, Receiver.RxFailureException.ErrorProtocol.RETRANSMIT,
+                         data_sink=data_sink, encrypted_data_sink=encrypted_data_sink)
+
+    def on_data_rx(self, rx_data: dict[str, int or bytes], pad_on_failure=False):
+        """Process a TX message from the transmitter
+
+        Args:
+            rx_data (dict[str, int or bytes]): TX message
+            pad_on_failure (bool, optional): Replace the missing chunks with zero's
+            in the case a discrepancy is detected. Defaults to False.
+
+        Raises:
+            Receiver.RxFailureException: In the case chunks are detected missing
+        """
+
+        if rx_data["chunk"] <= self.current_chunk:
+            # Duplicated or late packet that was already received or padded
+            return
+
+        # An empty frame is the probe sent after the last chunk, so the chunks up to it were lost
+        if not len(rx_data["data"]):
+            if not pad_on_failure:
+                raise Receiver.RxFailureException(self.error_protocol, self.current_chunk + 1)
+
+            self.pad_to_end()
+            return
+
+        chunks_missing = rx_data["chunk"] - self.current_chunk - 1
+
+        if chunks_missing and not pad_on_failure:
+            raise Receiver.RxFailureException(self.error_protocol, self.current_chunk + 1)
+
+        zerod_chunk = bytes(self.chunk_size)
+
+        for _ in range(chunks_missing):
+            self._append_data(zerod_chunk, zerod_chunk)
+
+        self._append_data(self.aes.decrypt_sector(rx_data["chunk"] - 1, rx_data["data"]), rx_data["data"])
+
+        if chunks_missing:
+            raise Receiver.RxFailureException(self.error_protocol, self.current_chunk - chunks_missing)
+
+
 class TxRxPair:
     """A pair of Transmitter and Receiver classes with the same
     AES class mode that share the same key
@@ -327,7 +852,13 @@ class TxRxPair:
 
 def init_aes_txrx_pairs(data_to_transmit: bytes,
                         data_rx_cb: Callable[[bytes, bytes, int], None] = None,
-                        update_cipher_on_packet_drop: bool = True) -> dict[str, TxRxPair]:
+                        update_cipher_on_packet_drop: bool = True,
+                        chunk_size: int = None,
+                        data_source: Callable[[], Iterable[bytes]] = None,
+                        data_size: int = None,
+                        resync_on_packet_drop: bool = False,
+                        key: bytes = None,
+                        ciphertext_cache: CiphertextCache = None) -> dict[str, TxRxPair]:
     """Initialize TxRxPair instances with all implemented AES classes
 
     Args:
@@ -338,6 +869,20 @@ def init_aes_txrx_pairs(data_to_transmit: bytes,
         update_cipher_on_packet_drop (bool, optional): If the receiver
         should update the cipher it's cipher context in the case it
         detects discrepancies. Defaults to True.
+        chunk_size (int, optional): Size of the data chunk in every tx message.
+        If None is supplied, AES.AES_BYTE_LENGTH will be used. Defaults to None.
+        data_source (Callable[[], Iterable[bytes]], optional): If supplied, StreamTransmitter instances
+        will pull the data from it instead of using data_to_transmit. Defaults to None.
+        data_size (int, optional): Total size of the data data_source provides. Defaults to None.
+        resync_on_packet_drop (bool, optional): If the CBC and CFB receivers should resynchronize
+        on the chaining block sent with every chunk, instead of updating their cipher contexts
+        with zero's, in the case they detect discrepancies. Defaults to False.
+        key (bytes, optional): Key of all of the AES classes. If supplied, the IV's, nonces and the
+        ChaCha20 key are derived from it, so that every process using the same key produces the same
+        ciphertext.
+        If None is supplied, a new key and random IV's will be used. Defaults to None.
+        ciphertext_cache (CiphertextCache, optional): Cache shared between processes the
+        transmitters take the ciphertext from. Defaults to None.
 
     Returns:
         dict[str, TxRxPair]: Dictionary will key being the name of the
@@ -345,13 +890,34 @@ def init_aes_txrx_pairs(data_to_transmit: bytes,
     """
 
     out = {}
-    key = AES.generate_secure_key()
-    xts_key = key + AES.generate_secure_key()
+    derive_ivs = key is not None
+    key = key or AES.generate_secure_key()
+
+    # XTS takes a double length key, and every chunk is one of its sectors
+    sector_size = chunk_size or AES.AES_BYTE_LENGTH
+
+    if derive_ivs:
+        xts_key = key + hashlib.blake2b(b"xts", key=key, digest_size=AES.AES_BYTE_LENGTH).digest()
+    else:
+        xts_key = key + AES.generate_secure_key()
+
+    def make_transmitter(aes: AES, **kwargs) -> Transmitter:
+        if data_source is not None:
+            return StreamTransmitter(aes, data_source, data_size, chunk_size=chunk_size, **kwargs)
+
+        return Transmitter(aes, data_to_transmit, chunk_size=chunk_size, ciphertext_cache=ciphertext_cache,
+                           **kwargs)
+
+    def get_iv(aes_mode: str) -> bytes or None:
+        # None lets the AES class generate a random one
+        if not derive_ivs:
+            return None
+
+        return hashlib.blake2b(aes_mode.encode(), key=key, digest_size=AES.AES_IV_BYTE_LENGTH).digest()
 
     out["ecb"] = TxRxPair(
-        Transmitter(
-            aes=AES_ECB(key=key, mode=AES.AES_MODE.ENCRYPTOR),
-            data_to_transmit=data_to_transmit
+        make_transmitter(
+            aes=AES_ECB(key=key, mode=AES.AES_MODE.ENCRYPTOR)
         ),
         Receiver(
             aes=AES_ECB(key=key, mode=AES.AES_MODE.DECRYPTOR),
@@ -362,39 +928,40 @@ def init_aes_txrx_pairs(data_to_transmit: bytes,
     )
 
     out["cbc"] = TxRxPair(
-        Transmitter(
-            aes=AES_CBC(key=key, mode=AES.AES_MODE.ENCRYPTOR),
-            data_to_transmit=data_to_transmit,
-            aes_fields_on_init=["iv"]
+        make_transmitter(
+            aes=AES_CBC(key=key, iv=get_iv("cbc"), mode=AES.AES_MODE.ENCRYPTOR),
+            aes_fields_on_init=["iv"],
+            chaining_block_on_tx=resync_on_packet_drop
         ),
         Receiver(
             aes=AES_CBC(key=key, mode=AES.AES_MODE.DECRYPTOR),
             data_received_cb=data_rx_cb,
             error_protocol=Receiver.RxFailureException.ErrorProtocol.RETRANSMIT,
             aes_fields_on_init=["iv"],
-            update_cipher_on_packet_drop=update_cipher_on_packet_drop
+            update_cipher_on_packet_drop=update_cipher_on_packet_drop,
+            resync_on_packet_drop=resync_on_packet_drop
         )
     )
 
     out["cfb"] = TxRxPair(
-        Transmitter(
-            aes=AES_CFB(key=key, mode=AES.AES_MODE.ENCRYPTOR),
-            data_to_transmit=data_to_transmit,
-            aes_fields_on_init=["iv"]
+        make_transmitter(
+            aes=AES_CFB(key=key, iv=get_iv("cfb"), mode=AES.AES_MODE.ENCRYPTOR),
+            aes_fields_on_init=["iv"],
+            chaining_block_on_tx=resync_on_packet_drop
         ),
         Receiver(
             aes=AES_CFB(key=key, mode=AES.AES_MODE.DECRYPTOR),
             data_received_cb=data_rx_cb,
             error_protocol=Receiver.RxFailureException.ErrorProtocol.RETRANSMIT,
             aes_fields_on_init=["iv"],
-            update_cipher_on_packet_drop=update_cipher_on_packet_drop
+            update_cipher_on_packet_drop=update_cipher_on_packet_drop,
+            resync_on_packet_drop=resync_on_packet_drop
         )
     )
 
     out["ctr"] = TxRxPair(
-        Transmitter(
-            aes=AES_CTR(key=key, mode=AES.AES_MODE.ENCRYPTOR),
-            data_to_transmit=data_to_transmit,
+        make_transmitter(
+            aes=AES_CTR(key=key, nonce=get_iv("ctr"), mode=AES.AES_MODE.ENCRYPTOR),
             aes_fields_on_init=["nonce"]
         ),
         Receiver(
@@ -407,9 +974,8 @@ def init_aes_txrx_pairs(data_to_transmit: bytes,
     )
 
     out["ofb"] = TxRxPair(
-        Transmitter(
-            aes=AES_OFB(key=key, mode=AES.AES_MODE.ENCRYPTOR),
-            data_to_transmit=data_to_transmit,
+        make_transmitter(
+            aes=AES_OFB(key=key, iv=get_iv("ofb"), mode=AES.AES_MODE.ENCRYPTOR),
             aes_fields_on_init=["iv"]
         ),
         Receiver(
@@ -422,24 +988,18 @@ def init_aes_txrx_pairs(data_to_transmit: bytes,
     )
 
     out["xts"] = TxRxPair(
-        Transmitter(
-            aes=AES_XTS(key=xts_key, mode=AES.AES_MODE.ENCRYPTOR),
-            data_to_transmit=data_to_transmit,
-            aes_fields_on_init=["tweak"],
+        make_transmitter(
+            aes=AES_XTS(key=xts_key, mode=AES.AES_MODE.ENCRYPTOR, sector_size=sector_size)
         ),
-        Receiver(
-            aes=AES_XTS(key=xts_key, mode=AES.AES_MODE.DECRYPTOR),
-            data_received_cb=data_rx_cb,
-            error_protocol=Receiver.RxFailureException.ErrorProtocol.RETRANSMIT,
-            aes_fields_on_init=["tweak"],
-            update_cipher_on_packet_drop=update_cipher_on_packet_drop
+        SectorReceiver(
+            aes=AES_XTS(key=xts_key, mode=AES.AES_MODE.DECRYPTOR, sector_size=sector_size),
+            data_received_cb=data_rx_cb
         )
     )
 
     out["gcm"] = TxRxPair(
-        Transmitter(
-            aes=AES_GCM(key=key, mode=AES.AES_MODE.ENCRYPTOR),
-            data_to_transmit=data_to_transmit,
+        make_transmitter(
+            aes=AES_GCM(key=key, iv=get_iv("gcm"), mode=AES.AES_MODE.ENCRYPTOR),
             aes_fields_on_init=["iv"],
             aes_fields_on_tx=["tag"]
         ),
@@ -453,7 +1013,29 @@ def init_aes_txrx_pairs(data_to_transmit: bytes,
         )
     )
 
-    # XTS is not useful for this project
-    out.pop("xts")
+    # Chunks are sealed independently, which needs random access to the data
+    if data_source is None:
+        for algorithm in PacketAEAD.ALGORITHMS:
+            if algorithm == "gcm":
+                aead_key = key
+            elif derive_ivs:
+                aead_key = hashlib.blake2b(algorithm.encode(), key=key,
+                                           digest_size=PacketAEAD.CHACHA20_KEY_BYTE_LENGTH).digest()
+            else:
+                aead_key = None
+
+            encryptor = PacketAEAD(aead_key, algorithm, AES.AES_MODE.ENCRYPTOR)
+
+            out[f"{algorithm}_packet"] = TxRxPair(
+                PacketTransmitter(
+                    aead=encryptor,
+                    data_to_transmit=data_to_transmit,
+                    chunk_size=chunk_size
+                ),
+                PacketReceiver(
+                    aead=PacketAEAD(encryptor.key, algorithm, AES.AES_MODE.DECRYPTOR),
+                    data_received_cb=data_rx_cb
+                )
+            )
 
     return out
@@ -1,24 +1,58 @@
 """AES Volatile Communicator module
 """
 
-import random
+import os
+import time
+import logging
+import tempfile
+import numpy as np
 from aes import AES
-from summarizer import Summarizer, Visualizer
-from image_helper import ImageHelper
+from summarizer import Summarizer, Visualizer, Metrics, RateLimitFilter, SimulationClock, QualityMetrics
+from image_helper import ImageHelper, ImageWriter
 from .comm_protocol import Receiver, TxRxPair, init_aes_txrx_pairs
+from .channel import Channel, BernoulliLoss, Delivery
+from .payload import PayloadSource, ImageSource
+from .shared_cache import CiphertextCache
+from .compression import BlockCompressor
+from .trace import TraceRecorder
+from .profiler import Profiler
+
+logger = logging.getLogger(__name__)
+
+# Used for messages that can be emitted on every packet or every connection reset
+packet_logger = logging.getLogger(__name__ + ".packets")
+packet_logger.addFilter(RateLimitFilter())
 
 
 class Communicator:
     """AES Volatile Communicator class
     """
 
+    PROGRESS_LOG_STEP_PERCENT = 5
+    PREVIEW_MAX_SIZE = 256
 
     def __init__(self,
                  path_to_image = "",
                  aes_modes_to_test: list[str] = None,
                  message_fail_rate_percent = 1.0,
                  use_retransmission=False,
-                 update_cipher_on_packet_drop=True):
+                 update_cipher_on_packet_drop=True,
+                 chunk_size: int = None,
+                 seed: int = None,
+                 save_outputs=True,
+                 max_connection_resets: int = None,
+                 channel: Channel = None,
+                 tile_rows: int = None,
+                 preview_step_percent: float = None,
+                 preview_interval_s: float = None,
+                 preview_max_size: int = None,
+                 payload: PayloadSource = None,
+                 resync_on_packet_drop=False,
+                 key: bytes = None,
+                 ciphertext_cache: CiphertextCache = None,
+                 compression: str = None,
+                 compression_block_size: int = None,
+                 trace_folder: str = None):
         """
         Args:
             path_to_image (str, optional): Path to image that will be
@@ -32,21 +66,125 @@ class Communicator:
             Defaults to False.
             update_cipher_on_packet_drop (bool, optional): Update AES cipher contexts on failed packets.
             Defaults to True.
+            chunk_size (int, optional): Size of the data chunk in every transmitted packet.
+            If None is supplied, AES.AES_BYTE_LENGTH will be used. Defaults to None.
+            seed (int, optional): Seed for the packet drop generator of the default channel.
+            If None is supplied, the drops won't be reproducible. Defaults to None.
+            save_outputs (bool, optional): Save images, timeline graphs and metrics
+            to the output folder. Defaults to True.
+            max_connection_resets (int, optional): How many connection resets an AES mode may
+            have before it is considered failed. If None is supplied, the AES mode will
+            be retried until it passes. Defaults to None.
+            channel (Channel, optional): Channel the packets are transmitted through. If None is
+            supplied, a channel with message_fail_rate_percent Bernoulli loss will be used.
+            Defaults to None.
+            tile_rows (int, optional): If set, the image is read and transmitted in bands of this
+            many rows and the receivers write the received data to disk, so that the memory use
+            doesn't grow with the image size. Defaults to None.
+            preview_step_percent (float, optional): If set, a downscaled preview of the partially
+            received image is saved every time this percentage of the image is received.
+            Defaults to None.
+            preview_interval_s (float, optional): If set, a downscaled preview of the partially
+            received image is saved every this many seconds. Defaults to None.
+            preview_max_size (int, optional): Maximal width and height of the previews. If None is
+            supplied, Communicator.PREVIEW_MAX_SIZE will be used. Defaults to None.
+            payload (PayloadSource, optional): Source of the transmitted data. If None is supplied,
+            the image from path_to_image will be transmitted. Defaults to None.
+            resync_on_packet_drop (bool, optional): Resynchronize the CBC and CFB cipher contexts
+            on the chaining block sent with every packet, instead of updating them with zero's on
+            failed packets. Defaults to False.
+            key (bytes, optional): Key of all of the AES modes, the IV's are then derived from it.
+            If None is supplied, a new key will be generated. Defaults to None.
+            ciphertext_cache (CiphertextCache, optional): Cache shared between processes, which the
+            ciphertext of every AES mode is taken from if another process already encrypted the
+            payload with the same key. Defaults to None.
+            compression (str, optional): If set, the payload is compressed with this algorithm (one of
+            BlockCompressor.ALGORITHMS) before it is encrypted, in blocks aligned to the packets that are
+            decompressed independently, so a lost packet only zero fills its own block. Only buffered
+            payloads can be compressed. Defaults to None.
+            compression_block_size (int, optional): Size of the uncompressed blocks. If None is supplied,
+            a few packets worth of data is used, see BlockCompressor. Defaults to None.
+            trace_folder (str, optional): If set, the frames every AES mode's receiver gets and the ones
+            the channel drops are recorded to <trace_folder>/<aes mode>.trace, which TraceReplayer
+            replays. The key is then generated here if None is supplied, as it is part of the trace.
+            Defaults to None.
         """
 
         assert 0 <= message_fail_rate_percent <= 100
 
         self.message_fail_percent = int(message_fail_rate_percent * 1000)
         self.message_fail_count = 0
-        if path_to_image:
-            self.original_image = ImageHelper.load_image(path_to_image, True)
+        self.channel = channel or Channel([BernoulliLoss(message_fail_rate_percent / 100)], seed)
+        self.save_outputs = save_outputs
+        self.max_connection_resets = max_connection_resets
+
+        Summarizer.set_save_outputs(save_outputs)
+
+        self.payload = payload or ImageSource(path_to_image, tile_rows, save_outputs)
+        self.data_size = self.payload.get_size()
+        self.data_to_transfer = self.payload.get_buffer()
+        self.image_geometry = self.payload.get_image_geometry()
+
+        self.trace_folder = trace_folder
+        self.trace_recorder: TraceRecorder = None
+        self.update_cipher_on_packet_drop = update_cipher_on_packet_drop
+        self.resync_on_packet_drop = resync_on_packet_drop
+
+        if trace_folder is not None:
+            os.makedirs(trace_folder, exist_ok=True)
+            key = key or AES.generate_secure_key()
+
+        self.key = key
+
+        # Payloads that are only streamed are also received straight to disk
+        self.streamed = self.data_to_transfer is None
+
+        self.compressor: BlockCompressor = None
+        self.block_table: bytes = None
+        self.compression_s = 0.0
+        self.transfer_size = self.data_size
+
+        if compression:
+            if self.streamed:
+                raise ValueError("Only buffered payloads can be compressed")
+
+            self.compressor = BlockCompressor(compression, compression_block_size,
+                                              chunk_size or AES.AES_BYTE_LENGTH)
+
+            start = time.process_time()
+            self.data_to_transfer, self.block_table = self.compressor.compress(self.data_to_transfer)
+            self.compression_s = time.process_time() - start
+
+            self.transfer_size = len(self.data_to_transfer)
+
+        # Block table received along with the initialization message
+        self.received_block_table: bytes = None
+        self.decompressed_data: bytearray = None
+
+        if self.streamed:
+            self.tx_rx_pairs = \
+                init_aes_txrx_pairs(None, self.on_data_rx, update_cipher_on_packet_drop, chunk_size,
+                                    self.payload.iter_pieces, self.data_size, resync_on_packet_drop, key)
         else:
-            self.original_image = ImageHelper.get_default_image()
-        self.data_to_transfer = ImageHelper.image_to_bytes(self.original_image)
-        self.tx_rx_pairs = \
-            init_aes_txrx_pairs(self.data_to_transfer, self.on_data_rx, update_cipher_on_packet_drop)
+            self.tx_rx_pairs = \
+                init_aes_txrx_pairs(self.data_to_transfer, self.on_data_rx, update_cipher_on_packet_drop,
+                                    chunk_size, resync_on_packet_drop=resync_on_packet_drop, key=key,
+                                    ciphertext_cache=ciphertext_cache)
+
         self.finished = False
         self.current_aes_mode_idx = 0
+        self.next_progress_log = 0
+
+        self.preview_step_percent = preview_step_percent
+        self.preview_interval_s = preview_interval_s
+        self.preview_stride = 1
+
+        if self.image_geometry is not None:
+            preview_max_size = preview_max_size or self.PREVIEW_MAX_SIZE
+            self.preview_stride = -(-max(self.image_geometry[:2]) // preview_max_size)
+        self.preview_count = 0
+        self.next_preview_bytes = 0
+        self.next_preview_time = 0.0
 
         self.use_retransmition = use_retransmission
 
@@ -66,73 +204,316 @@ class Communicator:
             remaining_bytes_to_receive (int): How many bytes receiver still has left
         """
 
-        if len(all_received_data) % ((len(self.data_to_transfer) * 0.05)) == 0:
-            percent_left = len(all_received_data) / (len(all_received_data) + remaining_bytes_to_receive)
-            percent_left *= 100
-            print(f"[{len(all_received_data)}/{len(all_received_data) + remaining_bytes_to_receive}]",
-                  f"{percent_left:.1f}%")
+        bytes_total = self.transfer_size
+        bytes_received = bytes_total - remaining_bytes_to_receive
 
-        if remaining_bytes_to_receive == 0:
-            receiver = self.tx_rx_pairs[self.aes_modes_to_test[self.current_aes_mode_idx]].receiver
-            enc_image = receiver.received_data_encrypted
+        Metrics.on_progress(bytes_received, bytes_total)
+
+        if bytes_received >= self.next_progress_log:
+            self.next_progress_log = bytes_received + bytes_total * self.PROGRESS_LOG_STEP_PERCENT // 100
+            packet_logger.info("[%d/%d] %.1f%%", bytes_received, bytes_total,
+                               bytes_received / bytes_total * 100)
 
-            img_path_enc = f"{self.aes_modes_to_test[self.current_aes_mode_idx]}/encrypted.png"
-            img_path_dec = f"{self.aes_modes_to_test[self.current_aes_mode_idx]}/decrypted.png"
+        # Partially received compressed images can't be previewed
+        if self.save_outputs and self.image_geometry is not None and self.compressor is None and \
+           remaining_bytes_to_receive and self._is_preview_due(bytes_received):
+            self._save_preview()
 
-            ImageHelper.save_bytes_as_image(enc_image,
-                                            img_path_enc,
-                                            self.original_image.width,
-                                            self.original_image.height,
-                                            len(self.original_image.mode))
+        # A final chunk that is recovered by padding is reported twice
+        if remaining_bytes_to_receive == 0 and self.finished:
+            return
 
-            ImageHelper.save_bytes_as_image(all_received_data,
-                                            img_path_dec,
-                                            self.original_image.width,
-                                            self.original_image.height,
-                                            len(self.original_image.mode))
+        if remaining_bytes_to_receive == 0 and self.compressor is not None:
+            self._decompress_received_data()
 
+        if remaining_bytes_to_receive == 0 and self.save_outputs:
+            self._save_received_data()
+
+        if remaining_bytes_to_receive == 0:
+            self._measure_quality()
             self.finished = True
 
-    def test_aes_modes(self):
+    def test_aes_modes(self) -> dict[str, dict[str, int or float or bool]]:
         """Test AES modes with settings provided in the constructor
+
+        Returns:
+            dict[str, dict[str, int or float or bool]]: Metrics of every tested AES mode,
+            along with the measured message fail rate and if the transfer passed
         """
 
+        results = {}
+
         i = 0
         while i < len(self.aes_modes_to_test):
-            print("\n\nTesting AES mode:", self.aes_modes_to_test[i].upper(),
-                  ", bit width:", AES.AES_BIT_LENGTH)
+            logger.info("\n\nTesting AES mode: %s , bit width: %d",
+                        self.aes_modes_to_test[i].upper(), AES.AES_BIT_LENGTH)
 
             self.current_aes_mode_idx = i
 
             Summarizer.start(self.aes_modes_to_test[i])
+            self.preview_count = 0
+
+            if Profiler.enabled:
+                Profiler.start(self.aes_modes_to_test[i])
+
+            if self.streamed:
+                self._open_sinks(self.tx_rx_pairs[self.aes_modes_to_test[i]].receiver,
+                                 self.aes_modes_to_test[i])
+
             self.message_fail_count = 0
+            connection_resets = 0
+
+            if self.trace_folder is not None:
+                trace_path = os.path.join(self.trace_folder, f"{self.aes_modes_to_test[i]}.trace")
+                self.trace_recorder = TraceRecorder(trace_path, self.aes_modes_to_test[i], self.key,
+                                                    self.update_cipher_on_packet_drop,
+                                                    self.resync_on_packet_drop)
 
             while True:
                 self.finished = False
                 res = self._test_aes_mode(self.tx_rx_pairs[self.aes_modes_to_test[i]])
 
-                message_fail_rate = \
-                    self.message_fail_count / (len(self.data_to_transfer) // AES.AES_BYTE_LENGTH)
+                chunk_count = self.tx_rx_pairs[self.aes_modes_to_test[i]].transmitter.chunk_count
+                message_fail_rate = self.message_fail_count / chunk_count
 
                 message_fail_rate = round(message_fail_rate * 100, 4)
 
-                print("Test",
-                    "passed" if res else "failed",
-                    f"({self.aes_modes_to_test[i].upper()})",
-                    f"\nMessage fail rate: {message_fail_rate}%")
-
                 if res:
+                    logger.info("Test passed (%s) \nMessage fail rate: %s%%",
+                                self.aes_modes_to_test[i].upper(), message_fail_rate)
+                else:
+                    packet_logger.info("Test failed (%s) \nMessage fail rate: %s%%",
+                                       self.aes_modes_to_test[i].upper(), message_fail_rate)
+
+                gave_up = self.max_connection_resets is not None and \
+                          connection_resets >= self.max_connection_resets
+
+                if res or gave_up:
+                    if Profiler.enabled:
+                        Metrics.update({"peak_memory_bytes": Profiler.end()["peak_memory_bytes"]})
+
                     Summarizer.end(message_fail_rate)
+
+                    if self.compressor is not None:
+                        self._estimate_time_saved()
+
+                    results[self.aes_modes_to_test[i]] = Metrics.get_snapshot(self.aes_modes_to_test[i])
+                    results[self.aes_modes_to_test[i]]["passed"] = res
+                    results[self.aes_modes_to_test[i]]["message_fail_rate"] = message_fail_rate
+
+                    self._close_sinks(self.tx_rx_pairs[self.aes_modes_to_test[i]].receiver)
+
+                    if self.trace_recorder is not None:
+                        self.trace_recorder.close()
+                        self.trace_recorder = None
+
                     i += 1
                     break
                 else:
+                    connection_resets += 1
                     Summarizer.on_connection_reset()
+                    self._wait_round_trip()
+                    self.channel.reset()
                     self.tx_rx_pairs[self.aes_modes_to_test[i]].transmitter.reset()
                     self.tx_rx_pairs[self.aes_modes_to_test[i]].receiver.reset()
 
-        Visualizer.generate_comparative_plot(f"AES bit length: {AES.AES_BIT_LENGTH} bits\n"
-                                             f"Transmitted data size: {len(self.data_to_transfer)} bytes\n"
-                                             f"Set fail rate: {self.message_fail_percent / 1000}%")
+        if self.save_outputs:
+            Visualizer.generate_comparative_plot(f"AES bit length: {AES.AES_BIT_LENGTH} bits\n"
+                                                 f"Transmitted data size: {self.transfer_size} bytes\n"
+                                                 f"Set fail rate: {self.message_fail_percent / 1000}%")
+
+        return results
+
+    def _save_received_data(self):
+        """Save the received data of the current AES mode, both decrypted and encrypted.
+        Images are saved as images, other payloads as they are.
+        """
+
+        aes_mode = self.aes_modes_to_test[self.current_aes_mode_idx]
+        receiver = self.tx_rx_pairs[aes_mode].receiver
+
+        if self.streamed:
+            receiver.data_sink.flush()
+            receiver.encrypted_data_sink.flush()
+
+            if self.image_geometry is not None:
+                sinks = ((receiver.encrypted_data_sink, "encrypted"), (receiver.data_sink, "decrypted"))
+
+                for sink, name in sinks:
+                    ImageWriter.save_raw_file_as_image(sink.name, f"{aes_mode}/{name}.png",
+                                                       *self.image_geometry)
+
+            # Other payloads were already received into raw files in the output folder
+            return
+
+        if self.compressor is not None:
+            # The ciphertext of the compressed payload doesn't have the geometry of the image
+            ImageWriter.save_bytes(receiver.received_data_encrypted, f"{aes_mode}/encrypted.raw")
+            outputs = ((self.decompressed_data, "decrypted"),)
+        else:
+            outputs = ((receiver.received_data_encrypted, "encrypted"), (receiver.received_data, "decrypted"))
+
+        for data, name in outputs:
+            if self.image_geometry is not None:
+                ImageWriter.save_bytes_as_image(data, f"{aes_mode}/{name}.png", *self.image_geometry)
+            else:
+                ImageWriter.save_bytes(data, f"{aes_mode}/{name}.raw")
+
+    def _measure_quality(self):
+        """Compare the received data with the original one, and add the
+        results to the metrics of the current AES mode
+        """
+
+        aes_mode = self.aes_modes_to_test[self.current_aes_mode_idx]
+        receiver = self.tx_rx_pairs[aes_mode].receiver
+        heatmap = None
+
+        if self.streamed:
+            receiver.data_sink.flush()
+            received = np.memmap(receiver.data_sink, dtype=np.uint8, mode="r") if self.data_size else b""
+        elif self.decompressed_data is not None:
+            received = self.decompressed_data
+        else:
+            received = receiver.data_buffer
+
+        if self.image_geometry is not None:
+            quality, heatmap = QualityMetrics.compare(self.payload.iter_image_bands(QualityMetrics.BAND_ROWS),
+                                                      received, *self.image_geometry)
+        else:
+            quality = QualityMetrics.compare_bytes(self.payload.iter_pieces(), received, self.data_size)
+
+        Metrics.update(quality)
+
+        logger.info("Bytes corrupted: %d, block loss rate: %.4f%%, PSNR: %s dB, SSIM: %s",
+                    quality["bytes_corrupted"], quality["block_loss_rate"] * 100,
+                    "inf" if quality["psnr_db"] is None else f"{quality['psnr_db']:.2f}",
+                    "n/a" if quality.get("ssim") is None else f"{quality['ssim']:.4f}")
+
+        if self.save_outputs and heatmap is not None:
+            Visualizer.generate_heatmap(heatmap,
+                                        os.path.join(Summarizer.SAVE_FOLDER, aes_mode, "damage_heatmap.png"),
+                                        f"Damaged pixels ({aes_mode.upper()})", "Damaged pixel ratio")
+
+    def _decompress_received_data(self):
+        """Decompress the data received by the current AES mode, zero filling the damaged
+        blocks, and add the compression results to its metrics
+        """
+
+        aes_mode = self.aes_modes_to_test[self.current_aes_mode_idx]
+        receiver = self.tx_rx_pairs[aes_mode].receiver
+
+        start = time.process_time()
+        self.decompressed_data, blocks_damaged = \
+            self.compressor.decompress(receiver.received_data, self.received_block_table)
+        decompression_s = time.process_time() - start
+
+        Metrics.update({
+            "compression_ratio": self.data_size / self.transfer_size if self.transfer_size else 1.0,
+            "compression_s": self.compression_s,
+            "decompression_s": decompression_s,
+            "blocks_total": len(BlockCompressor.get_blocks(self.received_block_table)),
+            "blocks_damaged": blocks_damaged,
+        })
+
+        logger.info("Compression ratio: %.3f, damaged blocks: %d",
+                    self.data_size / max(self.transfer_size, 1), blocks_damaged)
+
+    def _estimate_time_saved(self):
+        """Estimate how much time the compression saved the current AES mode, net of the compression
+        and decompression time. The uncompressed transfer isn't measured: its time is the elapsed time
+        scaled by the compression ratio, assuming that the transfer time is proportional to the
+        transmitted size, as it is on a link of limited bandwidth with the simulation clock enabled.
+        """
+
+        metrics = Metrics.get_snapshot(self.aes_modes_to_test[self.current_aes_mode_idx])
+        uncompressed_s = metrics["elapsed_s"] * metrics.get("compression_ratio", 1.0)
+
+        Metrics.update({
+            "estimated_uncompressed_elapsed_s": uncompressed_s,
+            "estimated_time_saved_s": uncompressed_s - metrics["elapsed_s"]
+                                - metrics.get("compression_s", 0.0) - metrics.get("decompression_s", 0.0),
+        })
+        Metrics.write()
+
+    def _is_preview_due(self, bytes_received: int) -> bool:
+        """Check if a preview of the partially received image should be saved,
+        and schedule the next one if so
+
+        Args:
+            bytes_received (int): How many bytes the receiver has received so far
+
+        Returns:
+            bool: True if a preview should be saved
+        """
+
+        due = False
+
+        if self.preview_step_percent and bytes_received >= self.next_preview_bytes:
+            self.next_preview_bytes = bytes_received + self.data_size * self.preview_step_percent / 100
+            due = True
+
+        if self.preview_interval_s and Summarizer.get_current_time() >= self.next_preview_time:
+            self.next_preview_time = Summarizer.get_current_time() + self.preview_interval_s
+            due = True
+
+        return due
+
+    def _save_preview(self):
+        """Save a downscaled preview of the partially received image
+        """
+
+        aes_mode = self.aes_modes_to_test[self.current_aes_mode_idx]
+        receiver = self.tx_rx_pairs[aes_mode].receiver
+
+        if self.streamed:
+            receiver.data_sink.flush()
+            data = np.memmap(receiver.data_sink, dtype=np.uint8, mode="r") \
+                if receiver.received_size else b""
+        else:
+            data = receiver.data_buffer
+
+        preview = ImageHelper.get_preview(data, *self.image_geometry, self.preview_stride)
+
+        ImageWriter.save_bytes_as_image(preview.reshape(-1),
+                                        f"{aes_mode}/previews/{self.preview_count:04d}.png",
+                                        preview.shape[1], preview.shape[0], preview.shape[2])
+
+        self.preview_count += 1
+
+    def _open_sinks(self, receiver: Receiver, aes_mode: str):
+        """Make the receiver write the received data to disk. If the outputs are saved,
+        the data is written to raw files in the AES mode output folder, otherwise to
+        temporary files.
+
+        Args:
+            receiver (Receiver): Receiver of the AES mode
+            aes_mode (str): Name of the AES mode
+        """
+
+        if self.save_outputs:
+            folder = os.path.join(Summarizer.SAVE_FOLDER, aes_mode)
+            os.makedirs(folder, exist_ok=True)
+
+            # pylint: disable=consider-using-with
+            receiver.data_sink = open(os.path.join(folder, "decrypted.raw"), "w+b")
+            receiver.encrypted_data_sink = open(os.path.join(folder, "encrypted.raw"), "w+b")
+        else:
+            receiver.data_sink = tempfile.TemporaryFile()
+            receiver.encrypted_data_sink = tempfile.TemporaryFile()
+
+    def _close_sinks(self, receiver: Receiver):
+        """Close the files the receiver wrote the received data to
+
+        Args:
+            receiver (Receiver): Receiver of the AES mode
+        """
+
+        for sink in (receiver.data_sink, receiver.encrypted_data_sink):
+            if sink is not None:
+                sink.close()
+
+        receiver.data_sink = None
+        receiver.encrypted_data_sink = None
 
     def _test_aes_mode(self, txrx_pair: TxRxPair) -> bool:
         """Test a specific AES mode
@@ -147,33 +528,99 @@ class Communicator:
         init_msg = txrx_pair.transmitter.gen_init_message()
         txrx_pair.receiver.on_init_msg(init_msg)
 
+        if self.compressor is not None:
+            init_msg["block_table"] = self.block_table
+            self.received_block_table = init_msg["block_table"]
+
+        if self.trace_recorder is not None:
+            self.trace_recorder.on_init(init_msg)
+
+        SimulationClock.advance(self.channel.get_transmission_time_s(init_msg))
+        self._wait_round_trip()
+
+        self.next_progress_log = 0
+        self.next_preview_bytes = 0
+        self.next_preview_time = 0.0
+        last_delay_s = 0.0
+
         while not self.finished:
-            try:
-                msg = txrx_pair.transmitter.gen_tx_message()
+            msg = txrx_pair.transmitter.gen_tx_message()
+            deliveries = self.channel.transmit(msg)
 
-                if random.randint(0, 100_000) < self.message_fail_percent:
-                    print("Dropping chunk", msg["chunk"])
-                    Summarizer.on_dropped_packet()
-                    continue
+            SimulationClock.advance(self.channel.get_transmission_time_s(msg))
 
-                txrx_pair.receiver.on_data_rx(msg, not self.use_retransmition)
-                Summarizer.on_packet_transmit()
+            if self.channel.last_dropped:
+                packet_logger.info("Dropping chunk %d", msg["chunk"])
+                Summarizer.on_dropped_packet()
 
-            except Receiver.RxFailureException as e:
-                self.message_fail_count += 1
+                if self.trace_recorder is not None:
+                    self.trace_recorder.on_drop(msg)
 
-                if e.error_protocol == Receiver.RxFailureException.ErrorProtocol.REINIT:
-                    print("Data failure requiring re-initialization")
+            for delivery in deliveries:
+                last_delay_s = delivery.delay_s
+
+                if not self._deliver(txrx_pair, delivery):
                     return False
 
-                if self.use_retransmition:
-                    print("Re-requesting chunk", e.chunk)
+                if self.finished:
+                    break
+
+        # The transfer ends when the last packet arrives at the receiver
+        SimulationClock.advance(last_delay_s)
+
+        return True
+
+    def _wait_round_trip(self):
+        """Account for a round trip on the link, such as a handshake or a
+        retransmission request.
+        """
+
+        round_trip_time_s = self.channel.get_round_trip_time_s()
+
+        Metrics.add("link_delay_s", round_trip_time_s)
+        SimulationClock.advance(round_trip_time_s)
+
+    def _deliver(self, txrx_pair: TxRxPair, delivery: Delivery) -> bool:
+        """Deliver a message that passed through the channel to the receiver
 
-                    Summarizer.on_packet_retransmit()
+        Args:
+            txrx_pair (TxRxPair): TxRxPair with a specific AES instance
+            delivery (Delivery): Delivered message
+
+        Returns:
+            bool: If False, the receiver requires a re-initialization.
+        """
+
+        Metrics.add("link_delay_s", delivery.delay_s)
+
+        if self.trace_recorder is not None:
+            self.trace_recorder.on_deliver(delivery.msg, not self.use_retransmition)
+
+        try:
+            txrx_pair.receiver.on_data_rx(delivery.msg, not self.use_retransmition)
+            Summarizer.on_packet_transmit()
+
+        except Receiver.RxFailureException as e:
+            self.message_fail_count += 1
+
+            if e.error_protocol == Receiver.RxFailureException.ErrorProtocol.REINIT:
+                packet_logger.info("Data failure requiring re-initialization")
+                return False
+
+            if self.use_retransmition:
+                packet_logger.info("Re-requesting chunk %d", e.chunk)
+
+                Summarizer.on_packet_retransmit()
+                self._wait_round_trip()
+
+                txrx_pair.transmitter.set_chunk(e.chunk - 1)
+
+                msg = txrx_pair.transmitter.gen_tx_message()
+                SimulationClock.advance(self.channel.get_transmission_time_s(msg))
 
-                    txrx_pair.transmitter.set_chunk(e.chunk - 1)
+                if self.trace_recorder is not None:
+                    self.trace_recorder.on_deliver(msg, False)
 
-                    msg = txrx_pair.transmitter.gen_tx_message()
-                    txrx_pair.receiver.on_data_rx(msg)
+                txrx_pair.receiver.on_data_rx(msg)
 
         return True
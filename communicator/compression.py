@@ -0,0 +1,158 @@
+"""Loss tolerant compression module. Used to compress the payload before it is
+encrypted, in blocks that can be decompressed independently of each other.
+"""
+
+import lzma
+import zlib
+import struct
+from typing import NamedTuple
+
+
+class CompressedBlock(NamedTuple):
+    """Location and checksum of a compressed block
+    """
+
+    offset: int
+    length: int
+    raw_length: int
+    crc: int
+
+
+class BlockCompressor:
+    """Block compressor class. The payload is split into blocks, each of which is compressed so that
+    it can be decompressed on its own, and padded to a whole number of packets. A lost or damaged
+    packet then only damages the block it belongs to, instead of the rest of the stream.
+    The block table is small and is sent reliably, along with the initialization message.
+    """
+
+    ALGORITHMS = ("zlib", "lzma")
+
+    # By default a block holds this many packets of uncompressed data, so that it compresses into
+    # a few packets and a lost packet only damages a small part of the payload
+    BLOCK_PACKETS = 16
+    MIN_BLOCK_SIZE = 512
+
+    ZLIB_LEVEL = 6
+    LZMA_FILTERS = [{"id": lzma.FILTER_LZMA2, "preset": 6}]
+
+    # Offset, compressed length, raw length and CRC32 of the raw data of every block
+    TABLE_ENTRY = struct.Struct(">QIII")
+
+    def __init__(self, algorithm="zlib", block_size: int = None, alignment=1):
+        """
+        Args:
+            algorithm (str, optional): One of BlockCompressor.ALGORITHMS. zlib is compressed as a single
+            raw deflate stream with a full flush after every block, lzma compresses every block as its
+            own raw LZMA2 stream. Defaults to "zlib".
+            block_size (int, optional): Size of the uncompressed blocks. If None is supplied,
+            BlockCompressor.BLOCK_PACKETS times the alignment will be used, but at least
+            BlockCompressor.MIN_BLOCK_SIZE. Defaults to None.
+            alignment (int, optional): Every compressed block is padded to a multiple of this size,
+            which should be the packet size. Defaults to 1.
+        """
+
+        if algorithm not in self.ALGORITHMS:
+            raise ValueError(f"Unknown compression algorithm {algorithm}")
+
+        self.algorithm = algorithm
+        self.block_size = block_size or max(self.BLOCK_PACKETS * alignment, self.MIN_BLOCK_SIZE)
+        self.alignment = alignment
+
+        assert self.block_size > 0 and self.alignment > 0
+
+    def compress(self, data: bytes) -> tuple[bytes, bytes]:
+        """Compress the data
+
+        Args:
+            data (bytes): Data, any bytes-like object
+
+        Returns:
+            tuple[bytes, bytes]: The compressed data and the serialized block table
+        """
+
+        data = memoryview(data)
+        compressor = zlib.compressobj(self.ZLIB_LEVEL, zlib.DEFLATED, -zlib.MAX_WBITS)
+
+        parts = []
+        table = bytearray()
+        offset = 0
+
+        for i in range(0, len(data), self.block_size):
+            block = data[i:i + self.block_size]
+
+            if self.algorithm == "zlib":
+                # A full flush resets the dictionary, so decompression can start at the block
+                compressed = compressor.compress(block) + compressor.flush(zlib.Z_FULL_FLUSH)
+            else:
+                compressed = lzma.compress(block, format=lzma.FORMAT_RAW, filters=self.LZMA_FILTERS)
+
+            padding = -len(compressed) % self.alignment
+
+            parts += (compressed, bytes(padding))
+            table += self.TABLE_ENTRY.pack(offset, len(compressed), len(block), zlib.crc32(block))
+            offset += len(compressed) + padding
+
+        return b"".join(parts), bytes(table)
+
+    def decompress(self, data: bytes, table: bytes) -> tuple[bytearray, int]:
+        """Decompress the data block by block. Blocks that fail to decompress
+        or whose checksum doesn't match are replaced with zero's.
+
+        Args:
+            data (bytes): Compressed data, possibly damaged
+            table (bytes): Serialized block table
+
+        Returns:
+            tuple[bytearray, int]: The decompressed data and the number of damaged blocks
+        """
+
+        blocks = self.get_blocks(table)
+        data = memoryview(data)
+
+        out = bytearray(sum(block.raw_length for block in blocks))
+        out_offset = 0
+        damaged = 0
+
+        for block in blocks:
+            raw = self._decompress_block(data[block.offset:block.offset + block.length])
+
+            if raw is not None and len(raw) == block.raw_length and zlib.crc32(raw) == block.crc:
+                out[out_offset:out_offset + block.raw_length] = raw
+            else:
+                # Already zero filled
+                damaged += 1
+
+            out_offset += block.raw_length
+
+        return out, damaged
+
+    @classmethod
+    def get_blocks(cls, table: bytes) -> list[CompressedBlock]:
+        """Deserialize a block table
+
+        Args:
+            table (bytes): Serialized block table
+
+        Returns:
+            list[CompressedBlock]: Blocks, in the order of the data
+        """
+
+        return [CompressedBlock(*entry) for entry in cls.TABLE_ENTRY.iter_unpack(table)]
+
+    def _decompress_block(self, compressed: bytes) -> bytes or None:
+        """Decompress a single block
+
+        Args:
+            compressed (bytes): Compressed block, without its padding
+
+        Returns:
+            bytes or None: Raw block, or None if the compressed data is invalid
+        """
+
+        try:
+            if self.algorithm == "zlib":
+                return zlib.decompressobj(-zlib.MAX_WBITS).decompress(compressed)
+
+            return lzma.decompress(compressed, format=lzma.FORMAT_RAW, filters=self.LZMA_FILTERS)
+        except (zlib.error, lzma.LZMAError):
+            return None
@@ -0,0 +1,450 @@
+"""Multiplexing module. Used to interleave the frames of many concurrent sessions
+over a single volatile link, with a deficit round robin link scheduler.
+"""
+
+import statistics
+from .comm_protocol import Transmitter, Receiver, TxRxPair
+from .channel import Channel, Delivery
+
+
+class LinkSession:
+    """A single transfer sharing the link. The session identifier is added to the header of every
+    frame its transmitter generates, so the demultiplexer can route the frames to its receiver.
+    """
+
+    def __init__(self, session_id: int, tx_rx_pair: TxRxPair, weight=1.0, start_s=0.0):
+        """
+        Args:
+            session_id (int): Identifier of the session, unique on the link
+            tx_rx_pair (TxRxPair): Transmitter and receiver pair, used only by this session
+            weight (float, optional): Share of the link the session gets when it is backlogged,
+            relative to the other sessions. Defaults to 1.0.
+            start_s (float, optional): Link time at which the session starts. Defaults to 0.0.
+        """
+
+        assert weight > 0
+
+        self.session_id = session_id
+        self.transmitter: Transmitter = tx_rx_pair.transmitter
+        self.receiver: Receiver = tx_rx_pair.receiver
+        self.weight = weight
+        self.start_s = start_s
+
+        self.transmitter.session_id = session_id
+
+        # Scheduler state. The session may not transmit before ready_s,
+        # such as while it waits for a NACK round trip.
+        self.deficit = 0.0
+        self.ready_s = start_s
+        self.finished = False
+        self.head: dict[str, int or bytes] = None
+
+        # Link time at which the frames of every chunk were queued
+        self.queued_s: dict[int, float] = {}
+        self.latencies_s: list[float] = []
+
+        self.stats: dict[str, int or float] = {}
+
+    def start(self):
+        """Initialize the receiver of the session. The initialization message
+        is exchanged over the reliable control path.
+        """
+
+        self.receiver.reset()
+        self.receiver.on_init_msg(self.transmitter.gen_init_message())
+
+        self.deficit = 0.0
+        self.ready_s = self.start_s
+        self.finished = False
+        self.head = None
+        self.queued_s = {}
+        self.latencies_s = []
+
+        self.stats = {
+            "session": self.session_id,
+            "weight": self.weight,
+            "bytes": self.transmitter.data_size,
+            "frames_transmitted": 0,
+            "frames_dropped": 0,
+            "retransmissions": 0,
+            "connection_resets": 0,
+        }
+
+    @property
+    def completed(self) -> bool:
+        """If all of the chunks were received
+        """
+
+        return self.receiver.current_chunk >= self.receiver.chunks_to_receive
+
+    @property
+    def exhausted(self) -> bool:
+        """If the transmitter has generated the frames of all of the chunks
+        """
+
+        return self.transmitter.data_idx >= self.transmitter.data_size_padded
+
+    def peek(self, now_s: float) -> dict[str, int or bytes]:
+        """Get the frame the session transmits next, without removing it from the queue
+
+        Args:
+            now_s (float): Current link time
+
+        Returns:
+            dict[str, int or bytes]: TX message
+        """
+
+        if self.head is None:
+            self.head = self.transmitter.gen_tx_message()
+            self.queued_s.setdefault(self.head["chunk"], now_s)
+
+        return self.head
+
+    def pop(self) -> dict[str, int or bytes]:
+        """Remove the next frame from the queue
+
+        Returns:
+            dict[str, int or bytes]: TX message
+        """
+
+        msg, self.head = self.head, None
+
+        return msg
+
+    def go_back(self, chunk: int, ready_s: float):
+        """Transmit the chunks again, starting from a chunk
+
+        Args:
+            chunk (int): First chunk to transmit again, starting from 1 as in the messages
+            ready_s (float): Link time at which the session learns about the missing chunk
+        """
+
+        self.transmitter.set_chunk(chunk - 1)
+        self.head = None
+        self.ready_s = max(self.ready_s, ready_s)
+        self.stats["retransmissions"] += 1
+
+    def restart(self, ready_s: float):
+        """Re-initialize the session, transmitting all of the chunks again
+
+        Args:
+            ready_s (float): Link time at which the session learns about the failure
+        """
+
+        self.receiver.reset()
+        self.receiver.on_init_msg(self.transmitter.gen_init_message())
+        self.head = None
+        self.queued_s = {}
+        self.ready_s = max(self.ready_s, ready_s)
+        self.stats["connection_resets"] += 1
+
+    def on_delivered(self, msg: dict[str, int or bytes], arrival_s: float):
+        """Record the latency of a frame that reached the receiver
+
+        Args:
+            msg (dict[str, int or bytes]): TX message
+            arrival_s (float): Link time at which the frame arrived
+        """
+
+        queued_s = self.queued_s.pop(msg["chunk"], None)
+
+        if queued_s is not None:
+            self.latencies_s.append(arrival_s - queued_s)
+
+    def finish(self, now_s: float, passed: bool):
+        """Finish the session and complete its statistics
+
+        Args:
+            now_s (float): Link time at which the session finished
+            passed (bool): If all of the data reached the receiver
+        """
+
+        self.finished = True
+        self.head = None
+
+        duration_s = now_s - self.start_s
+
+        self.stats.update({
+            "passed": passed,
+            "completion_s": duration_s,
+            "throughput_bps": self.stats["bytes"] * 8 / duration_s if duration_s > 0 else float("inf"),
+            "mean_latency_s": statistics.fmean(self.latencies_s) if self.latencies_s else 0.0,
+            "max_latency_s": max(self.latencies_s, default=0.0),
+        })
+
+
+class DeficitRoundRobin:
+    """Deficit round robin link scheduler. The sessions are visited in turn, and on every visit
+    a session earns a quantum of bytes proportional to its weight, which it spends on frames.
+    The unspent part is carried over to the next visit, so every backlogged session gets its
+    share of the link in bytes regardless of the sizes of its frames.
+    """
+
+    # Bytes a session of weight 1 earns on every visit. Frames larger than the
+    # quantum are transmitted after the session saved up for them over several visits.
+    QUANTUM_BYTES = 1500
+
+    def __init__(self, sessions: list[LinkSession], quantum_bytes: int = None):
+        """
+        Args:
+            sessions (list[LinkSession]): Sessions sharing the link
+            quantum_bytes (int, optional): Bytes a session of weight 1 earns on every visit.
+            If None is supplied, DeficitRoundRobin.QUANTUM_BYTES will be used. Defaults to None.
+        """
+
+        self.sessions = sessions
+        self.quantum_bytes = quantum_bytes or self.QUANTUM_BYTES
+
+        self.current = 0
+        self.quantum_added = False
+
+    def next_frame(self, now_s: float) -> tuple[LinkSession, dict[str, int or bytes]] or None:
+        """Select the next frame to transmit
+
+        Args:
+            now_s (float): Current link time
+
+        Returns:
+            tuple[LinkSession, dict[str, int or bytes]] or None: The session and its frame,
+            or None if no session is ready to transmit
+        """
+
+        if not any(self._is_ready(session, now_s) for session in self.sessions):
+            return None
+
+        while True:
+            session = self.sessions[self.current]
+
+            if not self._is_ready(session, now_s):
+                # Idle sessions don't accumulate credit
+                session.deficit = 0.0
+                self._advance()
+                continue
+
+            if not self.quantum_added:
+                session.deficit += self.quantum_bytes * session.weight
+                self.quantum_added = True
+
+            msg = session.peek(now_s)
+            size = Channel.get_frame_size(msg)
+
+            if size <= session.deficit:
+                session.deficit -= size
+                return session, session.pop()
+
+            self._advance()
+
+    def _advance(self):
+        """Move on to the next session
+        """
+
+        self.current = (self.current + 1) % len(self.sessions)
+        self.quantum_added = False
+
+    @staticmethod
+    def _is_ready(session: LinkSession, now_s: float) -> bool:
+        """Check whether a session has a frame to transmit
+
+        Args:
+            session (LinkSession): Session
+            now_s (float): Current link time
+
+        Returns:
+            bool: True if the session is backlogged
+        """
+
+        return not session.finished and session.ready_s <= now_s
+
+
+class Demultiplexer:
+    """Routes the frames arriving from the link to the receivers of their sessions
+    """
+
+    def __init__(self, receivers: dict[int, Receiver] = None):
+        """
+        Args:
+            receivers (dict[int, Receiver], optional): Receivers keyed by their session identifier.
+            Defaults to None.
+        """
+
+        self.receivers = receivers or {}
+        self.unknown_frames = 0
+
+    def add_receiver(self, session_id: int, receiver: Receiver):
+        """Route the frames of a session to a receiver
+
+        Args:
+            session_id (int): Identifier of the session
+            receiver (Receiver): Receiver instance
+        """
+
+        self.receivers[session_id] = receiver
+
+    def on_frame(self, msg: dict[str, int or bytes], pad_on_failure=False):
+        """Process a frame arriving from the link. Frames of unknown sessions are counted and dropped.
+
+        Args:
+            msg (dict[str, int or bytes]): TX message, with a session identifier
+            pad_on_failure (bool, optional): Passed to the receiver. Defaults to False.
+
+        Raises:
+            Receiver.RxFailureException: Raised by the receiver of the session
+        """
+
+        receiver = self.receivers.get(msg.get("session"))
+
+        if receiver is None:
+            self.unknown_frames += 1
+            return
+
+        receiver.on_data_rx(msg, pad_on_failure)
+
+
+class MultiplexedLink:
+    """Many concurrent sessions over one volatile link. The link scheduler decides which
+    session transmits next, the frames pass through the shared channel, and the demultiplexer
+    routes them to their receivers. Time is simulated: every frame occupies the link for its
+    transmission time, and a session that lost a frame waits for a NACK round trip before
+    transmitting again, while the other sessions keep using the link.
+    """
+
+    # Used to compute the transmission times if the channel has no bandwidth set
+    BANDWIDTH_BPS = 10e6
+
+    MAX_CONNECTION_RESETS = 100
+
+    def __init__(self, channel: Channel, sessions: list[LinkSession], use_retransmission=True,
+                 quantum_bytes: int = None, max_connection_resets: int = None):
+        """
+        Args:
+            channel (Channel): Channel shared by all of the sessions
+            sessions (list[LinkSession]): Sessions, with unique session identifiers
+            use_retransmission (bool, optional): Transmit the missing chunks again. Otherwise
+            the receivers pad them with zero's. Defaults to True.
+            quantum_bytes (int, optional): Scheduler quantum, see DeficitRoundRobin. Defaults to None.
+            max_connection_resets (int, optional): Connection resets after which a session is given up on.
+            If None is supplied, MultiplexedLink.MAX_CONNECTION_RESETS will be used. Defaults to None.
+        """
+
+        assert len({session.session_id for session in sessions}) == len(sessions)
+
+        self.channel = channel
+        self.sessions = {session.session_id: session for session in sessions}
+        self.use_retransmission = use_retransmission
+        self.max_connection_resets = max_connection_resets or self.MAX_CONNECTION_RESETS
+
+        self.scheduler = DeficitRoundRobin(sessions, quantum_bytes)
+        self.demultiplexer = Demultiplexer({session.session_id: session.receiver for session in sessions})
+
+        self.time_s = 0.0
+        self.busy_s = 0.0
+        self.stats: dict[str, int or float or list] = {}
+
+    def run(self) -> dict[str, int or float or list]:
+        """Transmit the data of all of the sessions
+
+        Returns:
+            dict[str, int or float or list]: Statistics of the link, with the statistics of every
+            session under "sessions". The fairness is Jain's index of the throughputs of the
+            sessions divided by their weights, 1 meaning every session got its exact share.
+        """
+
+        self.time_s = 0.0
+        self.busy_s = 0.0
+
+        for session in self.sessions.values():
+            session.start()
+
+        while not all(session.finished for session in self.sessions.values()):
+            selected = self.scheduler.next_frame(self.time_s)
+
+            if selected is None:
+                # Every remaining session waits, so the link idles until the first one is ready
+                self.time_s = min(session.ready_s for session in self.sessions.values()
+                                  if not session.finished)
+                continue
+
+            self._transmit(*selected)
+
+        sessions = [session.stats for session in self.sessions.values()]
+        shares = [stats["throughput_bps"] / stats["weight"] for stats in sessions if stats["passed"]]
+        fairness = sum(shares) ** 2 / (len(shares) * sum(share ** 2 for share in shares)) if shares else 0.0
+
+        self.stats = {
+            "sessions": sessions,
+            "elapsed_s": self.time_s,
+            "utilization": self.busy_s / self.time_s if self.time_s else 0.0,
+            "fairness": fairness,
+            "unknown_frames": self.demultiplexer.unknown_frames,
+        }
+
+        return self.stats
+
+    def _transmit(self, session: LinkSession, msg: dict[str, int or bytes]):
+        """Put a frame on the link and deliver whatever the channel lets through
+
+        Args:
+            session (LinkSession): Session the frame belongs to
+            msg (dict[str, int or bytes]): TX message
+        """
+
+        transmission_time_s = (self.channel.get_transmission_time_s(msg)
+                               or Channel.get_frame_size(msg) * 8 / self.BANDWIDTH_BPS)
+
+        self.time_s += transmission_time_s
+        self.busy_s += transmission_time_s
+
+        session.stats["frames_transmitted"] += 1
+
+        deliveries = self.channel.transmit(msg)
+
+        if self.channel.last_dropped:
+            session.stats["frames_dropped"] += 1
+
+        # Frames held back by the channel may belong to other sessions
+        for delivery in deliveries:
+            self._deliver(delivery)
+
+        if not session.finished and not self.use_retransmission and session.exhausted:
+            # The last chunks may have been lost as well
+            session.receiver.pad_to_end()
+            session.finish(self.time_s, True)
+
+    def _deliver(self, delivery: Delivery):
+        """Deliver a frame that passed through the channel and handle the receiver's NACK
+
+        Args:
+            delivery (Delivery): Frame and its one way delay
+        """
+
+        session = self.sessions.get(delivery.msg.get("session"))
+        arrival_s = self.time_s + delivery.delay_s
+
+        if session is not None and session.finished:
+            return
+
+        try:
+            self.demultiplexer.on_frame(delivery.msg, not self.use_retransmission)
+        except Receiver.RxFailureException as e:
+            # The NACK reaches the transmitter after the frame's delay on the way back
+            ready_s = arrival_s + delivery.delay_s
+
+            if e.error_protocol == Receiver.RxFailureException.ErrorProtocol.REINIT:
+                if session.stats["connection_resets"] >= self.max_connection_resets:
+                    session.finish(arrival_s, False)
+                else:
+                    # Frames of the previous connection would be decrypted with the new key
+                    self.channel.discard(lambda msg: msg.get("session") == session.session_id)
+                    session.restart(ready_s)
+            elif self.use_retransmission:
+                session.go_back(e.chunk, ready_s)
+
+            return
+
+        if session is None:
+            return
+
+        session.on_delivered(delivery.msg, arrival_s)
+
+        if session.completed:
+            session.finish(arrival_s, True)
@@ -0,0 +1,305 @@
+"""Payload source module. Used to supply the data the Communicator transmits,
+which can be an image, a file, the standard input or generated data.
+"""
+
+import os
+import sys
+import mmap
+import secrets
+from abc import ABC, abstractmethod
+from typing import BinaryIO, Iterator
+import numpy as np
+from image_helper import ImageHelper
+from .shared_cache import SharedSegment
+
+
+class PayloadSource(ABC):
+    """Payload source base class. A source either holds the whole payload in a buffer,
+    or only streams it in pieces, in which case the payload can be arbitrarily large.
+    """
+
+    # Size of the pieces buffered payloads are streamed in
+    PIECE_SIZE = 1 << 20
+
+    @abstractmethod
+    def get_size(self) -> int:
+        """Get the size of the payload
+
+        Returns:
+            int: Payload size in bytes
+        """
+
+    def get_buffer(self) -> memoryview or None:
+        """Get the whole payload
+
+        Returns:
+            memoryview or None: The payload, or None if it can only be streamed
+        """
+
+        return None
+
+    def iter_pieces(self) -> Iterator[bytes]:
+        """Stream the payload from the beginning. Can be called multiple times.
+
+        Yields:
+            Iterator[bytes]: Consecutive pieces of the payload
+        """
+
+        buffer = self.get_buffer()
+
+        for i in range(0, len(buffer), self.PIECE_SIZE):
+            yield buffer[i:i + self.PIECE_SIZE]
+
+    def get_image_geometry(self) -> tuple[int, int, int] or None:
+        """Get the geometry of the payload, if it is a serialized image
+
+        Returns:
+            tuple[int, int, int] or None: Width, height and number of channels
+            of the image, or None if the payload isn't an image
+        """
+
+        return None
+
+    def iter_image_bands(self, band_rows: int) -> Iterator[bytes]:
+        """Stream the serialized image from the top, in bands of rows.
+        Only used if the payload is an image.
+
+        Args:
+            band_rows (int): Number of rows in each band
+
+        Yields:
+            Iterator[bytes]: Serialized bands
+        """
+
+        width, _, channels = self.get_image_geometry()
+        buffer = self.get_buffer()
+        band_size = band_rows * width * channels
+
+        for i in range(0, len(buffer), band_size):
+            yield buffer[i:i + band_size]
+
+    def close(self):
+        """Release the resources held by the source
+        """
+
+
+class ImageSource(PayloadSource):
+    """Serialized image payload. The image is either decoded up front, so that the
+    decoding time isn't part of the transfer, or streamed in bands of rows.
+    """
+
+    def __init__(self, path="", tile_rows: int = None, copy_to_output_folder=False):
+        """
+        Args:
+            path (str, optional): Path to the image. If left empty, the default one provided by
+            the ImageHelper module will be used. Defaults to "".
+            tile_rows (int, optional): If set, the image is streamed in bands of this many rows
+            instead of being decoded up front. Defaults to None.
+            copy_to_output_folder (bool, optional): Copy the image to the output folder.
+            Only used if the image is decoded up front. Defaults to False.
+        """
+
+        self.path = path or ImageHelper.EXAMPLE_IMAGE_PATH
+        self.tile_rows = tile_rows
+        self.buffer: memoryview = None
+
+        if tile_rows:
+            self.geometry = ImageHelper.get_image_geometry(self.path)
+        else:
+            image = ImageHelper.load_image(self.path, copy_to_output_folder)
+            self.geometry = (image.width, image.height, len(image.mode))
+            self.buffer = ImageHelper.image_to_buffer(image)
+
+    def get_size(self) -> int:
+        width, height, channels = self.geometry
+
+        return width * height * channels
+
+    def get_buffer(self) -> memoryview or None:
+        return self.buffer
+
+    def iter_pieces(self) -> Iterator[bytes]:
+        if self.buffer is not None:
+            return super().iter_pieces()
+
+        return ImageHelper.iter_image_bands(self.path, self.tile_rows)
+
+    def iter_image_bands(self, band_rows: int) -> Iterator[bytes]:
+        if self.buffer is not None:
+            return super().iter_image_bands(band_rows)
+
+        return ImageHelper.iter_image_bands(self.path, band_rows)
+
+    def get_image_geometry(self) -> tuple[int, int, int] or None:
+        return self.geometry
+
+
+class FileSource(PayloadSource):
+    """File payload. The file is memory mapped, so it is only read
+    as it is being transmitted.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path (str): Path to the file
+        """
+
+        self.path = path
+        self.mmap: mmap.mmap = None
+
+        # Empty files can't be memory mapped
+        if os.path.getsize(path):
+            with open(path, "rb") as F:
+                self.mmap = mmap.mmap(F.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def get_size(self) -> int:
+        return len(self.mmap) if self.mmap is not None else 0
+
+    def get_buffer(self) -> memoryview or None:
+        return memoryview(self.mmap) if self.mmap is not None else memoryview(b"")
+
+    def close(self):
+        if self.mmap is not None:
+            self.mmap.close()
+            self.mmap = None
+
+
+class StdinSource(PayloadSource):
+    """Standard input payload. As the payload may have to be transmitted again
+    after a connection reset, the whole input is read up front.
+    """
+
+    def __init__(self, stream: BinaryIO = None):
+        """
+        Args:
+            stream (BinaryIO, optional): Stream to read from. If None is supplied,
+            the standard input will be used. Defaults to None.
+        """
+
+        self.data = (stream or sys.stdin.buffer).read()
+
+    def get_size(self) -> int:
+        return len(self.data)
+
+    def get_buffer(self) -> memoryview or None:
+        return memoryview(self.data)
+
+
+class GeneratedSource(PayloadSource):
+    """Synthetic payload. The data is generated as it is streamed, so it can be of any size,
+    and it is the same every time it is streamed.
+    """
+
+    KINDS = ("random", "compressible", "zeros")
+
+    # Success probability of the geometric distribution compressible bytes are drawn from
+    COMPRESSIBLE_P = 0.3
+
+    def __init__(self, size: int, kind="random", seed=0):
+        """
+        Args:
+            size (int): Size of the payload in bytes
+            kind (str, optional): One of GeneratedSource.KINDS. Random data can't be compressed,
+            compressible data is text-like data with a skewed byte distribution. Defaults to "random".
+            seed (int, optional): Seed of the generator. Defaults to 0.
+        """
+
+        assert kind in self.KINDS
+
+        self.size = size
+        self.kind = kind
+        self.seed = seed
+
+    def get_size(self) -> int:
+        return self.size
+
+    def iter_pieces(self) -> Iterator[bytes]:
+        rng = np.random.default_rng(self.seed)
+
+        for i in range(0, self.size, self.PIECE_SIZE):
+            piece_size = min(self.PIECE_SIZE, self.size - i)
+
+            if self.kind == "random":
+                yield rng.bytes(piece_size)
+            elif self.kind == "compressible":
+                yield np.minimum(rng.geometric(self.COMPRESSIBLE_P, piece_size) + ord("`"), 0xff) \
+                    .astype(np.uint8).tobytes()
+            else:
+                yield bytes(piece_size)
+
+
+class SharedMemorySource(PayloadSource):
+    """Payload held in a shared memory segment. When pickled, for example to be passed to
+    a worker process, the other process attaches to the segment instead of copying the payload.
+    """
+
+    def __init__(self, name: str, size: int, geometry: tuple[int, int, int] = None, owner=False):
+        """Attach to an existing segment. Use SharedMemorySource.create to create one.
+
+        Args:
+            name (str): Name of the segment
+            size (int): Size of the payload, the segment may be larger
+            geometry (tuple[int, int, int], optional): Width, height and number of channels,
+            if the payload is a serialized image. Defaults to None.
+            owner (bool, optional): Remove the segment when the source is closed. Defaults to False.
+        """
+
+        self.name = name
+        self.size = size
+        self.geometry = geometry
+        self.owner = owner
+        self.segment = SharedSegment(name)
+
+    @classmethod
+    def create(cls, source: PayloadSource) -> "SharedMemorySource":
+        """Copy a payload into a new shared memory segment, owned by the calling process
+
+        Args:
+            source (PayloadSource): Payload to copy
+
+        Returns:
+            SharedMemorySource: The shared payload
+        """
+
+        size = source.get_size()
+        name = f"aesvc_{secrets.token_hex(4)}"
+
+        # Empty segments can't be created
+        segment = SharedSegment(name, create=True, size=max(size, 1))
+
+        offset = 0
+        for piece in source.iter_pieces():
+            segment.buf[offset:offset + len(piece)] = piece
+            offset += len(piece)
+
+        segment.close()
+
+        return cls(name, size, source.get_image_geometry(), owner=True)
+
+    def __reduce__(self):
+        return SharedMemorySource, (self.name, self.size, self.geometry)
+
+    def get_size(self) -> int:
+        return self.size
+
+    def get_buffer(self) -> memoryview or None:
+        return self.segment.buf[:self.size]
+
+    def get_image_geometry(self) -> tuple[int, int, int] or None:
+        return self.geometry
+
+    def close(self):
+        if self.segment is None:
+            return
+
+        if self.owner:
+            self.segment.unlink()
+
+        try:
+            self.segment.close()
+        except BufferError:
+            # Still used by a transmitter, it will be unmapped once it is released
+            pass
+
+        self.segment = None
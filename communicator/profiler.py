@@ -0,0 +1,220 @@
+"""Profiler module. Used to profile the trial of every AES mode and to count
+the calls and the time spent in the hot paths of the transfer.
+"""
+
+import os
+import time
+import pstats
+import logging
+import cProfile
+import functools
+import tracemalloc
+from typing import Callable
+from aes import AES
+from summarizer import Summarizer
+from .comm_protocol import Transmitter, Receiver
+
+logger = logging.getLogger(__name__)
+
+
+class Profiler:
+    """Profiles the trial of every AES mode with cProfile and tracemalloc, and writes the
+    statistics to <Summarizer.SAVE_FOLDER>/<aes mode>/. While enabled, the Profiler.HOT_PATHS
+    methods, and their overrides in the subclasses, are replaced with wrappers that count their
+    calls and the cumulative time spent in them. The original methods are put back when it is
+    disabled, so the counters don't cost anything then.
+    """
+
+    PSTATS_FILENAME = "profile.pstats"
+    REPORT_FILENAME = "profile.txt"
+
+    TOP_ALLOCATIONS = 10
+    TOP_FUNCTIONS = 20
+
+    HOT_PATHS = (
+        (Transmitter, "gen_tx_message"),
+        (Receiver, "on_data_rx"),
+        (Receiver, "_recover_by_padding"),
+        (AES, "update"),
+        (Summarizer, "_new_evt"),
+    )
+
+    enabled = False
+
+    # Counter name mapped to the number of calls and the cumulative time in nanoseconds
+    counters: dict[str, list[int]] = {}
+
+    _originals: list[tuple[type, str, object]] = []
+    _profile: cProfile.Profile = None
+    _aes_mode: str = None
+    _started_tracing = False
+
+    @classmethod
+    def enable(cls, enabled=True):
+        """Enable or disable profiling. Enabling it installs the hot path counters,
+        disabling it removes them.
+
+        Args:
+            enabled (bool, optional): Profile the AES mode trials. Defaults to True.
+        """
+
+        if enabled and not cls.enabled:
+            cls._install_counters()
+        elif not enabled and cls.enabled:
+            cls._remove_counters()
+
+        cls.enabled = enabled
+
+    @classmethod
+    def _install_counters(cls):
+        """Replace the hot path methods of every class that defines them with counting wrappers
+        """
+
+        for base, name in cls.HOT_PATHS:
+            for klass in cls._get_classes(base):
+                if name not in vars(klass):
+                    continue
+
+                original = vars(klass)[name]
+                cls._originals.append((klass, name, original))
+
+                counter = cls.counters.setdefault(f"{klass.__name__}.{name}", [0, 0])
+
+                if isinstance(original, classmethod):
+                    setattr(klass, name, classmethod(cls._count(original.__func__, counter)))
+                else:
+                    setattr(klass, name, cls._count(original, counter))
+
+    @classmethod
+    def _remove_counters(cls):
+        """Put back the original hot path methods
+        """
+
+        for klass, name, original in reversed(cls._originals):
+            setattr(klass, name, original)
+
+        cls._originals.clear()
+
+    @classmethod
+    def _get_classes(cls, base: type) -> list[type]:
+        """Get a class along with all of its subclasses
+
+        Args:
+            base (type): Class
+
+        Returns:
+            list[type]: The class and its subclasses
+        """
+
+        classes = [base]
+
+        for subclass in base.__subclasses__():
+            classes.extend(cls._get_classes(subclass))
+
+        return classes
+
+    @staticmethod
+    def _count(func: Callable, counter: list[int]) -> Callable:
+        """Wrap a function so that its calls and the time spent in it are counted
+
+        Args:
+            func (Callable): Function to wrap
+            counter (list[int]): Number of calls and cumulative time in nanoseconds
+
+        Returns:
+            Callable: Counting wrapper
+        """
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter_ns()
+
+            try:
+                return func(*args, **kwargs)
+            finally:
+                counter[0] += 1
+                counter[1] += time.perf_counter_ns() - start
+
+        return wrapper
+
+    @classmethod
+    def reset_counters(cls):
+        """Reset all of the hot path counters
+        """
+
+        for counter in cls.counters.values():
+            counter[0] = counter[1] = 0
+
+    @classmethod
+    def start(cls, aes_mode: str):
+        """Start profiling the trial of an AES mode
+
+        Args:
+            aes_mode (str): Name of the AES mode currently being tested
+        """
+
+        cls._aes_mode = aes_mode
+        cls.reset_counters()
+
+        # Memory that is already being traced by someone else is left traced
+        cls._started_tracing = not tracemalloc.is_tracing()
+
+        if cls._started_tracing:
+            tracemalloc.start()
+
+        tracemalloc.reset_peak()
+
+        cls._profile = cProfile.Profile()
+        cls._profile.enable()
+
+    @classmethod
+    def end(cls) -> dict[str, int]:
+        """Stop profiling the current AES mode and write its .pstats file
+        and its report, with the peak memory, the top allocations and the counters
+
+        Returns:
+            dict[str, int]: Peak traced memory and the calls and cumulative time
+            in nanoseconds of every hot path
+        """
+
+        cls._profile.disable()
+
+        _, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+
+        if cls._started_tracing:
+            tracemalloc.stop()
+
+        folder = os.path.join(Summarizer.SAVE_FOLDER, cls._aes_mode)
+        os.makedirs(folder, exist_ok=True)
+
+        cls._profile.dump_stats(os.path.join(folder, cls.PSTATS_FILENAME))
+
+        results = {"peak_memory_bytes": peak}
+
+        for name, (calls, total_ns) in cls.counters.items():
+            results[f"{name}.calls"] = calls
+            results[f"{name}.ns"] = total_ns
+
+        with open(os.path.join(folder, cls.REPORT_FILENAME), "w", encoding="utf-8") as file:
+            file.write(f"Peak traced memory: {peak / (1 << 20):.2f} MiB\n\n")
+            file.write(f"Top {cls.TOP_ALLOCATIONS} allocations at the end of the trial:\n")
+
+            for stat in snapshot.statistics("lineno")[:cls.TOP_ALLOCATIONS]:
+                file.write(f"    {stat}\n")
+
+            file.write("\nHot paths:\n")
+
+            for name, (calls, total_ns) in sorted(cls.counters.items(), key=lambda item: -item[1][1]):
+                file.write(f"    {name}: {calls} calls, {total_ns / 1e6:.3f} ms, "
+                           f"{total_ns / max(calls, 1):.0f} ns per call\n")
+
+            file.write(f"\nTop {cls.TOP_FUNCTIONS} functions by cumulative time:\n")
+            pstats.Stats(cls._profile, stream=file).sort_stats("cumulative").print_stats(cls.TOP_FUNCTIONS)
+
+        logger.info("Profile of %s written to %s, peak traced memory: %.2f MiB",
+                    cls._aes_mode.upper(), folder, peak / (1 << 20))
+
+        cls._profile = None
+
+        return results
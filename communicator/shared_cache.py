@@ -0,0 +1,157 @@
+"""Shared ciphertext cache module. Used to encrypt the payload only once
+for all of the worker processes of a multi-process run.
+"""
+
+import hashlib
+from multiprocessing.shared_memory import SharedMemory
+from aes import AES
+
+
+class SharedSegment(SharedMemory):
+    """Shared memory segment that can be garbage collected while views of it still exist,
+    such as the chunks of a transmitter. It is then unmapped once the views are released.
+    """
+
+    def __del__(self):
+        try:
+            self.close()
+        except (OSError, BufferError):
+            pass
+
+
+class CiphertextCache:
+    """Ciphertext cache shared between processes. The ciphertext of every AES mode is placed in a
+    shared memory segment named after the payload and the mode, key and IV's that produced it, so
+    that the processes transmitting the same payload with the same key attach to it instead of
+    encrypting the payload again. Only the process that owns the cache creates and removes segments,
+    when pickled, the cache is attached to by the other process.
+    """
+
+    # The first byte of a segment is set once the segment is completely written
+    READY = 1
+
+    FIELD_LENGTH_BYTE_LENGTH = 2
+
+    def __init__(self, namespace: str, owner=True):
+        """
+        Args:
+            namespace (str): Short name of the payload, such as the name of its shared memory segment
+            owner (bool, optional): If this process creates and removes the segments. Defaults to True.
+        """
+
+        self.namespace = namespace
+        self.owner = owner
+        self.segments: dict[str, SharedSegment] = {}
+
+    def __reduce__(self):
+        return CiphertextCache, (self.namespace, False)
+
+    def get(self, aes: AES, size: int, fields: list[str]) -> tuple[memoryview, dict[str, bytes]] or None:
+        """Attach to the ciphertext produced by an AES instance, without copying it
+
+        Args:
+            aes (AES): AES instance in encryptor mode
+            size (int): Size of the ciphertext
+            fields (list[str]): Names of the AES fields stored along with the ciphertext
+
+        Returns:
+            tuple[memoryview, dict[str, bytes]] or None: The ciphertext and the AES fields,
+            or None if it wasn't cached yet
+        """
+
+        name = self._get_segment_name(aes, size)
+        segment = self.segments.get(name)
+
+        if segment is None:
+            try:
+                segment = SharedSegment(name)
+            except FileNotFoundError:
+                return None
+
+            self.segments[name] = segment
+
+        buffer = segment.buf
+
+        if buffer[0] != self.READY:
+            return None
+
+        offset = 1
+        values = {}
+
+        for field in fields:
+            length = int.from_bytes(buffer[offset:offset + self.FIELD_LENGTH_BYTE_LENGTH], "big")
+            offset += self.FIELD_LENGTH_BYTE_LENGTH
+
+            values[field] = bytes(buffer[offset:offset + length])
+            offset += length
+
+        return buffer[offset:offset + size], values
+
+    def put(self, aes: AES, ciphertext: bytes, values: dict[str, bytes]):
+        """Place the ciphertext produced by an AES instance into a new segment.
+        Ignored if this process doesn't own the cache.
+
+        Args:
+            aes (AES): AES instance in encryptor mode
+            ciphertext (bytes): Ciphertext
+            values (dict[str, bytes]): AES fields to store along with the ciphertext
+        """
+
+        if not self.owner or not all(isinstance(value, bytes) for value in values.values()):
+            return
+
+        header = bytearray(1)
+
+        for value in values.values():
+            header += len(value).to_bytes(self.FIELD_LENGTH_BYTE_LENGTH, "big") + value
+
+        name = self._get_segment_name(aes, len(ciphertext))
+
+        try:
+            segment = SharedSegment(name, create=True, size=len(header) + len(ciphertext))
+        except FileExistsError:
+            return
+
+        segment.buf[:len(header)] = header
+        segment.buf[len(header):len(header) + len(ciphertext)] = ciphertext
+        segment.buf[0] = self.READY
+
+        self.segments[name] = segment
+
+    def close(self):
+        """Detach from all of the segments, and remove them if this process owns the cache
+        """
+
+        for segment in self.segments.values():
+            if self.owner:
+                segment.unlink()
+
+            try:
+                segment.close()
+            except BufferError:
+                # Still used by a transmitter, it will be unmapped once it is released
+                pass
+
+        self.segments = {}
+
+    def _get_segment_name(self, aes: AES, size: int) -> str:
+        """Get the name of the segment holding the ciphertext produced by an AES instance
+
+        Args:
+            aes (AES): AES instance in encryptor mode, with its cipher set
+            size (int): Size of the ciphertext
+
+        Returns:
+            str: Segment name
+        """
+
+        digest = hashlib.blake2b(digest_size=8)
+
+        # The cipher arguments are the key, the mode and the IV, nonce or tweak the mode uses
+        key, mode_type, mode_args = aes.cipher_args
+
+        for value in (type(aes).__name__.encode(), key, mode_type.__name__.encode(),
+                      *(arg or b"" for arg in mode_args), size.to_bytes(8, "big")):
+            digest.update(len(value).to_bytes(2, "big") + value)
+
+        return f"{self.namespace}_{digest.hexdigest()}"
@@ -0,0 +1,321 @@
+"""Parameter sweep module. Runs every combination of a parameter grid
+through the Communicator in parallel worker processes.
+"""
+
+import os
+import csv
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from aes import AES
+from summarizer import Visualizer, SimulationClock
+from .communicator import Communicator
+from .channel import Channel
+from .comm_protocol import init_aes_txrx_pairs
+from .payload import ImageSource, SharedMemorySource
+from .shared_cache import CiphertextCache
+
+
+def run_sweep_point(point: dict[str, int or float or str or bool]) -> dict[str, int or float or str or bool]:
+    """Run a single sweep point. Used as the worker process entry point.
+
+    Args:
+        point (dict[str, int or float or str or bool]): Sweep point, as generated by Sweep.get_points
+
+    Returns:
+        dict[str, int or float or str or bool]: The sweep point along with its results
+    """
+
+    AES.set_bit_length(point["aes_bit_length"])
+    SimulationClock.enable(point["virtual_clock"])
+
+    if point["packet_size"] is None:
+        point = {**point, "packet_size": AES.AES_BYTE_LENGTH}
+
+    communicator = Communicator(payload=point["payload"],
+                                key=point["key"],
+                                ciphertext_cache=point["ciphertext_cache"],
+                                aes_modes_to_test=[point["aes_mode"]],
+                                message_fail_rate_percent=point["fail_percent"],
+                                use_retransmission=point["use_retransmission"],
+                                chunk_size=point["packet_size"],
+                                save_outputs=False,
+                                max_connection_resets=point["max_connection_resets"],
+                                resync_on_packet_drop=point["recovery"] == "resync",
+                                channel=Channel.from_settings(point["fail_percent"] / 100,
+                                                              point["seed"],
+                                                              point["mean_burst_length"],
+                                                              delay_s=point["delay_s"],
+                                                              bandwidth_bps=point["bandwidth_bps"]))
+
+    result = communicator.test_aes_modes()[point["aes_mode"]]
+
+    # Quality metrics are missing if the transfer never passed
+    return {column: {**point, **result}.get(column) for column in Sweep.COLUMNS}
+
+
+class Sweep:
+    """Parameter sweep class
+    """
+
+    RESULTS_FILENAME = "results.csv"
+
+    # Modes that chain on the ciphertext and can be resynchronized, the others only recover with zero's
+    RESYNC_MODES = ("cbc", "cfb")
+
+    COLUMNS = (
+        "fail_percent",
+        "aes_bit_length",
+        "packet_size",
+        "aes_mode",
+        "recovery",
+        "seed",
+        "passed",
+        "message_fail_rate",
+        "elapsed_s",
+        "goodput_bytes_per_second",
+        "packets_per_second",
+        "packets_transmitted",
+        "packets_dropped",
+        "packets_retransmitted",
+        "connection_resets",
+        "bytes_total",
+        "bytes_corrupted",
+        "block_loss_rate",
+        "psnr_db",
+        "ssim",
+    )
+
+    PLOTS = {
+        "goodput_bytes_per_second": ("goodput.png", "Goodput [B/s]"),
+        "elapsed_s": ("completion_time.png", "Completion time [s]"),
+        "block_loss_rate": ("block_loss_rate.png", "Effective block loss rate"),
+    }
+
+    def __init__(self,
+                 fail_percents: list[float],
+                 aes_modes: list[str],
+                 aes_bit_lengths: list[int] = None,
+                 packet_sizes: list[int] = None,
+                 seeds: list[int] = None,
+                 path_to_image="",
+                 use_retransmission=False,
+                 recoveries: list[str] = None,
+                 max_connection_resets: int = None,
+                 mean_burst_length: float = None,
+                 delay_s=0.0,
+                 bandwidth_bps: float = None,
+                 virtual_clock=False,
+                 workers: int = None):
+        """
+        Args:
+            fail_percents (list[float]): Message failure percentages to test
+            aes_modes (list[str]): AES modes to test
+            aes_bit_lengths (list[int], optional): AES bit lengths to test. Defaults to None,
+            which will test only 256 bit.
+            packet_sizes (list[int], optional): Packet sizes to test. A None value will use
+            AES.AES_BYTE_LENGTH. Defaults to None.
+            seeds (list[int], optional): Packet drop seeds, every one of them will be tested.
+            Defaults to None, which will only use the seed 0.
+            path_to_image (str, optional): Path to image that will be transmitted.
+            If left empty, the default one will be used. Defaults to "".
+            use_retransmission (bool, optional): Retransmit packets in case of their failure.
+            Defaults to False.
+            recoveries (list[str], optional): Ways the CBC and CFB receivers recover from failed
+            packets to test, "zero" updates the cipher with zero's and "resync" resynchronizes it
+            on the previous ciphertext block. The other modes are only tested with "zero".
+            Defaults to None, which will only test "zero".
+            max_connection_resets (int, optional): How many connection resets an AES mode may
+            have before it is considered unusable. Defaults to None.
+            mean_burst_length (float, optional): If set, packets will be dropped in bursts
+            with this average length. Defaults to None.
+            delay_s (float, optional): One way link delay in seconds. Defaults to 0.0.
+            bandwidth_bps (float, optional): Link bandwidth in bits per second. Defaults to None.
+            virtual_clock (bool, optional): Measure modeled link time instead of the time
+            spent running the simulation. Defaults to False.
+            workers (int, optional): Number of worker processes. If None is supplied,
+            the number of CPU's will be used. Defaults to None.
+        """
+
+        self.fail_percents = fail_percents
+        self.aes_modes = aes_modes
+        self.aes_bit_lengths = aes_bit_lengths or [256]
+        self.packet_sizes = packet_sizes or [None]
+        self.seeds = seeds or [0]
+        self.path_to_image = path_to_image
+        self.use_retransmission = use_retransmission
+        self.recoveries = recoveries or ["zero"]
+        self.max_connection_resets = max_connection_resets
+        self.mean_burst_length = mean_burst_length
+        self.delay_s = delay_s
+        self.bandwidth_bps = bandwidth_bps
+        self.virtual_clock = virtual_clock
+        self.workers = workers
+
+        self.results: list[dict[str, int or float or str or bool]] = []
+
+    def get_points(self) -> list[dict[str, int or float or str or bool]]:
+        """Generate every combination of the sweep parameters
+
+        Returns:
+            list[dict[str, int or float or str or bool]]: Sweep points
+        """
+
+        grid = [(aes_bit_length, packet_size, aes_mode, recovery, fail_percent, seed)
+                for aes_bit_length, packet_size, aes_mode
+                in itertools.product(self.aes_bit_lengths, self.packet_sizes, self.aes_modes)
+                for recovery, fail_percent, seed
+                in itertools.product(self.get_recoveries(aes_mode), self.fail_percents, self.seeds)]
+
+        return [{"fail_percent": fail_percent,
+                 "aes_bit_length": aes_bit_length,
+                 "packet_size": packet_size,
+                 "aes_mode": aes_mode,
+                 "recovery": recovery,
+                 "seed": seed,
+                 "image_path": self.path_to_image,
+                 "use_retransmission": self.use_retransmission,
+                 "max_connection_resets": self.max_connection_resets,
+                 "mean_burst_length": self.mean_burst_length,
+                 "delay_s": self.delay_s,
+                 "bandwidth_bps": self.bandwidth_bps,
+                 "virtual_clock": self.virtual_clock}
+                for aes_bit_length, packet_size, aes_mode, recovery, fail_percent, seed in grid]
+
+    def get_recoveries(self, aes_mode: str) -> list[str]:
+        """Get the recoveries tested for an AES mode. Only the Sweep.RESYNC_MODES can be
+        resynchronized, so the other modes are only tested with the "zero" recovery.
+
+        Args:
+            aes_mode (str): AES mode
+
+        Returns:
+            list[str]: Recoveries to test
+        """
+
+        if aes_mode in self.RESYNC_MODES:
+            return self.recoveries
+
+        return ["zero"]
+
+    def run(self) -> list[dict[str, int or float or str or bool]]:
+        """Run all of the sweep points in worker processes. The image is loaded and encrypted
+        only once, into shared memory, which the worker processes attach to.
+
+        Returns:
+            list[dict[str, int or float or str or bool]]: One row of results per sweep point
+        """
+
+        payload = SharedMemorySource.create(ImageSource(self.path_to_image))
+        ciphertext_cache = CiphertextCache(payload.name)
+
+        # Keys of the shorter bit lengths are prefixes of the longest one
+        key = os.urandom(max(self.aes_bit_lengths) // 8)
+
+        try:
+            self._fill_ciphertext_cache(payload, ciphertext_cache, key)
+
+            points = [{**point,
+                       "payload": payload,
+                       "key": key[:point["aes_bit_length"] // 8],
+                       "ciphertext_cache": ciphertext_cache}
+                      for point in self.get_points()]
+
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                self.results = list(executor.map(run_sweep_point, points))
+        finally:
+            ciphertext_cache.close()
+            payload.close()
+
+        return self.results
+
+    def _fill_ciphertext_cache(self, payload: SharedMemorySource, ciphertext_cache: CiphertextCache,
+                               key: bytes):
+        """Encrypt the payload once for every AES mode, bit length and packet size
+
+        Args:
+            payload (SharedMemorySource): Payload
+            ciphertext_cache (CiphertextCache): Cache the ciphertext is placed in
+            key (bytes): Key of the longest bit length
+        """
+
+        for aes_bit_length, packet_size in itertools.product(self.aes_bit_lengths, self.packet_sizes):
+            AES.set_bit_length(aes_bit_length)
+
+            tx_rx_pairs = init_aes_txrx_pairs(payload.get_buffer(), chunk_size=packet_size,
+                                              key=key[:aes_bit_length // 8],
+                                              ciphertext_cache=ciphertext_cache)
+
+            for aes_mode in self.aes_modes:
+                if aes_mode in tx_rx_pairs:
+                    tx_rx_pairs[aes_mode].transmitter.reset()
+
+    def save(self, folder: str):
+        """Save the results table and the summary plots
+
+        Args:
+            folder (str): Folder to save to. It will be created if it doesn't exist.
+        """
+
+        os.makedirs(folder, exist_ok=True)
+
+        with open(os.path.join(folder, self.RESULTS_FILENAME), "w", newline="", encoding="utf-8") as F:
+            writer = csv.DictWriter(F, fieldnames=self.COLUMNS)
+            writer.writeheader()
+            writer.writerows(self.results)
+
+        for column, (filename, ylabel) in self.PLOTS.items():
+            Visualizer.generate_line_plot(self._get_series(column),
+                                          os.path.join(folder, filename),
+                                          plot_title=f"{ylabel.split(' [')[0]} against packet loss",
+                                          xlabel="Set fail rate [%]",
+                                          ylabel=ylabel)
+
+    def _get_series(self, column: str) -> dict[str, tuple[list[float], list[float]]]:
+        """Average a result column over the seeds, for every tested configuration.
+        Runs that didn't pass are left out of the average.
+
+        Args:
+            column (str): Result column
+
+        Returns:
+            dict[str, tuple[list[float], list[float]]]: Configuration names mapped
+            to fail percentages and the averaged column values
+        """
+
+        series = {}
+
+        configurations = [(aes_bit_length, packet_size, aes_mode, recovery)
+                          for aes_bit_length, packet_size, aes_mode
+                          in itertools.product(self.aes_bit_lengths, self.packet_sizes, self.aes_modes)
+                          for recovery in self.get_recoveries(aes_mode)]
+
+        for aes_bit_length, packet_size, aes_mode, recovery in configurations:
+            name = aes_mode.upper()
+
+            if len(self.get_recoveries(aes_mode)) > 1:
+                name += f" {recovery}"
+
+            if len(self.aes_bit_lengths) > 1:
+                name += f" {aes_bit_length} bit"
+
+            if len(self.packet_sizes) > 1:
+                name += f" {packet_size or aes_bit_length // 8} B"
+
+            x, y = [], []
+
+            for fail_percent in sorted(self.fail_percents):
+                values = [row[column] for row in self.results
+                          if row["aes_bit_length"] == aes_bit_length
+                          and row["packet_size"] == (packet_size or aes_bit_length // 8)
+                          and row["aes_mode"] == aes_mode
+                          and row["recovery"] == recovery
+                          and row["fail_percent"] == fail_percent
+                          and row["passed"]]
+
+                x.append(fail_percent)
+                y.append(np.mean(values) if values else np.nan)
+
+            series[name] = (x, y)
+
+        return series
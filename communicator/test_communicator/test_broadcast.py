@@ -0,0 +1,85 @@
+"""Broadcast session unit tests
+"""
+
+import os
+from ..broadcast import BroadcastSession
+from ..channel import Channel, BernoulliLoss
+from ..comm_protocol import init_aes_txrx_pairs
+
+DATA = os.urandom(4000)
+
+CHUNK_SIZE = 32
+RECEIVERS = 50
+LOSS_RATE = 0.05
+
+
+def get_channels(loss_rate=LOSS_RATE) -> list[Channel]:
+    """Create an independently seeded lossy channel for every receiver
+
+    Args:
+        loss_rate (float, optional): Loss rate of every channel. Defaults to LOSS_RATE.
+
+    Returns:
+        list[Channel]: Channels
+    """
+
+    return [Channel([BernoulliLoss(loss_rate)], seed=seed) for seed in range(RECEIVERS)]
+
+def test_broadcast_retransmission():
+    """Test that every receiver gets the whole data, that the missing chunks requested
+    by more than one receiver are transmitted only once and that the data is encrypted once
+    """
+
+    tx_rx_pairs = init_aes_txrx_pairs(DATA, chunk_size=CHUNK_SIZE)
+
+    # Probability that at least one receiver loses a chunk, which then has to be repaired once
+    chunk_loss_rate = 1 - (1 - LOSS_RATE) ** RECEIVERS
+
+    for aes_mode in ("cbc", "ctr", "gcm"):
+        transmitter = tx_rx_pairs[aes_mode].transmitter
+        update = transmitter.aes.update
+        encrypted_sizes = []
+
+        def counted_update(data: bytes, update=update, encrypted_sizes=encrypted_sizes) -> bytes:
+            encrypted_sizes.append(len(data))
+
+            return update(data)
+
+        transmitter.aes.update = counted_update
+
+        session = BroadcastSession(tx_rx_pairs[aes_mode], get_channels(), nack_interval_frames=16)
+        stats = session.run()
+
+        assert stats["receivers_completed"] == RECEIVERS, aes_mode
+        assert all(bytes(receiver.received_data) == DATA for receiver in session.receivers)
+
+        assert stats["nacks_suppressed"] > 0
+        assert stats["repairs_transmitted"] == stats["nacks"] - stats["nacks_suppressed"]
+        assert stats["transmissions_per_frame"] < 1 + 1.5 * chunk_loss_rate, aes_mode
+
+        # The repairs are slices of the ciphertext, nothing is encrypted again
+        assert sum(encrypted_sizes) == transmitter.data_size_padded, aes_mode
+        assert 0 < stats["encryption_s"] < stats["transmitter_s"]
+
+def test_broadcast_padding():
+    """Test that without retransmission nothing is transmitted twice,
+    and that the receivers lose only their own chunks
+    """
+
+    tx_rx_pairs = init_aes_txrx_pairs(DATA, chunk_size=CHUNK_SIZE)
+
+    session = BroadcastSession(tx_rx_pairs["ctr"], get_channels(), use_retransmission=False)
+    stats = session.run()
+
+    assert stats["repairs_transmitted"] == 0
+    assert stats["transmissions_per_frame"] == 1
+
+    received = [bytes(receiver.received_data) for receiver in session.receivers]
+
+    assert all(len(data) == len(DATA) for data in received)
+    assert len(set(received)) > 1
+
+    lossless = BroadcastSession(tx_rx_pairs["ctr"], get_channels(0.0), use_retransmission=False)
+    lossless.run()
+
+    assert all(bytes(receiver.received_data) == DATA for receiver in lossless.receivers)
@@ -0,0 +1,83 @@
+"""Channel model unit tests
+"""
+
+import itertools
+import numpy as np
+from ..channel import Channel, BernoulliLoss, GilbertElliottLoss, Latency, Reordering, Duplication
+
+PACKET_COUNT = 100_000
+
+LOSS_RATE = 0.05
+MEAN_BURST_LENGTH = 4
+
+
+def transmit_all(channel: Channel, packet_count=PACKET_COUNT) -> list[list[int]]:
+    """Transmit numbered packets through a channel
+
+    Args:
+        channel (Channel): Channel instance
+        packet_count (int, optional): Number of packets to transmit. Defaults to PACKET_COUNT.
+
+    Returns:
+        list[list[int]]: Delivered packet numbers for every transmission
+    """
+
+    return [[delivery.msg["chunk"] for delivery in channel.transmit({"chunk": i})]
+            for i in range(packet_count)]
+
+def test_bernoulli_loss():
+    """Test that the Bernoulli loss rate matches the configured one
+    """
+
+    delivered = transmit_all(Channel([BernoulliLoss(LOSS_RATE)], seed=0))
+    loss_rate = 1 - sum(map(len, delivered)) / PACKET_COUNT
+
+    assert abs(loss_rate - LOSS_RATE) < 0.005
+
+def test_gilbert_elliott_loss():
+    """Test that the Gilbert-Elliott loss rate and burst length match the configured ones
+    """
+
+    channel = Channel([GilbertElliottLoss.from_loss_rate(LOSS_RATE, MEAN_BURST_LENGTH)], seed=0)
+    lost = [not delivered for delivered in transmit_all(channel)]
+
+    bursts = [len(list(group)) for is_lost, group in itertools.groupby(lost) if is_lost]
+
+    assert abs(np.mean(lost) - LOSS_RATE) < 0.01
+    assert abs(np.mean(bursts) - MEAN_BURST_LENGTH) < 0.5
+
+def test_seed_reproducibility():
+    """Test that channels with the same seed make the same decisions
+    """
+
+    def build(seed: int) -> Channel:
+        return Channel([BernoulliLoss(LOSS_RATE), Reordering(0.1), Duplication(0.1)], seed=seed)
+
+    assert transmit_all(build(1), 1000) == transmit_all(build(1), 1000)
+    assert transmit_all(build(1), 1000) != transmit_all(build(2), 1000)
+
+def test_latency():
+    """Test that the latency stays within the configured bounds
+    """
+
+    channel = Channel([Latency(0.01, 0.002)], seed=0)
+    delays = [channel.transmit({"chunk": i})[0].delay_s for i in range(1000)]
+
+    assert min(delays) >= 0.01 and max(delays) <= 0.012
+    assert abs(channel.get_round_trip_time_s() - 0.022) < 1e-9
+
+def test_reordering_and_duplication():
+    """Test that reordering keeps every packet and duplication only adds copies
+    """
+
+    delivered = transmit_all(Channel([Reordering(0.1, depth=3)], seed=0), 1000)
+    flat = list(itertools.chain(*delivered))
+
+    assert sorted(flat) == list(range(len(flat)))
+    assert flat != sorted(flat)
+
+    delivered = transmit_all(Channel([Duplication(0.1)], seed=0), 1000)
+    flat = list(itertools.chain(*delivered))
+
+    assert set(flat) == set(range(1000))
+    assert 1050 < len(flat) < 1150
@@ -0,0 +1,71 @@
+"""Simulation clock unit tests
+"""
+
+import os
+from summarizer import Summarizer, SimulationClock
+from ..channel import Channel
+from ..communicator import Communicator
+from ..payload import FileSource
+
+DATA = os.urandom(20_000)
+
+BANDWIDTH_BPS = 1e6
+LATENCY_S = 0.01
+
+
+def test_enable_and_advance():
+    """Test that the clock only advances by the modeled durations, that enabling it
+    restarts it and that the Summarizer only takes its time from it while it is enabled
+    """
+
+    try:
+        SimulationClock.enable()
+        Summarizer.start("clock")
+
+        assert SimulationClock.get_time() == 0.0
+
+        SimulationClock.advance(0.25)
+        SimulationClock.advance(0.5)
+
+        assert SimulationClock.get_time() == 0.75
+        assert Summarizer.get_current_time() == 0.75
+
+        SimulationClock.enable()
+
+        assert SimulationClock.get_time() == 0.0
+    finally:
+        SimulationClock.enable(False)
+        Summarizer.events.pop("clock")
+
+    assert not SimulationClock.enabled
+
+    Summarizer.start("clock")
+    Summarizer.events.pop("clock")
+    SimulationClock.advance(100.0)
+
+    assert Summarizer.get_current_time() < 100.0
+
+def test_modeled_transfer_time(tmp_path):
+    """Test that a transfer on the simulation clock takes at least the serialization and
+    propagation time of the link, and exactly the same time on every run
+    """
+
+    path = tmp_path / "payload.bin"
+    path.write_bytes(DATA)
+
+    elapsed = []
+
+    try:
+        for _ in range(2):
+            SimulationClock.enable()
+
+            channel = Channel.from_settings(0.02, seed=1, delay_s=LATENCY_S, bandwidth_bps=BANDWIDTH_BPS)
+            communicator = Communicator(aes_modes_to_test=["ctr"], use_retransmission=True, chunk_size=256,
+                                        save_outputs=False, payload=FileSource(str(path)), channel=channel)
+
+            elapsed.append(communicator.test_aes_modes()["ctr"]["elapsed_s"])
+    finally:
+        SimulationClock.enable(False)
+
+    assert elapsed[0] == elapsed[1]
+    assert elapsed[0] >= len(DATA) * 8 / BANDWIDTH_BPS + LATENCY_S
@@ -0,0 +1,245 @@
+"""Transmitter and receiver unit tests
+"""
+
+import io
+import os
+import pytest
+import numpy as np
+from ..comm_protocol import init_aes_txrx_pairs, Receiver
+from ..channel import Channel, ChannelModel, Delivery
+from ..communicator import Communicator
+from ..payload import FileSource
+
+DATA = os.urandom(1000)
+
+CHUNK_SIZE = 64
+PIECE_SIZE = 100
+
+
+class DropChunk(ChannelModel):
+    """Channel model that drops the first transmission of a single chunk
+    """
+
+    IS_LOSS_MODEL = True
+
+    def __init__(self, chunk: int):
+        """
+        Args:
+            chunk (int): Chunk to drop, as numbered in the tx messages
+        """
+
+        super().__init__()
+
+        self.chunk = chunk
+        self.dropped = False
+
+    def _generate_schedule(self, size: int) -> np.ndarray:
+        return np.zeros(size, dtype=bool)
+
+    def process(self, deliveries: list[Delivery]) -> list[Delivery]:
+        kept = []
+
+        for delivery in deliveries:
+            # Empty frames are the probes sent after the last chunk
+            if not self.dropped and delivery.msg.get("chunk") == self.chunk and len(delivery.msg["data"]):
+                self.dropped = True
+                continue
+
+            kept.append(delivery)
+
+        return kept
+
+
+def transfer(tx_rx_pairs: dict, aes_mode: str) -> bytes:
+    """Transfer all of the data between a transmitter and a receiver, without losses
+
+    Args:
+        tx_rx_pairs (dict): TxRxPair instances, as returned by init_aes_txrx_pairs
+        aes_mode (str): AES mode to use
+
+    Returns:
+        bytes: Encrypted data received by the receiver
+    """
+
+    transmitter, receiver = tx_rx_pairs[aes_mode].transmitter, tx_rx_pairs[aes_mode].receiver
+
+    receiver.on_init_msg(transmitter.gen_init_message())
+
+    while receiver.current_chunk < transmitter.chunk_count:
+        receiver.on_data_rx(transmitter.gen_tx_message())
+
+    return bytes(receiver.received_data_encrypted)
+
+def test_zero_copy_chunks():
+    """Test that transmitted and retransmitted chunks are views into the encrypted data
+    """
+
+    tx_rx_pairs = init_aes_txrx_pairs(DATA, chunk_size=CHUNK_SIZE)
+    transmitter = tx_rx_pairs["ctr"].transmitter
+
+    transmitter.gen_init_message()
+
+    first = transmitter.gen_tx_message()
+    transmitter.gen_tx_message()
+    transmitter.set_chunk(0)
+    retransmitted = transmitter.gen_tx_message()
+
+    assert first["data"].obj is retransmitted["data"].obj is transmitter.encrypted_data
+    assert first["data"] == retransmitted["data"] == transmitter.encrypted_data[:CHUNK_SIZE]
+    assert retransmitted["chunk"] == 1
+
+def test_stream_transmitter():
+    """Test that the streaming transmitter produces the same ciphertext as the
+    buffered one, and that the receiver can write the data into a sink
+    """
+
+    tx_rx_pairs = init_aes_txrx_pairs(DATA, chunk_size=CHUNK_SIZE)
+
+    data_source = lambda: (DATA[i:i + PIECE_SIZE] for i in range(0, len(DATA), PIECE_SIZE))
+    stream_tx_rx_pairs = init_aes_txrx_pairs(None, chunk_size=CHUNK_SIZE,
+                                             data_source=data_source, data_size=len(DATA))
+
+    for aes_mode, tx_rx_pair in tx_rx_pairs.items():
+        if aes_mode not in stream_tx_rx_pairs:
+            continue
+
+        stream_transmitter = stream_tx_rx_pairs[aes_mode].transmitter
+
+        # Same key and IV's, so that both produce the same ciphertext
+        stream_transmitter.aes = tx_rx_pair.transmitter.aes
+        stream_tx_rx_pairs[aes_mode].receiver.aes = tx_rx_pair.receiver.aes
+        stream_tx_rx_pairs[aes_mode].receiver.data_sink = io.BytesIO()
+
+        encrypted = transfer(tx_rx_pairs, aes_mode)
+        stream_transmitter.reset()
+        stream_encrypted = transfer(stream_tx_rx_pairs, aes_mode)
+
+        assert bytes(tx_rx_pair.receiver.received_data) == DATA
+        assert stream_tx_rx_pairs[aes_mode].receiver.data_sink.getvalue() == DATA
+        assert stream_encrypted == encrypted
+
+def test_packet_aead():
+    """Test that chunks sealed with a per packet AEAD can be lost, padded over
+    and forged without requiring a re-initialization
+    """
+
+    tx_rx_pairs = init_aes_txrx_pairs(DATA, chunk_size=CHUNK_SIZE)
+
+    for aes_mode in ("gcm_packet", "chacha20_packet"):
+        transmitter, receiver = tx_rx_pairs[aes_mode].transmitter, tx_rx_pairs[aes_mode].receiver
+
+        receiver.on_init_msg(transmitter.gen_init_message())
+
+        # Lose the second chunk
+        receiver.on_data_rx(transmitter.gen_tx_message())
+        transmitter.gen_tx_message()
+
+        with pytest.raises(Receiver.RxFailureException) as e:
+            receiver.on_data_rx(transmitter.gen_tx_message(), pad_on_failure=True)
+
+        assert e.value.chunk == 2
+        assert e.value.error_protocol == Receiver.RxFailureException.ErrorProtocol.RETRANSMIT
+
+        # Forge the fourth chunk
+        msg = transmitter.gen_tx_message()
+        msg["data"] = bytes(len(msg["data"]))
+
+        with pytest.raises(Receiver.RxFailureException):
+            receiver.on_data_rx(msg)
+
+        transmitter.set_chunk(3)
+
+        while receiver.current_chunk < transmitter.chunk_count:
+            receiver.on_data_rx(transmitter.gen_tx_message())
+
+        expected = DATA[:CHUNK_SIZE] + bytes(CHUNK_SIZE) + DATA[2 * CHUNK_SIZE:]
+
+        assert bytes(receiver.received_data) == expected
+
+def test_xts_sectors():
+    """Test that every XTS chunk is decrypted on its own, so the chunks following
+    a lost one are received intact without updating any cipher context
+    """
+
+    tx_rx_pairs = init_aes_txrx_pairs(DATA, chunk_size=CHUNK_SIZE, update_cipher_on_packet_drop=False)
+    transmitter, receiver = tx_rx_pairs["xts"].transmitter, tx_rx_pairs["xts"].receiver
+
+    receiver.on_init_msg(transmitter.gen_init_message())
+
+    # Lose the third chunk
+    receiver.on_data_rx(transmitter.gen_tx_message())
+    receiver.on_data_rx(transmitter.gen_tx_message())
+    transmitter.gen_tx_message()
+
+    with pytest.raises(Receiver.RxFailureException) as e:
+        receiver.on_data_rx(transmitter.gen_tx_message(), pad_on_failure=True)
+
+    assert e.value.chunk == 3
+
+    while receiver.current_chunk < transmitter.chunk_count:
+        receiver.on_data_rx(transmitter.gen_tx_message())
+
+    expected = DATA[:2 * CHUNK_SIZE] + bytes(CHUNK_SIZE) + DATA[3 * CHUNK_SIZE:]
+
+    assert bytes(receiver.received_data) == expected
+    assert transmitter.aes.decrypt_sector(2, transmitter.encrypted_data[2 * CHUNK_SIZE:3 * CHUNK_SIZE]) == \
+        DATA[2 * CHUNK_SIZE:3 * CHUNK_SIZE]
+
+def test_resync_on_packet_drop():
+    """Test that resynchronizing CBC and CFB on the chaining block only loses the dropped chunks,
+    while updating the cipher with zero's also corrupts the first block after every gap
+    """
+
+    dropped_chunks = {2, 5, 6}
+
+    for resync in (False, True):
+        tx_rx_pairs = init_aes_txrx_pairs(DATA, chunk_size=CHUNK_SIZE, resync_on_packet_drop=resync)
+
+        for aes_mode in ("cbc", "cfb"):
+            transmitter, receiver = tx_rx_pairs[aes_mode].transmitter, tx_rx_pairs[aes_mode].receiver
+
+            receiver.on_init_msg(transmitter.gen_init_message())
+
+            for chunk in range(transmitter.chunk_count):
+                msg = transmitter.gen_tx_message()
+
+                if chunk in dropped_chunks:
+                    continue
+
+                try:
+                    receiver.on_data_rx(msg, pad_on_failure=True)
+                except Receiver.RxFailureException:
+                    pass
+
+            received = bytes(receiver.received_data)
+            lost = sum(received[i:i + CHUNK_SIZE] != DATA[i:i + CHUNK_SIZE]
+                       for i in range(0, len(DATA), CHUNK_SIZE))
+
+            # Zero feeding also corrupts the chunk received after each of the two gaps
+            assert lost == len(dropped_chunks) + (0 if resync else 2), aes_mode
+
+@pytest.mark.parametrize("use_retransmission", [True, False])
+def test_last_chunk_lost(tmp_path, use_retransmission: bool):
+    """Test that a transfer whose last chunk is lost ends, with the chunk either
+    retransmitted or padded over
+    """
+
+    path = tmp_path / "payload.bin"
+    path.write_bytes(DATA)
+
+    chunk_count = -(-len(DATA) // CHUNK_SIZE)
+    last_chunk_offset = (chunk_count - 1) * CHUNK_SIZE
+
+    for aes_mode in ("xts", "gcm_packet", "chacha20_packet"):
+        communicator = Communicator(aes_modes_to_test=[aes_mode], use_retransmission=use_retransmission,
+                                    chunk_size=CHUNK_SIZE, save_outputs=False, payload=FileSource(str(path)),
+                                    channel=Channel([DropChunk(chunk_count)]))
+        results = communicator.test_aes_modes()
+
+        if use_retransmission:
+            expected = DATA
+        else:
+            expected = DATA[:last_chunk_offset] + bytes(len(DATA) - last_chunk_offset)
+
+        assert results[aes_mode]["passed"]
+        assert bytes(communicator.tx_rx_pairs[aes_mode].receiver.received_data) == expected, aes_mode
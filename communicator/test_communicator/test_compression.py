@@ -0,0 +1,85 @@
+"""Block compressor unit tests
+"""
+
+import os
+from ..compression import BlockCompressor
+from ..comm_protocol import Receiver, init_aes_txrx_pairs
+from ..communicator import Communicator
+from ..payload import FileSource
+
+CHUNK_SIZE = 64
+BLOCK_SIZE = 4096
+
+# Compressible data that isn't the same in every block
+DATA = b"".join(os.urandom(64) * 16 for _ in range(40)) + b"tail"
+
+
+def test_compression_round_trip():
+    """Test that every algorithm decompresses the data it compressed, and that
+    the blocks start on packet boundaries
+    """
+
+    for algorithm in BlockCompressor.ALGORITHMS:
+        compressor = BlockCompressor(algorithm, BLOCK_SIZE, CHUNK_SIZE)
+        compressed, table = compressor.compress(DATA)
+        blocks = BlockCompressor.get_blocks(table)
+
+        assert len(compressed) < len(DATA) / 4, algorithm
+        assert len(compressed) % CHUNK_SIZE == 0
+        assert len(blocks) == -(-len(DATA) // BLOCK_SIZE)
+        assert all(block.offset % CHUNK_SIZE == 0 for block in blocks)
+
+        assert compressor.decompress(compressed, table) == (DATA, 0)
+
+def test_lost_packet_damages_one_block():
+    """Test that a packet lost during a transfer without retransmission
+    only zero fills the block it belongs to
+    """
+
+    for algorithm in BlockCompressor.ALGORITHMS:
+        compressor = BlockCompressor(algorithm, BLOCK_SIZE, CHUNK_SIZE)
+        compressed, table = compressor.compress(DATA)
+        lost_block = BlockCompressor.get_blocks(table)[3]
+
+        tx_rx_pair = init_aes_txrx_pairs(compressed, chunk_size=CHUNK_SIZE)["ctr"]
+        tx_rx_pair.receiver.on_init_msg(tx_rx_pair.transmitter.gen_init_message())
+
+        for chunk in range(tx_rx_pair.transmitter.chunk_count):
+            msg = tx_rx_pair.transmitter.gen_tx_message()
+
+            if chunk == lost_block.offset // CHUNK_SIZE:
+                continue
+
+            try:
+                tx_rx_pair.receiver.on_data_rx(msg, True)
+            except Receiver.RxFailureException:
+                pass
+
+        decompressed, damaged = compressor.decompress(tx_rx_pair.receiver.received_data, table)
+        damaged_start = 3 * BLOCK_SIZE
+
+        assert damaged == 1, algorithm
+        assert decompressed[damaged_start:damaged_start + BLOCK_SIZE] == bytes(BLOCK_SIZE)
+        assert decompressed[:damaged_start] == DATA[:damaged_start]
+        assert decompressed[damaged_start + BLOCK_SIZE:] == DATA[damaged_start + BLOCK_SIZE:]
+
+def test_default_block_size_contains_loss(tmp_path):
+    """Test that with the default block size and packet size, a lossy transfer
+    without retransmission only damages a small part of the payload
+    """
+
+    data = DATA * 8
+    path = tmp_path / "payload.bin"
+    path.write_bytes(data)
+
+    for algorithm in BlockCompressor.ALGORITHMS:
+        communicator = Communicator(aes_modes_to_test=["ctr"], message_fail_rate_percent=2, seed=3,
+                                    save_outputs=False, payload=FileSource(str(path)), compression=algorithm)
+        results = communicator.test_aes_modes()
+
+        assert results["ctr"]["blocks_total"] >= 100, algorithm
+        assert 0 < results["ctr"]["blocks_damaged"] < results["ctr"]["blocks_total"] / 4, algorithm
+
+        damaged_bytes = sum(a != b for a, b in zip(communicator.decompressed_data, data))
+
+        assert damaged_bytes < len(data) / 4, algorithm
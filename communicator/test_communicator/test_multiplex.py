@@ -0,0 +1,53 @@
+"""Multiplexed link unit tests
+"""
+
+import os
+from ..multiplex import MultiplexedLink, LinkSession
+from ..channel import Channel, BernoulliLoss, Reordering
+from ..comm_protocol import init_aes_txrx_pairs
+
+CHUNK_SIZE = 64
+
+
+def test_multiplexed_link():
+    """Test that the frames of many sessions sharing a lossy, reordering link reach the right
+    receivers, and that sessions with equal weights get equal shares of the link
+    """
+
+    aes_modes = ("cbc", "ctr", "gcm", "gcm_packet")
+    data = [os.urandom(6000) for _ in aes_modes]
+
+    sessions = [LinkSession(session_id, init_aes_txrx_pairs(session_data, chunk_size=CHUNK_SIZE)[aes_mode])
+                for session_id, (aes_mode, session_data) in enumerate(zip(aes_modes, data))]
+
+    channel = Channel([BernoulliLoss(0.005), Reordering(0.01, 3)], seed=1)
+    stats = MultiplexedLink(channel, sessions).run()
+
+    for session, session_data, session_stats in zip(sessions, data, stats["sessions"]):
+        assert session_stats["passed"], session_stats
+        assert bytes(session.receiver.received_data) == session_data
+
+        session.transmitter.set_chunk(0)
+        assert session.transmitter.gen_tx_message()["session"] == session.session_id
+
+    assert sum(session_stats["frames_dropped"] for session_stats in stats["sessions"]) > 0
+    assert stats["unknown_frames"] == 0
+    assert stats["fairness"] > 0.95
+
+def test_weighted_sessions():
+    """Test that a backlogged session gets a share of the link proportional to its weight
+    """
+
+    data = os.urandom(16000)
+
+    sessions = [LinkSession(session_id, init_aes_txrx_pairs(data, chunk_size=CHUNK_SIZE)["ctr"], weight)
+                for session_id, weight in enumerate((1, 3))]
+
+    stats = MultiplexedLink(Channel([]), sessions).run()
+    light, heavy = stats["sessions"]
+
+    assert light["passed"] and heavy["passed"]
+    assert stats["utilization"] == 1.0
+
+    # The heavy session finishes after 4/3 of the time needed to transmit its data, the light one after 2
+    assert abs(heavy["completion_s"] / light["completion_s"] - 2 / 3) < 0.05
@@ -0,0 +1,38 @@
+"""Payload source unit tests
+"""
+
+import io
+import os
+from ..payload import FileSource, StdinSource, GeneratedSource
+
+DATA = os.urandom(10_000)
+
+
+def test_file_and_stdin_sources(tmp_path):
+    """Test that the file and standard input sources supply the data as it is
+    """
+
+    path = tmp_path / "payload.bin"
+    path.write_bytes(DATA)
+
+    file_source = FileSource(str(path))
+
+    for source in (file_source, StdinSource(io.BytesIO(DATA))):
+        assert source.get_size() == len(DATA)
+        assert source.get_buffer() == DATA
+        assert b"".join(source.iter_pieces()) == DATA
+
+    file_source.close()
+
+def test_generated_source():
+    """Test that the generated data has the right size, and is the same every time it is streamed
+    """
+
+    for kind in GeneratedSource.KINDS:
+        source = GeneratedSource(GeneratedSource.PIECE_SIZE + 10, kind, seed=1)
+
+        data = b"".join(source.iter_pieces())
+
+        assert source.get_buffer() is None
+        assert len(data) == source.get_size()
+        assert b"".join(source.iter_pieces()) == data
@@ -0,0 +1,50 @@
+"""Profiler unit tests
+"""
+
+import os
+from aes import AES
+from summarizer import Summarizer, Metrics
+from ..communicator import Communicator
+from ..comm_protocol import Receiver
+from ..payload import FileSource
+from ..profiler import Profiler
+
+
+def test_profiler(tmp_path):
+    """Test that the trial of every AES mode is profiled, that the hot paths are counted
+    and that the original methods are put back when the profiler is disabled
+    """
+
+    path = tmp_path / "payload.bin"
+    path.write_bytes(os.urandom(10_000))
+
+    save_folder = Summarizer.SAVE_FOLDER
+    on_data_rx, update = Receiver.on_data_rx, AES.update
+
+    Summarizer.SAVE_FOLDER = str(tmp_path)
+    Profiler.enable()
+
+    try:
+        assert Receiver.on_data_rx is not on_data_rx
+
+        communicator = Communicator(aes_modes_to_test=["cbc", "gcm_packet"], message_fail_rate_percent=5,
+                                    use_retransmission=True, chunk_size=64, seed=1, save_outputs=False,
+                                    payload=FileSource(str(path)))
+        results = communicator.test_aes_modes()
+    finally:
+        Profiler.enable(False)
+        Summarizer.SAVE_FOLDER = save_folder
+
+    assert Receiver.on_data_rx is on_data_rx and AES.update is update
+
+    for aes_mode in ("cbc", "gcm_packet"):
+        assert os.path.exists(tmp_path / aes_mode / Profiler.PSTATS_FILENAME)
+        assert "Hot paths" in (tmp_path / aes_mode / Profiler.REPORT_FILENAME).read_text()
+        assert results[aes_mode]["peak_memory_bytes"] > 0
+
+    # Counters hold the values of the last profiled AES mode
+    assert "Receiver._recover_by_padding" in Profiler.counters
+    assert Profiler.counters["PacketReceiver.on_data_rx"][0] > 0
+    assert Profiler.counters["PacketTransmitter.gen_tx_message"][0] > 0
+    assert Profiler.counters["Summarizer._new_evt"][0] > 0
+    assert Metrics.modes["gcm_packet"]["peak_memory_bytes"] > 0
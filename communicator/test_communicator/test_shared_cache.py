@@ -0,0 +1,55 @@
+"""Shared payload and ciphertext cache unit tests
+"""
+
+import io
+import os
+import pickle
+from aes import AES
+from ..comm_protocol import init_aes_txrx_pairs
+from ..payload import StdinSource, SharedMemorySource
+from ..shared_cache import CiphertextCache
+
+DATA = os.urandom(5000)
+
+CHUNK_SIZE = 64
+
+
+def test_shared_payload_and_ciphertext():
+    """Test that a pickled payload and cache attach to the same segments, and that a transmitter
+    using the same key takes the ciphertext from the cache instead of encrypting the data again
+    """
+
+    payload = SharedMemorySource.create(StdinSource(io.BytesIO(DATA)))
+    ciphertext_cache = CiphertextCache(payload.name)
+    key = AES.generate_secure_key()
+
+    try:
+        attached_payload = pickle.loads(pickle.dumps(payload))
+        attached_cache = pickle.loads(pickle.dumps(ciphertext_cache))
+
+        assert attached_payload.get_buffer() == DATA
+        assert not attached_payload.owner and not attached_cache.owner
+
+        owner_pairs = init_aes_txrx_pairs(payload.get_buffer(), chunk_size=CHUNK_SIZE,
+                                          key=key, ciphertext_cache=ciphertext_cache)
+        pairs = init_aes_txrx_pairs(attached_payload.get_buffer(), chunk_size=CHUNK_SIZE,
+                                    key=key, ciphertext_cache=attached_cache)
+
+        for aes_mode in ("ecb", "cbc", "ctr", "gcm"):
+            owner_pairs[aes_mode].transmitter.reset()
+
+            transmitter, receiver = pairs[aes_mode].transmitter, pairs[aes_mode].receiver
+
+            receiver.on_init_msg(transmitter.gen_init_message())
+
+            # Attached to the segment instead of encrypted again
+            assert isinstance(transmitter.encrypted_data, memoryview)
+            assert transmitter.encrypted_data == owner_pairs[aes_mode].transmitter.encrypted_data
+
+            while receiver.current_chunk < transmitter.chunk_count:
+                receiver.on_data_rx(transmitter.gen_tx_message())
+
+            assert bytes(receiver.received_data) == DATA, aes_mode
+    finally:
+        ciphertext_cache.close()
+        payload.close()
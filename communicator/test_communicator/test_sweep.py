@@ -0,0 +1,60 @@
+"""Parameter sweep unit tests
+"""
+
+import csv
+import numpy as np
+from PIL import Image
+from ..sweep import Sweep
+
+
+def test_grid_expansion():
+    """Test that every combination of the sweep parameters becomes a point, and that
+    only the modes that can be resynchronized are tested with every recovery
+    """
+
+    sweep = Sweep(fail_percents=[0, 1, 5], aes_modes=["ctr", "cbc"], seeds=[0, 1],
+                  recoveries=["zero", "resync"], packet_sizes=[None, 64])
+    points = sweep.get_points()
+
+    assert len(points) == 3 * 2 * 2 * (1 + 2)
+    assert len({(point["fail_percent"], point["aes_mode"], point["seed"], point["recovery"],
+                 point["packet_size"]) for point in points}) == len(points)
+    assert {point["recovery"] for point in points if point["aes_mode"] == "ctr"} == {"zero"}
+    assert {point["recovery"] for point in points if point["aes_mode"] == "cbc"} == {"zero", "resync"}
+
+    sweep.results = [{**point, "passed": True, "elapsed_s": 1.0,
+                      "packet_size": point["packet_size"] or 32} for point in points]
+
+    # pylint: disable=protected-access
+    assert sorted(sweep._get_series("elapsed_s")) == ["CBC resync 32 B", "CBC resync 64 B",
+                                                      "CBC zero 32 B", "CBC zero 64 B",
+                                                      "CTR 32 B", "CTR 64 B"]
+
+def test_sweep_results(tmp_path):
+    """Test that a small sweep runs every point and saves one results.csv row per point
+    """
+
+    image_path = tmp_path / "image.png"
+    pixels = np.random.default_rng(0).integers(0, 256, (32, 48, 3), dtype=np.uint8)
+    Image.fromarray(pixels).save(image_path)
+
+    sweep = Sweep(fail_percents=[0, 5], aes_modes=["ctr"], path_to_image=str(image_path),
+                  use_retransmission=True, workers=1)
+    results = sweep.run()
+
+    assert [row["fail_percent"] for row in results] == [0, 5]
+    assert all(row["passed"] for row in results)
+    assert results[0]["packets_dropped"] == 0 and results[1]["packets_dropped"] > 0
+
+    sweep.save(str(tmp_path / "sweep"))
+
+    with open(tmp_path / "sweep" / Sweep.RESULTS_FILENAME, newline="", encoding="utf-8") as F:
+        reader = csv.DictReader(F)
+        rows = list(reader)
+
+    assert tuple(reader.fieldnames) == Sweep.COLUMNS
+    assert [row["fail_percent"] for row in rows] == ["0", "5"]
+    assert all(row["aes_mode"] == "ctr" and row["passed"] == "True" for row in rows)
+
+    for filename, _ in Sweep.PLOTS.values():
+        assert (tmp_path / "sweep" / filename).exists()
@@ -0,0 +1,57 @@
+"""Packet trace unit tests
+"""
+
+import os
+from ..communicator import Communicator
+from ..payload import FileSource
+from ..trace import TraceReplayer, TraceFormat
+
+DATA = os.urandom(20_000)
+
+AES_MODES = ["cbc", "ctr", "gcm", "chacha20_packet"]
+
+
+def test_trace_replay(tmp_path):
+    """Test that replaying the recorded traces, without the transmitter and the channel,
+    leaves the receivers with exactly what they received during the recorded transfer
+    """
+
+    path = tmp_path / "payload.bin"
+    path.write_bytes(DATA)
+
+    for use_retransmission in (True, False):
+        trace_folder = tmp_path / f"traces_{use_retransmission}"
+
+        communicator = Communicator(aes_modes_to_test=AES_MODES, message_fail_rate_percent=3,
+                                    use_retransmission=use_retransmission, chunk_size=64, seed=2,
+                                    save_outputs=False, payload=FileSource(str(path)),
+                                    trace_folder=str(trace_folder), max_connection_resets=5)
+        results = communicator.test_aes_modes()
+
+        for aes_mode in AES_MODES:
+            replayer = TraceReplayer(str(trace_folder / f"{aes_mode}.trace"))
+            receiver = replayer.make_receiver()
+            stats = replayer.replay(receiver)
+
+            assert stats["aes_mode"] == aes_mode
+            assert stats["frames_dropped"] > 0
+            received = communicator.tx_rx_pairs[aes_mode].receiver.received_data
+
+            assert bytes(receiver.received_data) == bytes(received)
+
+            if use_retransmission and results[aes_mode]["passed"]:
+                assert bytes(receiver.received_data) == DATA, aes_mode
+
+def test_trace_format(tmp_path):
+    """Test that files that aren't traces are rejected
+    """
+
+    path = tmp_path / "invalid.trace"
+    path.write_bytes(TraceFormat.MAGIC + bytes([TraceFormat.VERSION + 1]))
+
+    try:
+        TraceReplayer(str(path))
+    except ValueError:
+        return
+
+    assert False
@@ -0,0 +1,301 @@
+"""Packet trace module. Used to record the frames a receiver gets during a transfer,
+and to replay them into a receiver without the transmitter and the channel.
+"""
+
+import time
+import struct
+import hashlib
+from enum import IntEnum
+from typing import BinaryIO
+from aes import AES
+from .comm_protocol import Receiver, init_aes_txrx_pairs
+
+
+class TraceFormat:
+    """Binary trace format. A trace starts with the magic and the version, followed by records.
+    Every record is a record type byte followed by a message: the number of fields, and for every
+    field the index of its name, the type of its value and the value. Field names are defined once,
+    by a FIELD record, the first time they are used. The first message is the header, which holds
+    the AES mode, the key and the receiver settings needed to replay the trace.
+    """
+
+    MAGIC = b"AESTRACE"
+    VERSION = 1
+
+    class RecordType(IntEnum):
+        """Type of a trace record
+        """
+
+        FIELD = 0
+        HEADER = 1
+        INIT = 2
+        DELIVER = 3
+        DELIVER_PADDED = 4
+        DROP = 5
+
+    class ValueType(IntEnum):
+        """Type of a message field value
+        """
+
+        INT = 0
+        BYTES = 1
+        STR = 2
+
+    RECORD = struct.Struct(">BB")
+    FIELD = struct.Struct(">BB")
+    INT = struct.Struct(">q")
+    LENGTH = struct.Struct(">I")
+
+
+class TraceRecorder:
+    """Writes the initialization messages and every frame, along with the channel's decision
+    to drop or deliver it, to a binary trace
+    """
+
+    def __init__(self, path: str, aes_mode: str, key: bytes, update_cipher_on_packet_drop=True,
+                 resync_on_packet_drop=False):
+        """
+        Args:
+            path (str): Path of the trace file
+            aes_mode (str): Name of the AES mode, as in init_aes_txrx_pairs
+            key (bytes): Key the AES mode was initialized with
+            update_cipher_on_packet_drop (bool, optional): Receiver setting. Defaults to True.
+            resync_on_packet_drop (bool, optional): Receiver setting. Defaults to False.
+        """
+
+        # pylint: disable=consider-using-with
+        self.file: BinaryIO = open(path, "wb")
+        self.field_indexes: dict[str, int] = {}
+
+        self.file.write(TraceFormat.MAGIC + bytes([TraceFormat.VERSION]))
+
+        self._write(TraceFormat.RecordType.HEADER, {
+            "aes_mode": aes_mode,
+            "key": key,
+            "aes_bit_length": AES.AES_BIT_LENGTH,
+            "update_cipher_on_packet_drop": update_cipher_on_packet_drop,
+            "resync_on_packet_drop": resync_on_packet_drop,
+        })
+
+    def on_init(self, msg: dict[str, int or str or bytes]):
+        """Record an initialization message, the receiver is reset before it processes it
+
+        Args:
+            msg (dict[str, int or str or bytes]): Initialization message
+        """
+
+        self._write(TraceFormat.RecordType.INIT, msg)
+
+    def on_deliver(self, msg: dict[str, int or bytes], pad_on_failure: bool):
+        """Record a frame delivered to the receiver
+
+        Args:
+            msg (dict[str, int or bytes]): TX message
+            pad_on_failure (bool): If the receiver pads the missing chunks
+        """
+
+        if pad_on_failure:
+            self._write(TraceFormat.RecordType.DELIVER_PADDED, msg)
+        else:
+            self._write(TraceFormat.RecordType.DELIVER, msg)
+
+    def on_drop(self, msg: dict[str, int or bytes]):
+        """Record a frame dropped by the channel
+
+        Args:
+            msg (dict[str, int or bytes]): TX message
+        """
+
+        self._write(TraceFormat.RecordType.DROP, msg)
+
+    def close(self):
+        """Close the trace file
+        """
+
+        self.file.close()
+
+    def _write(self, record_type: "TraceFormat.RecordType", msg: dict[str, int or str or bytes]):
+        """Write a record
+
+        Args:
+            record_type (TraceFormat.RecordType): Type of the record
+            msg (dict[str, int or str or bytes]): Message of the record
+        """
+
+        for name in msg:
+            if name not in self.field_indexes:
+                self.field_indexes[name] = len(self.field_indexes)
+                encoded = name.encode()
+
+                record = TraceFormat.RECORD.pack(TraceFormat.RecordType.FIELD, self.field_indexes[name])
+                self.file.write(record + bytes([len(encoded)]) + encoded)
+
+        self.file.write(TraceFormat.RECORD.pack(record_type, len(msg)))
+
+        for name, value in msg.items():
+            if isinstance(value, int):
+                self.file.write(TraceFormat.FIELD.pack(self.field_indexes[name], TraceFormat.ValueType.INT))
+                self.file.write(TraceFormat.INT.pack(value))
+                continue
+
+            if isinstance(value, str):
+                value_type, value = TraceFormat.ValueType.STR, value.encode()
+            else:
+                value_type = TraceFormat.ValueType.BYTES
+
+            self.file.write(TraceFormat.FIELD.pack(self.field_indexes[name], value_type))
+            self.file.write(TraceFormat.LENGTH.pack(len(value)))
+            self.file.write(value)
+
+
+class TraceReplayer:
+    """Feeds a recorded trace into a receiver, without the transmitter, the encryption and the
+    channel. The whole trace is parsed up front, so only the receiver is measured, which lets
+    receiver changes be benchmarked against exactly the same traffic.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path (str): Path of the trace file
+
+        Raises:
+            ValueError: Raised if the file isn't a trace of a supported version
+        """
+
+        with open(path, "rb") as file:
+            data = file.read()
+
+        preamble = TraceFormat.MAGIC + bytes([TraceFormat.VERSION])
+
+        if data[:len(preamble)] != preamble:
+            raise ValueError(f"{path} is not a version {TraceFormat.VERSION} trace")
+
+        self.records = self._parse(memoryview(data)[len(preamble):])
+
+        header_type, self.header = self.records.pop(0)
+
+        if header_type != TraceFormat.RecordType.HEADER:
+            raise ValueError(f"{path} has no header")
+
+    def make_receiver(self) -> Receiver:
+        """Create a receiver of the recorded AES mode, with the recorded key and settings.
+        Sets the AES bit length to the recorded one.
+
+        Returns:
+            Receiver: Receiver instance
+        """
+
+        AES.set_bit_length(self.header["aes_bit_length"])
+
+        tx_rx_pairs = init_aes_txrx_pairs(b"", None, bool(self.header["update_cipher_on_packet_drop"]),
+                                          resync_on_packet_drop=bool(self.header["resync_on_packet_drop"]),
+                                          key=self.header["key"])
+
+        return tx_rx_pairs[self.header["aes_mode"]].receiver
+
+    def replay(self, receiver: Receiver = None) -> dict[str, int or float or str]:
+        """Replay the trace
+
+        Args:
+            receiver (Receiver, optional): Receiver to replay the trace into. If None is supplied,
+            a new one will be made with TraceReplayer.make_receiver. Defaults to None.
+
+        Returns:
+            dict[str, int or float or str]: Statistics of the replay, along with a digest of the
+            received data, which changes if a receiver change alters what is received
+        """
+
+        receiver = receiver or self.make_receiver()
+
+        stats = {
+            "aes_mode": self.header["aes_mode"],
+            "frames": 0,
+            "frames_dropped": 0,
+            "initializations": 0,
+            "rx_failures": 0,
+            "bytes": 0,
+        }
+
+        start = time.perf_counter()
+
+        for record_type, msg in self.records:
+            if record_type == TraceFormat.RecordType.DROP:
+                stats["frames_dropped"] += 1
+                continue
+
+            if record_type == TraceFormat.RecordType.INIT:
+                receiver.reset()
+                receiver.on_init_msg(msg)
+                stats["initializations"] += 1
+                continue
+
+            stats["frames"] += 1
+            stats["bytes"] += len(msg["data"])
+
+            try:
+                receiver.on_data_rx(msg, record_type == TraceFormat.RecordType.DELIVER_PADDED)
+            except Receiver.RxFailureException:
+                # The recorded run already reacted to it, with the records that follow
+                stats["rx_failures"] += 1
+
+        elapsed_s = time.perf_counter() - start
+
+        stats.update({
+            "elapsed_s": elapsed_s,
+            "frames_per_second": stats["frames"] / elapsed_s if elapsed_s else 0.0,
+            "bytes_per_second": stats["bytes"] / elapsed_s if elapsed_s else 0.0,
+            "digest": hashlib.blake2b(receiver.received_data, digest_size=16).hexdigest(),
+        })
+
+        return stats
+
+    @staticmethod
+    def _parse(data: memoryview) -> list[tuple["TraceFormat.RecordType", dict[str, int or str or bytes]]]:
+        """Parse the records of a trace
+
+        Args:
+            data (memoryview): Trace, without the magic and the version
+
+        Returns:
+            list[tuple[TraceFormat.RecordType, dict[str, int or str or bytes]]]: Types and
+            messages of all of the records except the FIELD ones
+        """
+
+        records = []
+        field_names: dict[int, str] = {}
+        offset = 0
+
+        while offset < len(data):
+            record_type, count = TraceFormat.RECORD.unpack_from(data, offset)
+            offset += TraceFormat.RECORD.size
+
+            if record_type == TraceFormat.RecordType.FIELD:
+                field_names[count] = bytes(data[offset + 1:offset + 1 + data[offset]]).decode()
+                offset += 1 + data[offset]
+                continue
+
+            msg = {}
+
+            for _ in range(count):
+                index, value_type = TraceFormat.FIELD.unpack_from(data, offset)
+                offset += TraceFormat.FIELD.size
+
+                if value_type == TraceFormat.ValueType.INT:
+                    value = TraceFormat.INT.unpack_from(data, offset)[0]
+                    offset += TraceFormat.INT.size
+                else:
+                    length = TraceFormat.LENGTH.unpack_from(data, offset)[0]
+                    offset += TraceFormat.LENGTH.size
+
+                    value = bytes(data[offset:offset + length])
+                    offset += length
+
+                    if value_type == TraceFormat.ValueType.STR:
+                        value = value.decode()
+
+                msg[field_names[index]] = value
+
+            records.append((TraceFormat.RecordType(record_type), msg))
+
+        return records
@@ -0,0 +1,40 @@
+"""Pytest configuration. The performance regression suite is opt in, as it takes a few minutes.
+"""
+
+import pytest
+from benchmarks.perf_baselines import BASELINES_PATH
+
+
+def pytest_addoption(parser: pytest.Parser):
+    group = parser.getgroup("perf", "performance regression suite")
+
+    group.addoption("--perf",
+                    action="store_true",
+                    help="Run the performance regression suite")
+
+    group.addoption("--perf-tolerance",
+                    type=float,
+                    help="Allowed regression against the baselines, as a fraction of the baseline",
+                    default=None)
+
+    group.addoption("--perf-baselines",
+                    type=str,
+                    help="JSON file with the baselines",
+                    default=BASELINES_PATH)
+
+    group.addoption("--perf-update-baselines",
+                    action="store_true",
+                    help="Store the measured values as the new baselines instead of comparing them")
+
+def pytest_configure(config: pytest.Config):
+    config.addinivalue_line("markers", "perf: performance regression test, only run with --perf")
+
+def pytest_collection_modifyitems(config: pytest.Config, items: list[pytest.Item]):
+    if config.getoption("--perf") or config.getoption("--perf-update-baselines"):
+        return
+
+    skip = pytest.mark.skip(reason="performance test, run with --perf")
+
+    for item in items:
+        if "perf" in item.keywords:
+            item.add_marker(skip)
@@ -2,3 +2,4 @@
 """
 
 from .image_helper import ImageHelper
+from .image_writer import ImageWriter
@@ -3,6 +3,7 @@ and deserialization.
 """
 
 import os
+from typing import Iterator
 from PIL import Image
 import numpy as np
 from summarizer import Summarizer
@@ -15,6 +16,10 @@ class ImageHelper:
 
     EXAMPLE_IMAGE_PATH = os.path.join(os.path.dirname(__file__), "example.jpg")
 
+    CHANNEL_MODES = {1: "L", 2: "LA", 3: "RGB", 4: "RGBA"}
+
+    IMAGE_FORMATS = {"png": ".png", "bmp": ".bmp", "raw": ".raw"}
+
     @classmethod
     def load_image(cls, path: str, copy_to_output_folder=False) -> Image:
         """Load an image
@@ -30,13 +35,87 @@ class ImageHelper:
 
         img = Image.open(path)
 
-        os.makedirs(Summarizer.SAVE_FOLDER, exist_ok=True)
-
         if copy_to_output_folder:
+            os.makedirs(Summarizer.SAVE_FOLDER, exist_ok=True)
             img.save(os.path.join(Summarizer.SAVE_FOLDER, "loaded_image.png"), subsampling=0, quality=100)
 
         return img
 
+    @classmethod
+    def get_image_geometry(cls, path: str) -> tuple[int, int, int]:
+        """Get the size of an image without decoding it
+
+        Args:
+            path (str): Path to the image
+
+        Returns:
+            tuple[int, int, int]: Width, height and number of channels of the image
+        """
+
+        with Image.open(path) as img:
+            return img.width, img.height, len(img.mode)
+
+    @classmethod
+    def iter_image_bands(cls, path: str, band_rows: int) -> Iterator[bytes]:
+        """Serialize an image in bands of rows, in the same layout as ImageHelper.image_to_bytes.
+
+        Uncompressed images stored row by row (such as PPM/PGM or TIFF without compression)
+        are read straight from the file one band at a time, so memory use is bounded by
+        the band size. Any other format is decoded once and then sliced into bands.
+
+        Args:
+            path (str): Path to the image
+            band_rows (int): Number of rows in each band
+
+        Yields:
+            Iterator[bytes]: Serialized bands, from the top of the image to the bottom
+        """
+
+        with Image.open(path) as img:
+            row_size = img.width * len(img.mode)
+            offset = cls._get_raw_data_offset(img)
+
+            if offset is not None:
+                with open(path, "rb") as F:
+                    F.seek(offset)
+
+                    for top in range(0, img.height, band_rows):
+                        yield F.read(row_size * min(band_rows, img.height - top))
+
+                return
+
+            for top in range(0, img.height, band_rows):
+                yield img.crop((0, top, img.width, min(top + band_rows, img.height))).tobytes()
+
+    @classmethod
+    def _get_raw_data_offset(cls, image: Image) -> int or None:
+        """Check if the pixels of an opened image are stored uncompressed,
+        row by row and without padding, in the same layout as ImageHelper.image_to_bytes
+
+        Args:
+            image (Image): Opened, not yet loaded PIL Image instance
+
+        Returns:
+            int or None: Offset of the pixels in the file, or None if the pixels
+            have to be decoded
+        """
+
+        if len(image.tile) != 1:
+            return None
+
+        codec_name, extents, offset, args = image.tile[0]
+
+        if isinstance(args, str):
+            args = (args, 0, 1)
+
+        rawmode, stride, orientation = (*args, 0, 1)[:3]
+
+        if codec_name != "raw" or tuple(extents) != (0, 0, image.width, image.height) or \
+           rawmode != image.mode or stride not in (0, image.width * len(image.mode)) or orientation != 1:
+            return None
+
+        return offset
+
     @classmethod
     def get_default_image(cls) -> Image:
         """Loads the image located in ImageHelper.EXAMPLE_IMAGE_PATH path
@@ -58,13 +137,29 @@ class ImageHelper:
             bytes: Serialized image
         """
 
-        return bytes(np.array(image).flatten())
+        return image.tobytes()
+
+    @classmethod
+    def image_to_buffer(cls, image: Image) -> memoryview:
+        """Expose the pixels of an Image instance as a flat, contiguous buffer.
+        The pixel data is copied only once, out of PIL's internal storage.
+
+        Args:
+            image (Image): PIL Image instance
+
+        Returns:
+            memoryview: Read-only serialized image
+        """
+
+        return memoryview(np.asarray(image)).cast("B")
 
     @classmethod
     def _bytes_to_image(cls, data: bytes, width: int,
                         height: int, channels: int) -> Image:
         """Deserialize an raw image buffer .
 
+        The returned image shares its memory with the supplied data.
+
         Args:
             data (bytes): Serialized image
             width (int): Width of the serialized image
@@ -72,17 +167,89 @@ class ImageHelper:
             channels (int): Number of channels the serialized image has
 
         Returns:
-            bytes: deserialized image
+            Image: deserialized image
+        """
+
+        mode = cls.CHANNEL_MODES[channels]
+        data = memoryview(data)[:width * height * channels]
+
+        return Image.frombuffer(mode, (width, height), data, "raw", mode, 0, 1)
+
+    @classmethod
+    def get_preview(cls, data: bytes, width: int, height: int,
+                    channels: int, stride: int) -> np.ndarray:
+        """Downscale a serialized image, which may be only partially filled in,
+        by taking every stride-th pixel of every stride-th row. The pixels are
+        picked through a strided view, so only the preview itself is copied.
+
+        Args:
+            data (bytes): Serialized image, or the first part of it
+            width (int): Width of the serialized image
+            height (int): Height of the serialized image
+            channels (int): Number of channels the serialized image has
+            stride (int): Downscaling factor
+
+        Returns:
+            np.ndarray: Preview with the shape (height, width, channels). Rows
+            missing from the data are left black.
+        """
+
+        rows = min(memoryview(data).nbytes // (width * channels), height)
+
+        pixels = np.frombuffer(data, dtype=np.uint8, count=rows * width * channels)
+        view = pixels.reshape(rows, width, channels)[::stride, ::stride]
+
+        preview = np.zeros((-(-height // stride), -(-width // stride), channels), dtype=np.uint8)
+        preview[:view.shape[0]] = view
+
+        return preview
+
+    @classmethod
+    def save_raw_file_as_image(cls, raw_path: str, path: str, width: int, height: int,
+                               channels: int, image_format="png", compress_level: int = None):
+        """Save a file holding a serialized image as a proper image.
+        The file is memory mapped instead of being read into memory.
+
+        Args:
+            raw_path (str): Path to the file with the serialized image
+            path (str): Path to save it to
+            width (int): Width of the serialized image
+            height (int): Height of the serialized image
+            channels (int): Number of channels the serialized image has
+            image_format (str, optional): One of ImageHelper.IMAGE_FORMATS. Defaults to "png".
+            compress_level (int, optional): PNG compression level, from 0 to 9. If None is supplied,
+            the PIL default will be used. Defaults to None.
         """
 
-        data = data[:width * height * channels]
+        if image_format == "raw" and \
+           os.path.abspath(cls.get_output_path(path, image_format)) == os.path.abspath(raw_path):
+            return
+
+        data = np.memmap(raw_path, dtype=np.uint8, mode="r", shape=(width * height * channels,))
+
+        cls.save_bytes_as_image(data, path, width, height, channels, image_format, compress_level)
 
-        data = np.frombuffer(data, dtype=np.uint8).reshape((height, width, channels))
-        return Image.fromarray(data)
+        del data
 
     @classmethod
-    def save_bytes_as_image(cls, data: bytes, path: str, width: int,
-                            height: int, channels: int):
+    def get_output_path(cls, path: str, image_format="png") -> str:
+        """Get the path in the output folder an image will be saved to
+
+        Args:
+            path (str): Path relative to the output folder. Its extension is replaced
+            with the one of the image format.
+            image_format (str, optional): One of ImageHelper.IMAGE_FORMATS. Defaults to "png".
+
+        Returns:
+            str: Path of the saved image
+        """
+
+        return os.path.join(Summarizer.SAVE_FOLDER,
+                            os.path.splitext(path)[0] + cls.IMAGE_FORMATS[image_format])
+
+    @classmethod
+    def save_bytes_as_image(cls, data: bytes, path: str, width: int, height: int,
+                            channels: int, image_format="png", compress_level: int = None):
         """Save serialized image as a proper image.
 
         Args:
@@ -91,13 +258,25 @@ class ImageHelper:
             width (int): Width of the serialized image
             height (int): Height of the serialized image
             channels (int): Number of channels the serialized image has
+            image_format (str, optional): One of ImageHelper.IMAGE_FORMATS. The "raw" format
+            writes the serialized image as is. Defaults to "png".
+            compress_level (int, optional): PNG compression level, from 0 to 9. If None is supplied,
+            the PIL default will be used. Defaults to None.
         """
 
-        path = os.path.join(Summarizer.SAVE_FOLDER, path)
+        path = cls.get_output_path(path, image_format)
 
         os.makedirs(os.path.dirname(path), exist_ok=True)
 
+        if image_format == "raw":
+            with open(path, "wb") as F:
+                F.write(memoryview(data)[:width * height * channels])
+
+            return
+
         img = cls._bytes_to_image(data, width, height, channels)
-        img.putalpha(255)
 
-        img.save(path, subsampling=0, quality=100)
+        if image_format == "png" and compress_level is not None:
+            img.save(path, compress_level=compress_level)
+        else:
+            img.save(path)
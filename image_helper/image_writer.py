@@ -0,0 +1,131 @@
+"""Background image writer module. Used to take image encoding
+off the critical path of the communication.
+"""
+
+import os
+import atexit
+from concurrent.futures import ThreadPoolExecutor, Future
+from summarizer import Summarizer
+from .image_helper import ImageHelper
+
+
+class ImageWriter:
+    """Background image writer class. Images are encoded and saved by a pool of
+    worker threads, and all of the pending writes are flushed at program exit.
+    """
+
+    WORKERS = 2
+
+    image_format = "png"
+    compress_level: int = None
+
+    executor: ThreadPoolExecutor = None
+    pending: list[Future] = []
+
+    @classmethod
+    def set_format(cls, image_format="png", compress_level: int = None):
+        """Set the format the images are saved in
+
+        Args:
+            image_format (str, optional): One of ImageHelper.IMAGE_FORMATS. Defaults to "png".
+            compress_level (int, optional): PNG compression level, from 0 (fastest) to 9 (smallest).
+            If None is supplied, the PIL default will be used. Defaults to None.
+        """
+
+        assert image_format in ImageHelper.IMAGE_FORMATS
+        assert compress_level is None or 0 <= compress_level <= 9
+
+        cls.image_format = image_format
+        cls.compress_level = compress_level
+
+    @classmethod
+    def save_bytes_as_image(cls, data: bytes, path: str, width: int,
+                            height: int, channels: int):
+        """Save serialized image as a proper image in the background.
+        The data must not be modified until the image is saved.
+
+        Args:
+            data (bytes): Serialized image
+            path (str): Path to save it to
+            width (int): Width of the serialized image
+            height (int): Height of the serialized image
+            channels (int): Number of channels the serialized image has
+        """
+
+        cls._submit(ImageHelper.save_bytes_as_image, data, path, width, height, channels,
+                    cls.image_format, cls.compress_level)
+
+    @classmethod
+    def save_raw_file_as_image(cls, raw_path: str, path: str, width: int,
+                               height: int, channels: int):
+        """Save a file holding a serialized image as a proper image in the background.
+        The file must not be modified until the image is saved.
+
+        Args:
+            raw_path (str): Path to the file with the serialized image
+            path (str): Path to save it to
+            width (int): Width of the serialized image
+            height (int): Height of the serialized image
+            channels (int): Number of channels the serialized image has
+        """
+
+        cls._submit(ImageHelper.save_raw_file_as_image, raw_path, path, width, height, channels,
+                    cls.image_format, cls.compress_level)
+
+    @classmethod
+    def save_bytes(cls, data: bytes, path: str):
+        """Save data as it is in the background.
+        The data must not be modified until it is saved.
+
+        Args:
+            data (bytes): Data to save
+            path (str): Path to save it to, relative to the output folder
+        """
+
+        cls._submit(cls._write_bytes, data, path)
+
+    @classmethod
+    def flush(cls):
+        """Wait for all of the pending writes to finish
+
+        Raises:
+            Exception: Any exception raised while saving an image
+        """
+
+        pending, cls.pending = cls.pending, []
+
+        for future in pending:
+            future.result()
+
+    @classmethod
+    def _write_bytes(cls, data: bytes, path: str):
+        """Save data as it is
+
+        Args:
+            data (bytes): Data to save
+            path (str): Path to save it to, relative to the output folder
+        """
+
+        path = os.path.join(Summarizer.SAVE_FOLDER, path)
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        with open(path, "wb") as F:
+            F.write(data)
+
+    @classmethod
+    def _submit(cls, function, *args):
+        """Submit a write job to the worker threads
+
+        Args:
+            function (Callable): Function that saves the image
+            args: Arguments of the function
+        """
+
+        if cls.executor is None:
+            cls.executor = ThreadPoolExecutor(max_workers=cls.WORKERS, thread_name_prefix="ImageWriter")
+            atexit.register(cls.flush)
+
+        # Finished jobs are dropped, so that the list doesn't grow
+        cls.pending = [future for future in cls.pending if not future.done() or future.exception()]
+        cls.pending.append(cls.executor.submit(function, *args))
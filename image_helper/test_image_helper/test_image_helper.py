@@ -2,7 +2,9 @@
 """
 
 from PIL import Image
+from summarizer import Summarizer
 from ..image_helper import ImageHelper
+from ..image_writer import ImageWriter
 
 IMAGE_DIM_X = 100
 IMAGE_DIM_Y = 100
@@ -31,3 +33,68 @@ def test_image_deserialization():
                                                       IMAGE_DIM_X,
                                                       IMAGE_DIM_Y,
                                                       IMAGE_CHANNELS)
+
+def test_image_buffer():
+    """Test ImageHelper zero-copy Image serialization and deserialization
+    """
+
+    buffer = ImageHelper.image_to_buffer(WHITE_IMAGE)
+
+    assert buffer.c_contiguous
+    assert buffer == SERIALIZED_IMAGE
+
+    # pylint: disable=protected-access
+    assert WHITE_IMAGE == ImageHelper._bytes_to_image(buffer,
+                                                      IMAGE_DIM_X,
+                                                      IMAGE_DIM_Y,
+                                                      IMAGE_CHANNELS)
+
+def test_image_bands(tmp_path):
+    """Test ImageHelper band serialization, both read directly from
+    an uncompressed image and from a decoded one
+    """
+
+    image = Image.new("RGB", (7, 11))
+    image.putdata([(i, i * 2 % 256, i * 3 % 256) for i in range(7 * 11)])
+
+    for filename in ("image.ppm", "image.png"):
+        path = str(tmp_path / filename)
+        image.save(path)
+
+        bands = list(ImageHelper.iter_image_bands(path, 4))
+
+        assert [len(band) for band in bands] == [7 * 4 * 3, 7 * 4 * 3, 7 * 3 * 3]
+        assert b"".join(bands) == ImageHelper.image_to_bytes(image)
+        assert ImageHelper.get_image_geometry(path) == (7, 11, 3)
+
+def test_image_writer(tmp_path, monkeypatch):
+    """Test saving images in the background, in every format
+    """
+
+    monkeypatch.setattr(Summarizer, "SAVE_FOLDER", str(tmp_path))
+
+    for image_format in ImageHelper.IMAGE_FORMATS:
+        ImageWriter.set_format(image_format, 0)
+        ImageWriter.save_bytes_as_image(SERIALIZED_IMAGE, "image.png",
+                                        IMAGE_DIM_X, IMAGE_DIM_Y, IMAGE_CHANNELS)
+
+    ImageWriter.flush()
+    ImageWriter.set_format()
+
+    assert (tmp_path / "image.raw").read_bytes() == SERIALIZED_IMAGE
+
+    for extension in (".png", ".bmp"):
+        with Image.open(tmp_path / f"image{extension}") as image:
+            assert image.tobytes() == SERIALIZED_IMAGE
+
+def test_image_preview():
+    """Test ImageHelper previews of a partially received image
+    """
+
+    partial_image = SERIALIZED_IMAGE[:IMAGE_DIM_X * IMAGE_CHANNELS * IMAGE_DIM_Y // 2]
+
+    preview = ImageHelper.get_preview(partial_image, IMAGE_DIM_X, IMAGE_DIM_Y, IMAGE_CHANNELS, 3)
+
+    assert preview.shape == (34, 34, IMAGE_CHANNELS)
+    assert (preview[:17] == IMAGE_COLOR).all()
+    assert (preview[17:] == 0).all()
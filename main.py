@@ -2,8 +2,11 @@
 """
 
 import argparse
-from communicator import Communicator
+import logging
+from communicator import Communicator, Channel, FileSource, StdinSource, GeneratedSource, Profiler
 from aes import AES
+from summarizer import Metrics, SimulationClock
+from image_helper import ImageWriter
 
 
 def parse_args() -> argparse.Namespace:
@@ -40,6 +43,14 @@ def parse_args() -> argparse.Namespace:
                     required=False,
                     default=True)
 
+    arg.add_argument("--resync-on-packet-drop",
+                    action=argparse.BooleanOptionalAction,
+                    help="Send the previous ciphertext block with every packet, so that the CBC and CFB"
+                    " receivers can resynchronize on it instead of updating their ciphers with zero's"
+                    " when a dropped packet is detected",
+                    required=False,
+                    default=False)
+
     arg.add_argument("--aes-bit-length",
                     type=int,
                     help="AES bit length",
@@ -50,10 +61,163 @@ def parse_args() -> argparse.Namespace:
     arg.add_argument("--aes-alg",
                     type=str,
                     help="AES algorithm to test. This argument can be provided multiple times.",
-                    choices=["ecb", "cbc", "cfb", "ofb", "ctr", "gcm"],
+                    choices=["ecb", "cbc", "cfb", "ofb", "ctr", "xts", "gcm", "gcm_packet",
+                             "chacha20_packet"],
                     action="append",
                     required=False)
 
+    arg.add_argument("--burst-length",
+                    type=float,
+                    help="Average number of consecutively dropped packets. If set, packets are dropped "
+                    "in bursts (Gilbert-Elliott channel) instead of independently",
+                    required=False,
+                    default=None)
+
+    arg.add_argument("--latency-ms",
+                    type=float,
+                    help="One way channel latency in milliseconds",
+                    required=False,
+                    default=0.0)
+
+    arg.add_argument("--jitter-ms",
+                    type=float,
+                    help="Maximal additional random one way channel latency in milliseconds",
+                    required=False,
+                    default=0.0)
+
+    arg.add_argument("--reorder-percent",
+                    type=float,
+                    help="Packet reordering percentage",
+                    required=False,
+                    default=0.0)
+
+    arg.add_argument("--reorder-depth",
+                    type=int,
+                    help="How many packets a reordered packet is delayed by",
+                    required=False,
+                    default=1)
+
+    arg.add_argument("--duplicate-percent",
+                    type=float,
+                    help="Packet duplication percentage",
+                    required=False,
+                    default=0.0)
+
+    arg.add_argument("--seed",
+                    type=int,
+                    help="Seed for the channel, used to make the packet drops reproducible",
+                    required=False,
+                    default=None)
+
+    arg.add_argument("--bandwidth-kbps",
+                    type=float,
+                    help="Link bandwidth in kilobits per second, used by the simulation clock",
+                    required=False,
+                    default=None)
+
+    arg.add_argument("--virtual-clock",
+                    action=argparse.BooleanOptionalAction,
+                    help="Measure modeled link time (bandwidth, latency and round trips) "
+                    "instead of the time spent running the simulation",
+                    required=False,
+                    default=False)
+
+    arg.add_argument("--metrics-interval",
+                    type=float,
+                    help="How often, in seconds, the live metrics files in the output folder are rewritten",
+                    required=False,
+                    default=1.0)
+
+    arg.add_argument("--tile-rows",
+                    type=int,
+                    help="Read and transmit the image in bands of this many rows, writing the received "
+                    "data to disk. Used to keep the memory use bounded for very large images",
+                    required=False,
+                    default=None)
+
+    arg.add_argument("--image-format",
+                    type=str,
+                    help="Format the received images are saved in. The raw format is the fastest to write",
+                    choices=["png", "bmp", "raw"],
+                    required=False,
+                    default="png")
+
+    arg.add_argument("--compress-level",
+                    type=int,
+                    help="PNG compression level, from 0 (fastest) to 9 (smallest)",
+                    choices=range(10),
+                    required=False,
+                    default=None)
+
+    arg.add_argument("--compression",
+                    type=str,
+                    help="Compress the payload before encryption, in blocks that are "
+                    "decompressed independently",
+                    choices=["zlib", "lzma"],
+                    required=False,
+                    default=None)
+
+    arg.add_argument("--compression-block-size",
+                    type=int,
+                    help="Size of the uncompressed blocks in bytes. Defaults to 16 packets worth of data",
+                    required=False,
+                    default=None)
+
+    arg.add_argument("--record-trace",
+                    type=str,
+                    help="Record the frames of every AES mode to <folder>/<aes mode>.trace, for replay.py",
+                    required=False,
+                    default=None)
+
+    arg.add_argument("--profile",
+                    action="store_true",
+                    help="Profile every AES mode with cProfile and tracemalloc, writing profile.pstats and "
+                    "profile.txt to its output folder, and count the calls and time of the hot paths",
+                    required=False)
+
+    arg.add_argument("--preview-percent",
+                    type=float,
+                    help="Save a downscaled preview of the partially received image every time "
+                    "this percentage of it is received",
+                    required=False,
+                    default=None)
+
+    arg.add_argument("--preview-interval",
+                    type=float,
+                    help="Save a downscaled preview of the partially received image every this many seconds",
+                    required=False,
+                    default=None)
+
+    arg.add_argument("--preview-size",
+                    type=int,
+                    help="Maximal width and height of the previews",
+                    required=False,
+                    default=None)
+
+    arg.add_argument("--payload-file",
+                    type=str,
+                    help="Transmit a file of any kind instead of an image",
+                    required=False,
+                    default=None)
+
+    arg.add_argument("--payload-stdin",
+                    action="store_true",
+                    help="Transmit the data read from the standard input instead of an image",
+                    required=False)
+
+    arg.add_argument("--payload-generate",
+                    type=int,
+                    help="Transmit this many bytes of generated data instead of an image",
+                    required=False,
+                    default=None)
+
+    arg.add_argument("--payload-kind",
+                    type=str,
+                    help="Kind of the generated data",
+                    choices=["random", "compressible", "zeros"],
+                    required=False,
+                    default="random")
+
     return arg.parse_args()
 
 def main():
@@ -62,13 +226,48 @@ def main():
 
     args = parse_args()
 
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
     AES.set_bit_length(args.aes_bit_length)
+    Metrics.set_write_interval(args.metrics_interval)
+    SimulationClock.enable(args.virtual_clock)
+    Profiler.enable(args.profile)
+    ImageWriter.set_format(args.image_format, args.compress_level)
+
+    channel = Channel.from_settings(loss_rate=args.fail_percent / 100,
+                                    seed=args.seed,
+                                    mean_burst_length=args.burst_length,
+                                    delay_s=args.latency_ms / 1000,
+                                    jitter_s=args.jitter_ms / 1000,
+                                    reorder_rate=args.reorder_percent / 100,
+                                    reorder_depth=args.reorder_depth,
+                                    duplication_rate=args.duplicate_percent / 100,
+                                    bandwidth_bps=args.bandwidth_kbps * 1000 if args.bandwidth_kbps else None)
+
+    if args.payload_file:
+        payload = FileSource(args.payload_file)
+    elif args.payload_stdin:
+        payload = StdinSource()
+    elif args.payload_generate is not None:
+        payload = GeneratedSource(args.payload_generate, args.payload_kind, args.seed or 0)
+    else:
+        payload = None
 
     Communicator(message_fail_rate_percent=args.fail_percent,
                  aes_modes_to_test=args.aes_alg,
                  path_to_image=args.image_path,
                  use_retransmission=args.use_retransmission,
-                 update_cipher_on_packet_drop=args.update_cipher_on_packet_drop).test_aes_modes()
+                 update_cipher_on_packet_drop=args.update_cipher_on_packet_drop,
+                 resync_on_packet_drop=args.resync_on_packet_drop,
+                 channel=channel,
+                 tile_rows=args.tile_rows,
+                 preview_step_percent=args.preview_percent,
+                 preview_interval_s=args.preview_interval,
+                 preview_max_size=args.preview_size,
+                 payload=payload,
+                 compression=args.compression,
+                 compression_block_size=args.compression_block_size,
+                 trace_folder=args.record_trace).test_aes_modes()
 
 if __name__ == "__main__":
     main()
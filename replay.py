@@ -0,0 +1,55 @@
+"""AES Encrypted Volatile Communication trace replay file. Feeds traces recorded with
+--record-trace into the receivers at full speed, without the transmitter and the channel.
+"""
+
+import argparse
+from communicator import TraceReplayer
+
+
+def parse_args() -> argparse.Namespace:
+    """Builds CLI argument list and parses it
+
+    Returns:
+        argparse.Namespace: Parsed arguments
+    """
+
+    arg = argparse.ArgumentParser()
+
+    arg.add_argument("traces",
+                    type=str,
+                    nargs="+",
+                    help="Trace files to replay")
+
+    arg.add_argument("--repeat",
+                    type=int,
+                    help="Number of replays of every trace, the fastest one is reported",
+                    required=False,
+                    default=5)
+
+    return arg.parse_args()
+
+def main():
+    """AES Encrypted Volatile Communication trace replay entry point.
+    """
+
+    args = parse_args()
+
+    print(f"{'trace':<32}{'mode':<18}{'frames':>9}{'dropped':>9}{'inits':>7}"
+          f"{'frames/s':>12}{'MiB/s':>9}  digest")
+
+    for path in args.traces:
+        replayer = TraceReplayer(path)
+        best = None
+
+        for _ in range(args.repeat):
+            stats = replayer.replay()
+
+            if best is None or stats["elapsed_s"] < best["elapsed_s"]:
+                best = stats
+
+        print(f"{path[-32:]:<32}{best['aes_mode']:<18}{best['frames']:>9}{best['frames_dropped']:>9}"
+              f"{best['initializations']:>7}{best['frames_per_second']:>12.0f}"
+              f"{best['bytes_per_second'] / (1 << 20):>9.1f}  {best['digest']}")
+
+if __name__ == "__main__":
+    main()
@@ -3,3 +3,6 @@
 
 from .summarizer import Summarizer
 from .visualizer import Visualizer
+from .metrics import Metrics, RateLimitFilter
+from .clock import SimulationClock
+from .quality import QualityMetrics
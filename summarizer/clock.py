@@ -0,0 +1,45 @@
+"""Simulation clock module. Used to measure modeled link time
+instead of the time spent running the simulation.
+"""
+
+
+class SimulationClock:
+    """Discrete event simulation clock. The communicator advances it by the modeled
+    duration of every transmission, drop, retransmission and connection reset.
+    When enabled, the Summarizer and Metrics timestamps are taken from it.
+    """
+
+    enabled = False
+    now_s = 0.0
+
+    @classmethod
+    def enable(cls, enabled=True):
+        """Enable or disable the simulation clock. Must be called before
+        the Summarizer is started.
+
+        Args:
+            enabled (bool, optional): Use the simulation clock for timestamps. Defaults to True.
+        """
+
+        cls.enabled = enabled
+        cls.now_s = 0.0
+
+    @classmethod
+    def advance(cls, duration_s: float):
+        """Advance the simulation clock
+
+        Args:
+            duration_s (float): Modeled duration in seconds
+        """
+
+        cls.now_s += duration_s
+
+    @classmethod
+    def get_time(cls) -> float:
+        """Get the current simulation time
+
+        Returns:
+            float: Simulation time in seconds
+        """
+
+        return cls.now_s
@@ -0,0 +1,292 @@
+"""Live transfer metrics module. Metrics are kept up to date during
+the transfer and periodically written to the output folder.
+"""
+
+import os
+import json
+import time
+import logging
+from typing import Callable
+
+
+class Metrics:
+    """Live transfer metrics class. The metrics of every tested AES mode are
+    periodically rewritten as both a JSON file and a Prometheus text file.
+    """
+
+    JSON_FILENAME = "metrics.json"
+    PROMETHEUS_FILENAME = "metrics.prom"
+    PROMETHEUS_PREFIX = "aes_comm"
+
+    WRITE_INTERVAL_S = 1.0
+
+    COUNTERS = (
+        "packets_transmitted",
+        "packets_dropped",
+        "packets_retransmitted",
+        "connection_resets",
+    )
+
+    output_folder: str = None
+    current_aes_mode: str = None
+    modes: dict[str, dict[str, int or float or bool]] = {}
+    clock: Callable[[], float] = time.perf_counter
+
+    _next_write = 0.0
+
+    @classmethod
+    def set_write_interval(cls, interval_s: float):
+        """Set how often the metrics files are rewritten.
+
+        Args:
+            interval_s (float): Interval in seconds. If set to 0, the files
+            will be rewritten on every update.
+        """
+
+        cls.WRITE_INTERVAL_S = interval_s
+
+    @classmethod
+    def start(cls, aes_mode: str, output_folder: str, clock: Callable[[], float] = None):
+        """Start collecting metrics for an AES mode
+
+        Args:
+            aes_mode (str): Name of the AES mode currently being tested
+            output_folder (str): Folder where the metrics files will be written
+            clock (Callable[[], float], optional): Clock used to measure elapsed time and rates.
+            If None is supplied, the performance counter will be used. Defaults to None.
+        """
+
+        cls.clock = clock or time.perf_counter
+        cls.output_folder = output_folder
+        cls.current_aes_mode = aes_mode
+
+        metrics = {counter: 0 for counter in cls.COUNTERS}
+        metrics["bytes_received"] = 0
+        metrics["bytes_total"] = 0
+        metrics["link_delay_s"] = 0.0
+        metrics["started_at"] = cls.clock()
+        metrics["elapsed_s"] = 0.0
+        metrics["finished"] = False
+
+        cls.modes[aes_mode] = metrics
+        cls._next_write = 0.0
+
+    @classmethod
+    def increment(cls, counter: str):
+        """Increment one of the Metrics.COUNTERS counters of the current AES mode
+
+        Args:
+            counter (str): Name of the counter
+        """
+
+        cls.modes[cls.current_aes_mode][counter] += 1
+        cls._maybe_write()
+
+    @classmethod
+    def add(cls, name: str, value: float):
+        """Add a value to one of the accumulated metrics of the current AES mode
+
+        Args:
+            name (str): Name of the metric
+            value (float): Value to add
+        """
+
+        cls.modes[cls.current_aes_mode][name] += value
+
+    @classmethod
+    def update(cls, values: dict[str, int or float]):
+        """Set metrics of the current AES mode
+
+        Args:
+            values (dict[str, int or float]): Metric names mapped to their values
+        """
+
+        cls.modes[cls.current_aes_mode].update(values)
+        cls._maybe_write()
+
+    @classmethod
+    def on_progress(cls, bytes_received: int, bytes_total: int):
+        """Update the reception progress of the current AES mode
+
+        Args:
+            bytes_received (int): How many bytes the receiver has received so far
+            bytes_total (int): How many bytes the receiver has to receive in total
+        """
+
+        metrics = cls.modes[cls.current_aes_mode]
+        metrics["bytes_received"] = bytes_received
+        metrics["bytes_total"] = bytes_total
+
+        cls._maybe_write()
+
+    @classmethod
+    def end(cls):
+        """Stop collecting metrics for the current AES mode and write
+        the final values.
+        """
+
+        metrics = cls.modes[cls.current_aes_mode]
+        metrics["elapsed_s"] = cls.clock() - metrics["started_at"]
+        metrics["finished"] = True
+
+        cls.write()
+
+    @classmethod
+    def get_snapshot(cls, aes_mode: str) -> dict[str, int or float or bool]:
+        """Get the metrics of an AES mode along with the derived rates
+
+        Args:
+            aes_mode (str): Name of the AES mode
+
+        Returns:
+            dict[str, int or float or bool]: Metrics of the AES mode
+        """
+
+        metrics = dict(cls.modes[aes_mode])
+
+        if not metrics["finished"]:
+            metrics["elapsed_s"] = cls.clock() - metrics["started_at"]
+
+        elapsed = metrics["elapsed_s"]
+        bytes_remaining = metrics["bytes_total"] - metrics["bytes_received"]
+
+        metrics["packets_per_second"] = metrics["packets_transmitted"] / elapsed if elapsed else 0.0
+        metrics["goodput_bytes_per_second"] = metrics["bytes_received"] / elapsed if elapsed else 0.0
+
+        if metrics["finished"]:
+            metrics["eta_s"] = 0.0
+        elif metrics["goodput_bytes_per_second"]:
+            metrics["eta_s"] = bytes_remaining / metrics["goodput_bytes_per_second"]
+        else:
+            metrics["eta_s"] = None
+
+        metrics.pop("started_at")
+
+        return metrics
+
+    @classmethod
+    def _maybe_write(cls):
+        """Write the metrics files if Metrics.WRITE_INTERVAL_S has passed
+        since they were last written.
+        """
+
+        now = time.monotonic()
+
+        if now < cls._next_write:
+            return
+
+        cls._next_write = now + cls.WRITE_INTERVAL_S
+        cls.write()
+
+    @classmethod
+    def write(cls):
+        """Write the metrics of all AES modes into the output folder. The files are
+        replaced atomically so they can be polled while the transfer is running.
+        """
+
+        if cls.output_folder is None:
+            return
+
+        os.makedirs(cls.output_folder, exist_ok=True)
+
+        snapshots = {aes_mode: cls.get_snapshot(aes_mode) for aes_mode in cls.modes}
+
+        cls._write_atomic(cls.JSON_FILENAME, json.dumps(snapshots, indent=4))
+        cls._write_atomic(cls.PROMETHEUS_FILENAME, cls._to_prometheus(snapshots))
+
+    @classmethod
+    def _write_atomic(cls, filename: str, content: str):
+        """Write a file in the output folder by replacing it
+
+        Args:
+            filename (str): Name of the file
+            content (str): Content of the file
+        """
+
+        path = os.path.join(cls.output_folder, filename)
+
+        with open(path + ".tmp", "w", encoding="utf-8") as F:
+            F.write(content)
+
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def _to_prometheus(cls, snapshots: dict[str, dict[str, int or float or bool]]) -> str:
+        """Format metrics snapshots in the Prometheus text exposition format
+
+        Args:
+            snapshots (dict[str, dict[str, int or float or bool]]): Snapshots of all AES modes
+
+        Returns:
+            str: Formatted metrics
+        """
+
+        lines = []
+
+        metric_names = {name for snapshot in snapshots.values() for name in snapshot}
+
+        for name in sorted(metric_names):
+            metric_type = "counter" if name in cls.COUNTERS else "gauge"
+            full_name = f"{cls.PROMETHEUS_PREFIX}_{name}"
+
+            if metric_type == "counter":
+                full_name += "_total"
+
+            lines.append(f"# TYPE {full_name} {metric_type}")
+
+            for aes_mode, snapshot in snapshots.items():
+                value = snapshot.get(name)
+
+                if value is None:
+                    continue
+
+                lines.append(f'{full_name}{{mode="{aes_mode}"}} {float(value)}')
+
+        return "\n".join(lines) + "\n"
+
+
+class RateLimitFilter(logging.Filter):
+    """Logging filter that lets through at most one record of the same
+    message per interval. The number of suppressed records is appended
+    to the next record that is let through.
+    """
+
+    def __init__(self, interval_s: float = 1.0):
+        """
+        Args:
+            interval_s (float, optional): Minimal amount of seconds between two records
+            with the same message. Defaults to 1.0.
+        """
+
+        super().__init__()
+
+        self.interval_s = interval_s
+        self.next_allowed: dict[str, float] = {}
+        self.suppressed: dict[str, int] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Decide if a record should be logged
+
+        Args:
+            record (logging.LogRecord): Log record
+
+        Returns:
+            bool: True if the record should be logged
+        """
+
+        now = time.monotonic()
+        key = record.msg
+
+        if now < self.next_allowed.get(key, 0.0):
+            self.suppressed[key] = self.suppressed.get(key, 0) + 1
+            return False
+
+        self.next_allowed[key] = now + self.interval_s
+
+        suppressed = self.suppressed.pop(key, 0)
+
+        if suppressed:
+            record.msg = f"{record.msg} (%d similar messages suppressed)"
+            record.args = (*record.args, suppressed) if record.args else (suppressed,)
+
+        return True
@@ -0,0 +1,218 @@
+"""Received image quality module. Used to measure how much of the
+received image was damaged by the dropped packets.
+"""
+
+import math
+from typing import Iterable, Callable
+import numpy as np
+
+
+class QualityMetrics:
+    """Received image quality metrics class. The received image is compared
+    with the original one band by band, using vectorized block operations.
+    """
+
+    # Side of the square pixel windows used for the SSIM and the damage heatmap
+    WINDOW_SIZE = 8
+
+    # Rows of the original image compared at once, a multiple of WINDOW_SIZE
+    BAND_ROWS = 256
+
+    MAX_VALUE = 255
+    SSIM_C1 = (0.01 * MAX_VALUE) ** 2
+    SSIM_C2 = (0.03 * MAX_VALUE) ** 2
+
+    @classmethod
+    def compare(cls, original_bands: Iterable[bytes], received: bytes, width: int, height: int,
+                channels: int, block_size=16) -> tuple[dict[str, int or float], np.ndarray]:
+        """Compare the received image with the original one
+
+        Args:
+            original_bands (Iterable[bytes]): The original serialized image, either whole or in
+            bands of rows. Every band except the last one must have a multiple of
+            QualityMetrics.WINDOW_SIZE rows.
+            received (bytes): The received serialized image
+            width (int): Width of the image
+            height (int): Height of the image
+            channels (int): Number of channels the image has
+            block_size (int, optional): Size of the blocks the block loss rate is measured in.
+            Defaults to 16, the AES block size.
+
+        Returns:
+            tuple[dict[str, int or float], np.ndarray]: Quality metrics and the damage heatmap. The
+            heatmap holds the ratio of damaged pixels in every WINDOW_SIZE x WINDOW_SIZE window.
+        """
+
+        ssim_sum = 0.0
+        ssim_windows = 0
+        heatmap_bands = []
+
+        def on_band(original_band: np.ndarray, received_band: np.ndarray, damaged: np.ndarray):
+            nonlocal ssim_sum, ssim_windows
+
+            rows = original_band.size // (width * channels)
+
+            heatmap_bands.append(cls._get_damage_heatmap(damaged.reshape(rows, width, channels).any(axis=2)))
+
+            band_ssim = cls._get_windowed_ssim(original_band.reshape(rows, width, channels),
+                                               received_band.reshape(rows, width, channels))
+            ssim_sum += band_ssim.sum()
+            ssim_windows += band_ssim.size
+
+        metrics = cls.compare_bytes(original_bands, received, width * height * channels, block_size, on_band)
+        metrics["ssim"] = float(ssim_sum / ssim_windows) if ssim_windows else None
+
+        return metrics, np.concatenate(heatmap_bands)
+
+    @classmethod
+    def compare_bytes(cls, original_pieces: Iterable[bytes], received: bytes, size: int, block_size=16,
+                      on_piece: Callable[[np.ndarray, np.ndarray, np.ndarray], None] = None) \
+            -> dict[str, int or float]:
+        """Compare the received data with the original one byte by byte
+
+        Args:
+            original_pieces (Iterable[bytes]): The original data, either whole or in consecutive
+            pieces of any size
+            received (bytes): The received data
+            size (int): Size of the data
+            block_size (int, optional): Size of the blocks the block loss rate is measured in.
+            Defaults to 16, the AES block size.
+            on_piece (Callable[[np.ndarray, np.ndarray, np.ndarray], None], optional): Called with
+            the original piece, the received piece and the mask of damaged bytes, for every piece.
+            Defaults to None.
+
+        Returns:
+            dict[str, int or float]: Quality metrics. The PSNR is None if the data is identical.
+        """
+
+        received = np.frombuffer(received, dtype=np.uint8, count=size)
+
+        bytes_corrupted = 0
+        blocks_total = 0
+        blocks_damaged = 0
+        squared_error = 0
+
+        # Damage of the block that was cut off at the end of the previous piece
+        carry = False
+
+        offset = 0
+        for piece in original_pieces:
+            original_piece = np.frombuffer(piece, dtype=np.uint8)
+
+            if not original_piece.size:
+                continue
+            received_piece = received[offset:offset + original_piece.size]
+
+            damaged = original_piece != received_piece
+            bytes_corrupted += int(np.count_nonzero(damaged))
+
+            head = offset % block_size
+            block_damage = np.zeros(head + damaged.size, dtype=bool)
+            block_damage[head:] = damaged
+            block_damage[0] |= carry
+
+            full_blocks = block_damage.size // block_size
+            blocks_total += full_blocks
+            blocks_damaged += int(np.count_nonzero(
+                block_damage[:full_blocks * block_size].reshape(full_blocks, block_size).any(axis=1)))
+            carry = bool(block_damage[full_blocks * block_size:].any())
+
+            error = original_piece.astype(np.int64) - received_piece
+            squared_error += int(error @ error)
+
+            if on_piece is not None:
+                on_piece(original_piece, received_piece, damaged)
+
+            offset += original_piece.size
+
+        if offset % block_size:
+            blocks_total += 1
+            blocks_damaged += carry
+
+        mean_squared_error = squared_error / size if size else 0.0
+        psnr_db = None
+
+        if mean_squared_error:
+            psnr_db = 10 * math.log10(cls.MAX_VALUE ** 2 / mean_squared_error)
+
+        return {
+            "bytes_corrupted": bytes_corrupted,
+            "block_loss_rate": blocks_damaged / blocks_total if blocks_total else 0.0,
+            "psnr_db": psnr_db,
+        }
+
+    @classmethod
+    def iter_bands(cls, data: bytes, width: int, channels: int) -> Iterable[memoryview]:
+        """Split a serialized image into bands of QualityMetrics.BAND_ROWS rows, without copying it
+
+        Args:
+            data (bytes): Serialized image
+            width (int): Width of the image
+            channels (int): Number of channels the image has
+
+        Returns:
+            Iterable[memoryview]: Bands of the image
+        """
+
+        data = memoryview(data).cast("B")
+        band_size = cls.BAND_ROWS * width * channels
+
+        return (data[i:i + band_size] for i in range(0, data.nbytes, band_size))
+
+    @classmethod
+    def _get_damage_heatmap(cls, damaged_pixels: np.ndarray) -> np.ndarray:
+        """Get the ratio of damaged pixels in every window
+
+        Args:
+            damaged_pixels (np.ndarray): Boolean mask of damaged pixels, with the shape (rows, width)
+
+        Returns:
+            np.ndarray: Ratio of damaged pixels, with one value per window
+        """
+
+        size = cls.WINDOW_SIZE
+        rows, width = damaged_pixels.shape
+
+        padded = np.zeros((-(-rows // size) * size, -(-width // size) * size), dtype=np.float32)
+        padded[:rows, :width] = damaged_pixels
+
+        windows = padded.reshape(padded.shape[0] // size, size, padded.shape[1] // size, size)
+
+        # Windows on the right and bottom edges may be only partially inside of the image
+        pixel_counts = np.zeros_like(padded)
+        pixel_counts[:rows, :width] = 1
+        pixel_counts = pixel_counts.reshape(windows.shape).sum(axis=(1, 3))
+
+        return windows.sum(axis=(1, 3)) / pixel_counts
+
+    @classmethod
+    def _get_windowed_ssim(cls, original: np.ndarray, received: np.ndarray) -> np.ndarray:
+        """Compute the SSIM of every full, non-overlapping window, for every channel
+
+        Args:
+            original (np.ndarray): Original pixels, with the shape (rows, width, channels)
+            received (np.ndarray): Received pixels, with the shape (rows, width, channels)
+
+        Returns:
+            np.ndarray: SSIM of every window and channel
+        """
+
+        size = cls.WINDOW_SIZE
+        rows, width, channels = original.shape
+        shape = (rows // size, size, width // size, size, channels)
+
+        x = original[:shape[0] * size, :shape[2] * size].reshape(shape).astype(np.float64)
+        y = received[:shape[0] * size, :shape[2] * size].reshape(shape).astype(np.float64)
+
+        mean_x = x.mean(axis=(1, 3), keepdims=True)
+        mean_y = y.mean(axis=(1, 3), keepdims=True)
+
+        variance_x = ((x - mean_x) ** 2).mean(axis=(1, 3))
+        variance_y = ((y - mean_y) ** 2).mean(axis=(1, 3))
+        covariance = ((x - mean_x) * (y - mean_y)).mean(axis=(1, 3))
+
+        mean_x = mean_x[:, 0, :, 0]
+        mean_y = mean_y[:, 0, :, 0]
+
+        return ((2 * mean_x * mean_y + cls.SSIM_C1) * (2 * covariance + cls.SSIM_C2)) / \
+               ((mean_x ** 2 + mean_y ** 2 + cls.SSIM_C1) * (variance_x + variance_y + cls.SSIM_C2))
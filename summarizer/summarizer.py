@@ -6,6 +6,8 @@ import time
 import datetime
 import pickle
 from .visualizer import Visualizer
+from .metrics import Metrics
+from .clock import SimulationClock
 
 class Summarizer:
     """Event summarizer class for creating timeline graphs
@@ -48,6 +50,18 @@ class Summarizer:
     started_at: float
 
     BUSY_WAIT_AMOUNT_MS = 1.0
+    SAVE_OUTPUTS = True
+
+    @classmethod
+    def set_save_outputs(cls, save_outputs: bool):
+        """Enable or disable saving the timeline graphs, serialized events
+        and metrics to the output folder.
+
+        Args:
+            save_outputs (bool): Save outputs to the output folder
+        """
+
+        cls.SAVE_OUTPUTS = save_outputs
 
     @classmethod
     def start(cls, aes_mode: str):
@@ -59,8 +73,9 @@ class Summarizer:
 
         cls.current_aes_mode = aes_mode
         cls.events[cls.current_aes_mode] = []
-        cls.started_at = time.perf_counter()
+        cls.started_at = cls._get_clock_time()
 
+        Metrics.start(aes_mode, cls.SAVE_FOLDER if cls.SAVE_OUTPUTS else None, cls.get_current_time)
 
     @classmethod
     def _new_evt(cls, event_type: "Summarizer.EventType"):
@@ -86,10 +101,11 @@ class Summarizer:
     def _busy_wait(cls):
         """Used for adding a small delay after certain events happen.
         It fixes some events not lasting long enough to be properly
-        rendered in the visualizer.
+        rendered in the visualizer, so it is skipped when outputs aren't saved
+        or when the simulation clock is used.
         """
 
-        if not cls.BUSY_WAIT_AMOUNT_MS:
+        if not cls.BUSY_WAIT_AMOUNT_MS or not cls.SAVE_OUTPUTS or SimulationClock.enabled:
             return
 
         delay = time.perf_counter() + cls.BUSY_WAIT_AMOUNT_MS / 1000
@@ -110,6 +126,7 @@ class Summarizer:
         """
 
         cls._new_evt(cls.EventType.PACKET_DROP)
+        Metrics.increment("packets_dropped")
         cls._busy_wait()
 
     @classmethod
@@ -118,6 +135,7 @@ class Summarizer:
         """
 
         cls._new_evt(cls.EventType.PACKET_RETRANSMIT)
+        Metrics.increment("packets_retransmitted")
         cls._busy_wait()
 
     @classmethod
@@ -126,6 +144,7 @@ class Summarizer:
         """
 
         cls._new_evt(cls.EventType.CONNECTION_RESET)
+        Metrics.increment("connection_resets")
         cls._busy_wait()
 
     @classmethod
@@ -134,6 +153,7 @@ class Summarizer:
         """
 
         cls._new_evt(cls.EventType.PACKET_TRANSMIT)
+        Metrics.increment("packets_transmitted")
 
     @classmethod
     def end(cls, fail_rate: float = None):
@@ -146,6 +166,11 @@ class Summarizer:
 
         # cls._new_evt(cls.EventType.END)
 
+        Metrics.end()
+
+        if not cls.SAVE_OUTPUTS:
+            return
+
         cls._draw_timeline(fail_rate)
         cls.serialize()
 
@@ -205,10 +230,24 @@ class Summarizer:
 
     @classmethod
     def get_current_time(cls) -> float:
-        """_summary_
+        """Get the time since the summarizer context was started. If the SimulationClock
+        is enabled, the modeled link time is used.
+
+        Returns:
+            float: Time in seconds
+        """
+
+        return cls._get_clock_time() - cls.started_at
+
+    @classmethod
+    def _get_clock_time(cls) -> float:
+        """Get the absolute time of the clock in use
 
         Returns:
-            float: _description_
+            float: Time in seconds
         """
 
-        return time.perf_counter() - cls.started_at
+        if SimulationClock.enabled:
+            return SimulationClock.get_time()
+
+        return time.perf_counter()
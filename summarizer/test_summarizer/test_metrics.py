@@ -0,0 +1,86 @@
+"""Live transfer metrics unit tests
+"""
+
+import json
+import logging
+from .. import metrics
+from ..metrics import Metrics, RateLimitFilter
+
+
+def test_metrics_files(tmp_path):
+    """Test that the metrics files are replaced atomically on every write and that
+    they hold the same values in the JSON and the Prometheus format
+    """
+
+    now = [10.0]
+    write_interval = Metrics.WRITE_INTERVAL_S
+
+    Metrics.set_write_interval(0)
+
+    try:
+        Metrics.start("test_mode", str(tmp_path), lambda: now[0])
+
+        for _ in range(3):
+            now[0] += 1.0
+            Metrics.increment("packets_transmitted")
+
+            # Only the complete files are left, never the temporary ones
+            assert sorted(path.name for path in tmp_path.iterdir()) == \
+                sorted([Metrics.JSON_FILENAME, Metrics.PROMETHEUS_FILENAME])
+
+            snapshot = json.loads((tmp_path / Metrics.JSON_FILENAME).read_text())["test_mode"]
+
+        Metrics.on_progress(500, 1000)
+        Metrics.end()
+    finally:
+        Metrics.set_write_interval(write_interval)
+        Metrics.modes.pop("test_mode")
+
+    assert snapshot["packets_transmitted"] == 3
+    assert snapshot["elapsed_s"] == 3.0
+    assert snapshot["packets_per_second"] == 1.0
+
+    snapshot = json.loads((tmp_path / Metrics.JSON_FILENAME).read_text())["test_mode"]
+    prometheus = (tmp_path / Metrics.PROMETHEUS_FILENAME).read_text().splitlines()
+
+    assert snapshot["finished"] and snapshot["bytes_received"] == 500 and snapshot["eta_s"] == 0.0
+
+    assert "# TYPE aes_comm_packets_transmitted_total counter" in prometheus
+    assert 'aes_comm_packets_transmitted_total{mode="test_mode"} 3.0' in prometheus
+    assert "# TYPE aes_comm_bytes_received gauge" in prometheus
+    assert 'aes_comm_bytes_received{mode="test_mode"} 500.0' in prometheus
+
+def test_rate_limit_filter(monkeypatch):
+    """Test that repeated messages are suppressed within the interval, and that the
+    number of suppressed ones is reported with the next message let through
+    """
+
+    now = [0.0]
+    monkeypatch.setattr(metrics.time, "monotonic", lambda: now[0])
+
+    rate_limit = RateLimitFilter(1.0)
+
+    def record(msg: str, *args) -> logging.LogRecord:
+        return logging.LogRecord("test", logging.INFO, __file__, 0, msg, args, None)
+
+    assert rate_limit.filter(record("Dropping chunk %d", 1))
+
+    now[0] = 0.5
+
+    assert not rate_limit.filter(record("Dropping chunk %d", 2))
+    assert not rate_limit.filter(record("Dropping chunk %d", 3))
+
+    # Other messages are limited separately
+    assert rate_limit.filter(record("Re-requesting chunk %d", 2))
+
+    now[0] = 1.5
+    passed = record("Dropping chunk %d", 4)
+
+    assert rate_limit.filter(passed)
+    assert passed.getMessage() == "Dropping chunk 4 (2 similar messages suppressed)"
+
+    now[0] = 3.0
+    passed = record("Dropping chunk %d", 5)
+
+    assert rate_limit.filter(passed)
+    assert passed.getMessage() == "Dropping chunk 5"
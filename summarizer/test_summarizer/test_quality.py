@@ -0,0 +1,71 @@
+"""Received image quality unit tests
+"""
+
+import numpy as np
+from ..quality import QualityMetrics
+
+WIDTH = 40
+HEIGHT = 300
+CHANNELS = 3
+
+ORIGINAL = np.random.default_rng(0).integers(0, 256, HEIGHT * WIDTH * CHANNELS, dtype=np.uint8).tobytes()
+
+
+def compare(received: bytes) -> tuple[dict[str, int or float], np.ndarray]:
+    """Compare an image with ORIGINAL
+
+    Args:
+        received (bytes): Received serialized image
+
+    Returns:
+        tuple[dict[str, int or float], np.ndarray]: Quality metrics and the damage heatmap
+    """
+
+    return QualityMetrics.compare(QualityMetrics.iter_bands(ORIGINAL, WIDTH, CHANNELS),
+                                  received, WIDTH, HEIGHT, CHANNELS)
+
+def test_identical_image():
+    """Test that an identical image has no damage
+    """
+
+    metrics, heatmap = compare(ORIGINAL)
+
+    assert metrics["bytes_corrupted"] == 0
+    assert metrics["block_loss_rate"] == 0.0
+    assert metrics["psnr_db"] is None
+    assert metrics["ssim"] == 1.0
+    assert heatmap.shape == (HEIGHT // 8 + 1, WIDTH // 8) and not heatmap.any()
+
+def test_damaged_blocks():
+    """Test that zeroed blocks are counted, in the right place
+    """
+
+    received = bytearray(ORIGINAL)
+    block_count = len(ORIGINAL) // 16
+
+    # First and last block, and one block in the second band
+    for block in (0, block_count // 2, block_count - 1):
+        received[block * 16:(block + 1) * 16] = bytes(16)
+
+    metrics, heatmap = compare(received)
+
+    assert 0 < metrics["bytes_corrupted"] <= 3 * 16
+    assert metrics["block_loss_rate"] == 3 / block_count
+    assert metrics["psnr_db"] > 0
+    assert metrics["ssim"] < 1.0
+    assert heatmap[0, 0] > 0 and heatmap[-1, -1] > 0
+    assert np.count_nonzero(heatmap) == 3
+
+def test_piece_sizes():
+    """Test that the byte metrics don't depend on how the original data is split
+    """
+
+    received = bytearray(ORIGINAL)
+    received[100:150] = bytes(50)
+
+    whole = QualityMetrics.compare_bytes([ORIGINAL], received, len(ORIGINAL))
+    pieces = QualityMetrics.compare_bytes((ORIGINAL[i:i + 37] for i in range(0, len(ORIGINAL), 37)),
+                                          received, len(ORIGINAL))
+
+    assert whole == pieces
+    assert whole["block_loss_rate"] == 4 / (len(ORIGINAL) // 16)
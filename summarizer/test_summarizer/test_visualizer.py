@@ -0,0 +1,58 @@
+"""Timeline visualizer unit tests
+"""
+
+import os
+from matplotlib import pyplot as plt
+from ..visualizer import Visualizer
+
+
+def draw_run(folder: str, run_name: str):
+    """Draw the timeline of a short run into an output folder
+
+    Args:
+        folder (str): Path to the output folder
+        run_name (str): Name of the run
+    """
+
+    Visualizer.begin(os.path.join(folder, run_name))
+    Visualizer.add_all_event_names(["transmit", "drop"])
+    Visualizer.add_event(0.0, 1.0, "transmit")
+    Visualizer.add_event(1.0, 2.0, "drop")
+    Visualizer.end(run_name)
+
+def test_runs_index(tmp_path):
+    """Test that every completed run is listed in the runs.json index of its output folder,
+    that the comparative plot only takes the runs of the current output folder, and that
+    the runs only present in the index are loaded from it
+    """
+
+    first, second = str(tmp_path / "first"), str(tmp_path / "second")
+
+    try:
+        draw_run(first, "ctr")
+        draw_run(first, "cbc")
+        draw_run(second, "gcm")
+
+        assert Visualizer.read_index(os.path.join(first, Visualizer.INDEX_FILENAME)) == {
+            "cbc": os.path.join("cbc", Visualizer.EVENTS_FILENAME),
+            "ctr": os.path.join("ctr", Visualizer.EVENTS_FILENAME),
+        }
+        assert list(Visualizer.read_index(os.path.join(second, Visualizer.INDEX_FILENAME))) == ["gcm"]
+
+        Visualizer.generate_comparative_plot()
+
+        assert list(Visualizer.get_runs(second)) == ["gcm"]
+        assert os.path.exists(os.path.join(second, "comparative.png"))
+        assert not os.path.exists(os.path.join(first, "comparative.png"))
+
+        # A new process only has the index to go by
+        Visualizer.runs.clear()
+        Visualizer.load_runs_from_index(os.path.join(first, Visualizer.INDEX_FILENAME))
+
+        assert sorted(Visualizer.get_runs(first)) == ["cbc", "ctr"]
+        assert Visualizer.get_runs(first)["ctr"]["evt_name"] == ["transmit", "drop"]
+        assert not Visualizer.get_runs(second)
+    finally:
+        plt.close("all")
+        Visualizer.runs.pop(os.path.abspath(first), None)
+        Visualizer.runs.pop(os.path.abspath(second), None)
@@ -2,12 +2,14 @@
 """
 
 import os
+import json
 import pickle
 from matplotlib import pyplot as plt
 from matplotlib.collections import PolyCollection
 import matplotlib.lines as mlines
 from matplotlib.figure import figaspect
 from sortedcontainers import SortedDict
+import numpy as np
 
 
 class Visualizer:
@@ -15,10 +17,15 @@ class Visualizer:
     """
 
     IMAGE_FILENAME = "timeline.png"
+    EVENTS_FILENAME = "events.pickle"
+    INDEX_FILENAME = "runs.json"
 
     data: dict[str, list[float]]
     save_path: str
 
+    # Output folder mapped to its completed runs, so runs of different output folders are never mixed
+    runs: dict[str, dict[str, dict[str, list[float]]]] = {}
+
     @classmethod
     def begin(cls, save_folder_path: str):
         """Initialize a new visualization context
@@ -161,35 +168,129 @@ class Visualizer:
         ax.set_xlabel("Time since stream start [s]")
         ax.axes.get_yaxis().set_visible(False)
 
-        with open(os.path.dirname(cls.save_path) + "/events.pickle", "wb") as F:
+        events_path = os.path.join(os.path.dirname(cls.save_path), cls.EVENTS_FILENAME)
+
+        with open(events_path, "wb") as F:
             pickle.dump(cls.data, F)
 
         plt.savefig(cls.save_path, dpi=300, bbox_inches="tight")
 
+        run_name = os.path.basename(os.path.dirname(cls.save_path))
+        cls.get_runs(cls._get_output_folder())[run_name] = cls.data
+        cls._add_to_index(run_name)
+
+    @classmethod
+    def _get_output_folder(cls) -> str:
+        """Get the output folder of the current visualization context, the parent
+        folder of its run folder.
+
+        Returns:
+            str: Path to the output folder
+        """
+
+        return os.path.dirname(os.path.dirname(cls.save_path))
+
+    @classmethod
+    def get_runs(cls, folder: str) -> dict[str, dict[str, list[float]]]:
+        """Get the completed runs of an output folder that are held in memory.
+
+        Args:
+            folder (str): Path to the output folder
+
+        Returns:
+            dict[str, dict[str, list[float]]]: Run names mapped to their events
+        """
+
+        return cls.runs.setdefault(os.path.abspath(folder), {})
+
+    @classmethod
+    def _get_index_path(cls) -> str:
+        """Get the path of the completed runs index file. It is placed
+        in the parent folder of the current visualization context.
+
+        Returns:
+            str: Path to the index file
+        """
+
+        return os.path.join(cls._get_output_folder(), cls.INDEX_FILENAME)
+
+    @classmethod
+    def _add_to_index(cls, run_name: str):
+        """Record a completed run in the index file so the comparative plot
+        can later be rebuilt without scanning the output folder.
+
+        Args:
+            run_name (str): Name of the completed run
+        """
+
+        index_path = cls._get_index_path()
+        index = cls.read_index(index_path)
+
+        index[run_name] = os.path.join(run_name, cls.EVENTS_FILENAME)
+
+        with open(index_path, "w", encoding="utf-8") as F:
+            json.dump(index, F, indent=4, sort_keys=True)
+
+    @classmethod
+    def read_index(cls, index_path: str) -> dict[str, str]:
+        """Read the completed runs index file.
+
+        Args:
+            index_path (str): Path to the index file
+
+        Returns:
+            dict[str, str]: Run names mapped to their event files, relative to
+            the folder of the index file. Empty if the index file doesn't exist.
+        """
+
+        if not os.path.isfile(index_path):
+            return {}
+
+        with open(index_path, "r", encoding="utf-8") as F:
+            return json.load(F)
+
+    @classmethod
+    def load_runs_from_index(cls, index_path: str):
+        """Load the runs listed in an index file into memory. Only the event files
+        referenced by the index are deserialized, runs already in memory are skipped.
+
+        Args:
+            index_path (str): Path to the index file
+        """
+
+        folder = os.path.dirname(index_path)
+        runs = cls.get_runs(folder)
+
+        for run_name, events_path in cls.read_index(index_path).items():
+            if run_name in runs:
+                continue
+
+            with open(os.path.join(folder, events_path), "rb") as F:
+                runs[run_name] = pickle.load(F)
+
     @classmethod
-    def generate_comparative_plot(cls, additional_data=""):
-        """Takes all generated plots saved in the current output folder
-        and combines them into one plot.
+    def generate_comparative_plot(cls, additional_data="", runs: list[str] = None):
+        """Takes all of the completed runs of the current output folder
+        and combines them into one plot. Runs are taken from memory, runs
+        that are only present in the index file are loaded from it.
 
         Args:
             additional_data (str, optional): Any additional data relevant
             the the shared plot. Defaults to "".
+            runs (list[str], optional): Names of the runs to plot. If left empty,
+            all completed runs will be plotted. Defaults to None.
         """
 
-        path = os.path.dirname(cls.save_path)
-        path = os.path.join(path, "../")
+        path = cls._get_output_folder()
+        completed_runs = cls.get_runs(path)
 
-        data_list: SortedDict[str, float or str] = SortedDict()
+        if runs is None or any(run not in completed_runs for run in runs):
+            cls.load_runs_from_index(cls._get_index_path())
 
-        for root, subdirs, _ in os.walk(path):
-            for directory in subdirs:
-                newdirectory = os.path.join(root, directory)
-                for root1, _, files in os.walk(newdirectory):
-                    for file in files:
-                        file: str
-                        if file.endswith(".pickle"):
-                            with open(os.path.join(root1, file), "rb") as F:
-                                data_list[directory] = pickle.load(F)
+        if runs is None:
+            runs = completed_runs.keys()
+
+        data_list: SortedDict[str, float or str] = SortedDict({run: completed_runs[run] for run in runs})
 
         plt.cla()
         plt.clf()
@@ -249,3 +350,59 @@ class Visualizer:
         ax.set_title("Timeline comparative graph")
 
         plt.savefig(os.path.join(path, "comparative.png"), dpi=600, bbox_inches="tight")
+
+    @classmethod
+    def generate_line_plot(cls, series: dict[str, tuple[list[float], list[float]]], path: str,
+                           plot_title="", xlabel="", ylabel=""):
+        """Draw a line plot with one line per series.
+
+        Args:
+            series (dict[str, tuple[list[float], list[float]]]): Series names
+            mapped to their x and y values
+            path (str): Path of the saved plot image. The folder will be created
+            if it doesn't exist.
+            plot_title (str, optional): Title of the plot. Defaults to "".
+            xlabel (str, optional): Label of the x axis. Defaults to "".
+            ylabel (str, optional): Label of the y axis. Defaults to "".
+        """
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        _, ax = plt.subplots(figsize=figaspect(9 / 16))
+
+        for name, (x, y) in series.items():
+            ax.plot(x, y, marker="o", label=name)
+
+        ax.set_title(plot_title)
+        ax.set_xlabel(xlabel)
+        ax.set_ylabel(ylabel)
+        ax.grid(True, alpha=0.3)
+        ax.legend(loc="upper left", bbox_to_anchor=(1.01, 1.0), fontsize="small")
+
+        plt.savefig(path, dpi=300, bbox_inches="tight")
+        plt.close()
+
+    @classmethod
+    def generate_heatmap(cls, heatmap: np.ndarray, path: str, plot_title="", colorbar_label=""):
+        """Draw a heatmap of values between 0 and 1.
+
+        Args:
+            heatmap (np.ndarray): Two dimensional array of values
+            path (str): Path of the saved plot image. The folder will be created
+            if it doesn't exist.
+            plot_title (str, optional): Title of the plot. Defaults to "".
+            colorbar_label (str, optional): Label of the color bar. Defaults to "".
+        """
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        _, ax = plt.subplots()
+
+        image = ax.imshow(heatmap, cmap="inferno", vmin=0.0, vmax=1.0, interpolation="nearest")
+
+        ax.set_title(plot_title)
+        ax.set_axis_off()
+        plt.colorbar(image, ax=ax, label=colorbar_label)
+
+        plt.savefig(path, dpi=150, bbox_inches="tight")
+        plt.close()
@@ -0,0 +1,149 @@
+"""AES Encrypted Volatile Communication parameter sweep file.
+"""
+
+import os
+import argparse
+from communicator import Sweep
+from summarizer import Summarizer
+
+
+def parse_args() -> argparse.Namespace:
+    """Builds CLI argument list and parses it
+
+    Returns:
+        argparse.Namespace: Parsed arguments
+    """
+
+    arg = argparse.ArgumentParser()
+
+    arg.add_argument("--fail-percent",
+                    type=float,
+                    nargs="+",
+                    help="Transmission failure percentages to test",
+                    required=True)
+
+    arg.add_argument("--aes-alg",
+                    type=str,
+                    nargs="+",
+                    help="AES algorithms to test",
+                    choices=["ecb", "cbc", "cfb", "ofb", "ctr", "xts", "gcm", "gcm_packet",
+                             "chacha20_packet"],
+                    required=False,
+                    default=["ecb", "cbc", "cfb", "ofb", "ctr", "gcm"])
+
+    arg.add_argument("--aes-bit-length",
+                    type=int,
+                    nargs="+",
+                    help="AES bit lengths to test",
+                    choices=[128, 256],
+                    required=False,
+                    default=[256])
+
+    arg.add_argument("--packet-size",
+                    type=int,
+                    nargs="+",
+                    help="Packet sizes in bytes to test. Must be multiples of 16. "
+                    "Defaults to the AES key length",
+                    required=False,
+                    default=None)
+
+    arg.add_argument("--seed",
+                    type=int,
+                    nargs="+",
+                    help="Packet drop seeds, every configuration is run once per seed",
+                    required=False,
+                    default=[0])
+
+    arg.add_argument("--image-path",
+                    type=str,
+                    help="Path to the image that will be transmitted",
+                    required=False,
+                    default="")
+
+    arg.add_argument("--use-retransmission",
+                    action=argparse.BooleanOptionalAction,
+                    help="Use retransmission on packet failure",
+                    required=False,
+                    default=False)
+
+    arg.add_argument("--recovery",
+                    type=str,
+                    nargs="+",
+                    help="How the CBC and CFB receivers recover from dropped packets without retransmission, "
+                    "by updating their ciphers with zero's or by resynchronizing on the previous ciphertext "
+                    "block sent with every packet. Every given one is tested.",
+                    choices=["zero", "resync"],
+                    required=False,
+                    default=["zero"])
+
+    arg.add_argument("--max-connection-resets",
+                    type=int,
+                    help="Connection resets after which an AES mode is considered unusable",
+                    required=False,
+                    default=100)
+
+    arg.add_argument("--burst-length",
+                    type=float,
+                    help="Average number of consecutively dropped packets. If set, packets are dropped "
+                    "in bursts instead of independently",
+                    required=False,
+                    default=None)
+
+    arg.add_argument("--latency-ms",
+                    type=float,
+                    help="One way channel latency in milliseconds",
+                    required=False,
+                    default=0.0)
+
+    arg.add_argument("--bandwidth-kbps",
+                    type=float,
+                    help="Link bandwidth in kilobits per second, used by the simulation clock",
+                    required=False,
+                    default=None)
+
+    arg.add_argument("--virtual-clock",
+                    action=argparse.BooleanOptionalAction,
+                    help="Measure modeled link time instead of the time spent running the simulation",
+                    required=False,
+                    default=False)
+
+    arg.add_argument("--workers",
+                    type=int,
+                    help="Number of worker processes. Defaults to the number of CPU's",
+                    required=False,
+                    default=None)
+
+    arg.add_argument("--output-folder",
+                    type=str,
+                    help="Folder where the results table and plots will be saved",
+                    required=False,
+                    default=os.path.join(Summarizer.SAVE_FOLDER, "sweep"))
+
+    return arg.parse_args()
+
+def main():
+    """AES Encrypted Volatile Communication parameter sweep entry point.
+    """
+
+    args = parse_args()
+
+    sweep = Sweep(fail_percents=args.fail_percent,
+                  aes_modes=args.aes_alg,
+                  aes_bit_lengths=args.aes_bit_length,
+                  packet_sizes=args.packet_size,
+                  seeds=args.seed,
+                  path_to_image=args.image_path,
+                  use_retransmission=args.use_retransmission,
+                  recoveries=args.recovery,
+                  max_connection_resets=args.max_connection_resets,
+                  mean_burst_length=args.burst_length,
+                  delay_s=args.latency_ms / 1000,
+                  bandwidth_bps=args.bandwidth_kbps * 1000 if args.bandwidth_kbps else None,
+                  virtual_clock=args.virtual_clock,
+                  workers=args.workers)
+
+    sweep.run()
+    sweep.save(args.output_folder)
+
+if __name__ == "__main__":
+    main()